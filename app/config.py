@@ -15,6 +15,11 @@ class ERPNextConfig(BaseModel):
     base_url: str = Field(..., alias="ERP_BASE_URL")
     api_key: str = Field(..., alias="ERP_API_KEY")
     api_secret: str = Field(..., alias="ERP_API_SECRET")
+    # Bitta handler ichidagi barcha ERPNext so'rovlari uchun umumiy muddat (sekund)
+    handler_deadline: float = Field(15.0, alias="ERP_HANDLER_DEADLINE")
+    # HTTP/2 (h2 paketi kerak) va startup'da oldindan ochiladigan ulanishlar soni
+    http2: bool = Field(False, alias="ERP_HTTP2")
+    warmup_connections: int = Field(4, alias="ERP_WARMUP_CONNECTIONS")
 
 
 class ServerConfig(BaseModel):
@@ -35,12 +40,84 @@ class RedisConfig(BaseModel):
     db: int = Field(0, alias="REDIS_DB")
 
 
+class CacheConfig(BaseModel):
+    """ERPNext response cache (L1 in-process LRU + L2 Redis)."""
+    enabled: bool = Field(True, alias="ERP_CACHE_ENABLED")
+    local_max_entries: int = Field(1024, alias="ERP_CACHE_LOCAL_SIZE")
+    local_ttl: int = Field(30, alias="ERP_CACHE_LOCAL_TTL")
+    stale_ttl: int = Field(86400, alias="ERP_CACHE_STALE_TTL")
+    swr_max_age: int = Field(900, alias="ERP_CACHE_SWR_MAX_AGE")
+
+
+class ProductIndexConfig(BaseModel):
+    """Mijoz mahsulotlari indeksi (Redis hash: contract_id -> mahsulotlar)."""
+    enabled: bool = Field(True, alias="PRODUCT_INDEX_ENABLED")
+    ttl: int = Field(86400, alias="PRODUCT_INDEX_TTL")
+
+
+class RenderCacheConfig(BaseModel):
+    """Tayyor (formatlangan) xabarlar cache'i - in-process LRU."""
+    enabled: bool = Field(True, alias="RENDER_CACHE_ENABLED")
+    max_entries: int = Field(1024, alias="RENDER_CACHE_SIZE")
+    max_chars: int = Field(4_000_000, alias="RENDER_CACHE_MAX_CHARS")
+
+
+class SendConfig(BaseModel):
+    """Telegram'ga xabar yuborish: chat va umumiy tezlik, broadcast, contract_menu pipeline."""
+    chat_rate: float = Field(1.0, alias="TG_CHAT_RATE")
+    chat_burst: int = Field(10, alias="TG_CHAT_BURST")
+    global_rate: float = Field(25.0, alias="TG_GLOBAL_RATE")
+    global_burst: int = Field(5, alias="TG_GLOBAL_BURST")
+    broadcast_workers: int = Field(16, alias="BROADCAST_WORKERS")
+    contract_pipeline: bool = Field(True, alias="CONTRACT_MENU_PIPELINE")
+
+
+class OutboxConfig(BaseModel):
+    """Eslatmalar outbox'i (Redis stream) - qayta ishga tushganda davom ettirish, sahifalab olish."""
+    enabled: bool = Field(True, alias="REMINDER_OUTBOX_ENABLED")
+    ttl: int = Field(172800, alias="REMINDER_OUTBOX_TTL")
+    claim_idle: int = Field(60, alias="REMINDER_OUTBOX_CLAIM_IDLE")
+    page_size: int = Field(500, alias="REMINDER_PAGE_SIZE")
+    retry_delay: int = Field(300, alias="REMINDER_RETRY_DELAY")
+
+
+class LedgerConfig(BaseModel):
+    """Yuborilgan eslatmalar daftari (Redis) - takroriy yuborishlarning oldini olish."""
+    enabled: bool = Field(True, alias="DELIVERY_LEDGER_ENABLED")
+    ttl: int = Field(604800, alias="DELIVERY_LEDGER_TTL")
+    claim_ttl: int = Field(120, alias="DELIVERY_LEDGER_CLAIM_TTL")
+
+
+class LimiterConfig(BaseModel):
+    """ERPNext'ga bir vaqtdagi so'rovlar chegarasi (AIMD adaptive limiter)."""
+    initial: int = Field(10, alias="ERP_CONCURRENCY_INITIAL")
+    min_limit: int = Field(2, alias="ERP_CONCURRENCY_MIN")
+    max_limit: int = Field(40, alias="ERP_CONCURRENCY_MAX")
+    latency_target: float = Field(2.0, alias="ERP_LATENCY_TARGET")
+
+
+class CircuitBreakerConfig(BaseModel):
+    """ERPNext endpoint'lari uchun circuit breaker sozlamalari."""
+    window: float = Field(30.0, alias="ERP_BREAKER_WINDOW")
+    min_calls: int = Field(5, alias="ERP_BREAKER_MIN_CALLS")
+    error_rate: float = Field(0.5, alias="ERP_BREAKER_ERROR_RATE")
+    cool_down: float = Field(30.0, alias="ERP_BREAKER_COOLDOWN")
+
+
 class Settings(BaseModel):
     telegram: TelegramConfig
     erp: ERPNextConfig
     server: ServerConfig
     redis: RedisConfig
     support: SupportConfig
+    cache: CacheConfig
+    product_index: ProductIndexConfig
+    render_cache: RenderCacheConfig
+    send: SendConfig
+    outbox: OutboxConfig
+    ledger: LedgerConfig
+    limiter: LimiterConfig
+    breaker: CircuitBreakerConfig
 
 
 def load_config() -> Settings:
@@ -58,6 +135,9 @@ def load_config() -> Settings:
             ERP_BASE_URL=os.getenv("ERP_BASE_URL"),
             ERP_API_KEY=os.getenv("ERP_API_KEY"),
             ERP_API_SECRET=os.getenv("ERP_API_SECRET"),
+            ERP_HANDLER_DEADLINE=float(os.getenv("ERP_HANDLER_DEADLINE", 15.0)),
+            ERP_HTTP2=os.getenv("ERP_HTTP2", "false"),
+            ERP_WARMUP_CONNECTIONS=int(os.getenv("ERP_WARMUP_CONNECTIONS", 4)),
         )
 
         server = ServerConfig(
@@ -76,7 +156,77 @@ def load_config() -> Settings:
             SUPPORT_NAME=os.getenv("SUPPORT_NAME", "Operator"),
         )
 
-        return Settings(telegram=telegram, erp=erp, server=server, redis=redis, support=support)
+        cache = CacheConfig(
+            ERP_CACHE_ENABLED=os.getenv("ERP_CACHE_ENABLED", "true"),
+            ERP_CACHE_LOCAL_SIZE=int(os.getenv("ERP_CACHE_LOCAL_SIZE", 1024)),
+            ERP_CACHE_LOCAL_TTL=int(os.getenv("ERP_CACHE_LOCAL_TTL", 30)),
+            ERP_CACHE_STALE_TTL=int(os.getenv("ERP_CACHE_STALE_TTL", 86400)),
+            ERP_CACHE_SWR_MAX_AGE=int(os.getenv("ERP_CACHE_SWR_MAX_AGE", 900)),
+        )
+
+        product_index = ProductIndexConfig(
+            PRODUCT_INDEX_ENABLED=os.getenv("PRODUCT_INDEX_ENABLED", "true"),
+            PRODUCT_INDEX_TTL=int(os.getenv("PRODUCT_INDEX_TTL", 86400)),
+        )
+
+        render_cache = RenderCacheConfig(
+            RENDER_CACHE_ENABLED=os.getenv("RENDER_CACHE_ENABLED", "true"),
+            RENDER_CACHE_SIZE=int(os.getenv("RENDER_CACHE_SIZE", 1024)),
+            RENDER_CACHE_MAX_CHARS=int(os.getenv("RENDER_CACHE_MAX_CHARS", 4_000_000)),
+        )
+
+        send = SendConfig(
+            TG_CHAT_RATE=float(os.getenv("TG_CHAT_RATE", 1.0)),
+            TG_CHAT_BURST=int(os.getenv("TG_CHAT_BURST", 10)),
+            TG_GLOBAL_RATE=float(os.getenv("TG_GLOBAL_RATE", 25.0)),
+            TG_GLOBAL_BURST=int(os.getenv("TG_GLOBAL_BURST", 5)),
+            BROADCAST_WORKERS=int(os.getenv("BROADCAST_WORKERS", 16)),
+            CONTRACT_MENU_PIPELINE=os.getenv("CONTRACT_MENU_PIPELINE", "true"),
+        )
+
+        outbox = OutboxConfig(
+            REMINDER_OUTBOX_ENABLED=os.getenv("REMINDER_OUTBOX_ENABLED", "true"),
+            REMINDER_OUTBOX_TTL=int(os.getenv("REMINDER_OUTBOX_TTL", 172800)),
+            REMINDER_OUTBOX_CLAIM_IDLE=int(os.getenv("REMINDER_OUTBOX_CLAIM_IDLE", 60)),
+            REMINDER_PAGE_SIZE=int(os.getenv("REMINDER_PAGE_SIZE", 500)),
+            REMINDER_RETRY_DELAY=int(os.getenv("REMINDER_RETRY_DELAY", 300)),
+        )
+
+        ledger = LedgerConfig(
+            DELIVERY_LEDGER_ENABLED=os.getenv("DELIVERY_LEDGER_ENABLED", "true"),
+            DELIVERY_LEDGER_TTL=int(os.getenv("DELIVERY_LEDGER_TTL", 604800)),
+            DELIVERY_LEDGER_CLAIM_TTL=int(os.getenv("DELIVERY_LEDGER_CLAIM_TTL", 120)),
+        )
+
+        limiter = LimiterConfig(
+            ERP_CONCURRENCY_INITIAL=int(os.getenv("ERP_CONCURRENCY_INITIAL", 10)),
+            ERP_CONCURRENCY_MIN=int(os.getenv("ERP_CONCURRENCY_MIN", 2)),
+            ERP_CONCURRENCY_MAX=int(os.getenv("ERP_CONCURRENCY_MAX", 40)),
+            ERP_LATENCY_TARGET=float(os.getenv("ERP_LATENCY_TARGET", 2.0)),
+        )
+
+        breaker = CircuitBreakerConfig(
+            ERP_BREAKER_WINDOW=float(os.getenv("ERP_BREAKER_WINDOW", 30.0)),
+            ERP_BREAKER_MIN_CALLS=int(os.getenv("ERP_BREAKER_MIN_CALLS", 5)),
+            ERP_BREAKER_ERROR_RATE=float(os.getenv("ERP_BREAKER_ERROR_RATE", 0.5)),
+            ERP_BREAKER_COOLDOWN=float(os.getenv("ERP_BREAKER_COOLDOWN", 30.0)),
+        )
+
+        return Settings(
+            telegram=telegram,
+            erp=erp,
+            server=server,
+            redis=redis,
+            support=support,
+            cache=cache,
+            product_index=product_index,
+            render_cache=render_cache,
+            send=send,
+            outbox=outbox,
+            ledger=ledger,
+            limiter=limiter,
+            breaker=breaker,
+        )
 
     except ValidationError as e:
         print("❌ Config validation error:", e)
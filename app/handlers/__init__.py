@@ -1,4 +1,6 @@
 from aiogram import Dispatcher
+from app.config import config
+from app.middlewares import ERPDeadlineMiddleware
 from .start import register_start_handlers
 from .passport import register_passport_handlers
 from .menu import register_menu_handlers
@@ -22,6 +24,9 @@ def register_all_handlers(dp: Dispatcher):
 
     ⚠️ DIQQAT: Tartibni o'zgartirish handler'lar ishlashini buzishi mumkin!
     """
+    # 0. Har bir update uchun ERPNext vaqt byudjeti (barcha handler'larga)
+    dp.update.outer_middleware(ERPDeadlineMiddleware(config.erp.handler_deadline))
+
     # 1. Commands - Eng birinchi (yuqori prioritet)
     register_start_handlers(dp)
 
@@ -1,14 +1,26 @@
+import asyncio
+from typing import Dict, List
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
+from app.config import config
+
 from app.services.erpnext_api import (
     erp_get_customer_by_passport,
     erp_get_contract_details,
-    erp_get_payment_schedule,  # ✅ YANGI: To'lov jadvali uchun
+    erp_get_payment_schedules,  # ✅ YANGI: Barcha shartnomalar jadvali bitta chaqiruvda
+    balance_fingerprint,
+    spawn_background,
 )
+from app.services.models import Contract, Product, ScheduleRow
+from app.services.rate_limit import chat_limiter
 from app.utils.keyboard import main_menu_keyboard, contract_list_keyboard
-from app.utils.formatters import format_contract_details, format_money
+from app.utils.formatters import format_contract_details, format_money, format_quantity
+from app.utils.chunker import split_message
+from app.utils.messages import answer_long, answer_parts, edit_or_resend
+from app.utils.render import FOOTER, RULE, Builder, cached_render, header, section
 from app.states.user_states import ContractState, PassportState
 
 router = Router()
@@ -29,19 +41,33 @@ async def contract_menu(msg: Message, state: FSMContext):
     Telegram ID orqali to'g'ridan-to'g'ri shartnomalarni olamiz.
     User allaqachon /start da passport kiritgan, shuning uchun
     qaytadan so'rash kerak emas.
+
+    Stale-while-revalidate: cache'dagi (biroz eskirgan) shartnomalar darhol
+    ko'rsatiladi, o'zgargan shartnomalar xabari keyinroq tahrirlanadi.
+
+    Pipeline (CONTRACT_MENU_PIPELINE): "yuklanmoqda" xabari ERPNext so'rovi
+    bilan parallel yuboriladi, shartnomalar - _send_contracts_pipelined orqali.
     """
     telegram_id = msg.from_user.id
+    pipeline = config.send.contract_pipeline
 
     # ✅ DEBUG: Log telegram_id
     from loguru import logger
     logger.info(f"Contract menu requested by telegram_id: {telegram_id}")
 
-    await msg.answer("🔎 Shartnomalar yuklanmoqda...")
+    # aiogram metodi coroutine emas, awaitable - ensure_future uni task qiladi
+    loading = asyncio.ensure_future(msg.answer("🔎 Shartnomalar yuklanmoqda..."))
+    if not pipeline:
+        await loading
 
     # ✅ YANGI: To'g'ridan-to'g'ri get_my_contracts_by_telegram_id ni chaqiramiz
     from app.services.erpnext_api import erp_get_my_contracts_by_telegram_id
 
-    response = await erp_get_my_contracts_by_telegram_id(telegram_id)
+    try:
+        response = await erp_get_my_contracts_by_telegram_id(telegram_id, allow_stale=True)
+    finally:
+        # Keyingi xabarlar "yuklanmoqda" dan keyin kelishi kerak
+        await loading
 
     # ✅ DEBUG: Response'ni log qilish
     logger.debug(f"API Response: success={response.get('success')}, customer={response.get('customer_id')}")
@@ -77,114 +103,246 @@ async def contract_menu(msg: Message, state: FSMContext):
         return
 
     # ✅ YANGI: Batafsil shartnomalarni formatlab ko'rsatish (mahsulotlar + TO'LOV JADVALI bilan)
-    import asyncio
-
-    for contract in contracts:
-        contract_id = contract.get("contract_id", "—")
-        contract_date = contract.get("contract_date", "—")
-        total_amount = contract.get("total_amount", 0)
-        paid = contract.get("paid", 0)
-        remaining = contract.get("remaining", 0)
-        products = contract.get("products", [])
-        next_payment = contract.get("next_payment")
-
-        # ✅ YANGI: To'lov jadvalini olish
-        schedule_data = await erp_get_payment_schedule(contract_id)
-        schedule = schedule_data.get("schedule", []) if schedule_data.get("success") else []
-
-        # Shartnoma ma'lumotlari
-        message = f"━━━━━━━━━━━━━━━━━━━━\n"
-        message += f"📄 <b>SHARTNOMA: {contract_id}</b>\n"
-        message += f"━━━━━━━━━━━━━━━━━━━━\n\n"
-        message += f"📅 Tuzilgan sana: <b>{contract_date}</b>\n\n"
-        message += f"💰 Umumiy summa: <b>${format_money(total_amount)}</b>\n"
-        message += f"✅ To'langan: <b>${format_money(paid)}</b>\n"
-        message += f"📉 Qoldiq: <b>${format_money(remaining)}</b>\n"
-
-        # ✅ YANGI: Shartnoma yakunlanganligini ko'rsatish
-        if remaining <= 0 and paid >= total_amount:
-            message += f"\n🎉 <b>SHARTNOMA YAKUNLANDI!</b> ✅\n"
-            message += f"<i>Barcha to'lovlar amalga oshirildi.</i>\n"
-
-        # ✅ MAHSULOTLAR
-        if products:
-            message += f"\n━━━━━━━━━━━━━━━━━━━━\n"
-            message += f"🛍 <b>MAHSULOTLAR ({len(products)} ta)</b>\n"
-            message += f"━━━━━━━━━━━━━━━━━━━━\n\n"
-            for i, p in enumerate(products, 1):
-                p_name = p.get("name", "—")
-                p_qty = p.get("qty", 0)
-                p_imei = p.get("imei", "")
-
-                message += f"<b>{i}. {p_name}</b> — {p_qty} dona\n"
-                if p_imei:
-                    message += f"   🔢 IMEI: <code>{p_imei}</code>\n"
-
-        # ✅ YANGI: TO'LOV JADVALI (qaysi kunlari to'lov qilish kerak)
-        if schedule:
-            total_months = len(schedule)
-            paid_months = len([s for s in schedule if s.get("status") == "paid"])
-            overdue_months = len([s for s in schedule if s.get("is_overdue")])
-
-            message += f"\n━━━━━━━━━━━━━━━━━━━━\n"
-            message += f"📅 <b>TO'LOV JADVALI ({total_months} oylik)</b>\n"
-            message += f"━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            message += f"✅ To'langan oylar: <b>{paid_months}</b> ta\n"
-            message += f"⏳ Qolgan oylar: <b>{total_months - paid_months}</b> ta\n"
-            if overdue_months > 0:
-                message += f"❌ Kechikkan: <b>{overdue_months}</b> ta\n"
-
-            message += f"\n<b>Oylar tafsiloti:</b>\n\n"
-
-            for month in schedule:
-                month_num = month.get("month", 0)
-                due_date = month.get("due_date", "—")
-                amount = month.get("amount", 0)
-                month_paid = month.get("paid", 0)
-                outstanding = month.get("outstanding", 0)
-                status = month.get("status", "pending")
-                is_overdue = month.get("is_overdue", False)
-
-                # Status emoji va text
-                if status == "paid":
-                    emoji = "✅"
-                    status_text = "To'langan"
-                elif status == "partial":
-                    emoji = "⚠️"
-                    status_text = f"Qisman (${format_money(month_paid)})"
-                elif is_overdue:
-                    emoji = "❌"
-                    status_text = "Kechikkan!"
-                else:
-                    emoji = "⏳"
-                    status_text = "Kutilmoqda"
-
-                message += f"{emoji} <b>{month_num}-oy</b> | {due_date}\n"
-                message += f"   💵 ${format_money(amount)} — {status_text}\n"
-
-                if outstanding > 0 and status != "paid":
-                    message += f"   📉 Qoldiq: ${format_money(outstanding)}\n"
-
-        # ✅ KEYINGI TO'LOV (qisqa xulosa)
-        elif next_payment:
-            message += f"\n━━━━━━━━━━━━━━━━━━━━\n"
-            message += f"📅 <b>KEYINGI TO'LOV:</b>\n"
-            message += f"   📆 Muddat: <b>{next_payment.get('due_date', '—')}</b>\n"
-            message += f"   💰 Summa: <b>${format_money(next_payment.get('amount', 0))}</b>\n"
-            message += f"   ⏰ {next_payment.get('status_uz', 'Kutilmoqda')}\n"
-
-        message += f"\n━━━━━━━━━━━━━━━━━━━━"
-
-        await msg.answer(
-            message,
-            reply_markup=main_menu_keyboard(),
-            parse_mode="HTML"
+    if pipeline:
+        sent_messages = await _send_contracts_pipelined(msg, contracts)
+    else:
+        # Barcha shartnomalar jadvalini oldindan olish (batch / parallel)
+        # Avval har bir shartnoma uchun ketma-ket so'rov yuborilardi (N+1 problem)
+        schedules = await erp_get_payment_schedules(
+            [contract.contract_id for contract in contracts],
+            allow_stale=True,
         )
 
+        sent_messages = {}
+        for contract in contracts:
+            contract_id = contract.contract_id or "—"
+            # Uzun jadvalli shartnoma (5 yillik, ko'p mahsulot) 4096 limitdan oshadi - bo'laklanadi
+            sent_messages[contract_id] = await answer_long(
+                msg,
+                _render_contract(contract, schedules.get(contract_id)),
+                reply_markup=main_menu_keyboard(),
+                parse_mode="HTML"
+            )
+
+    # ✅ Stale-while-revalidate: eskirgan cache ko'rsatildi - yangisini background'da olamiz
+    if response.get("stale"):
+        spawn_background(_revalidate_contracts(msg, telegram_id, response, sent_messages))
+
     await state.clear()
 
 
+async def _send_contracts_pipelined(msg: Message, contracts: List[Contract]) -> Dict[str, Message]:
+    """
+    Shartnoma xabarlarini pipeline bilan yuborish.
+
+    - Jadvallar parallel olinadi: birinchi shartnomaniki alohida (kichik
+      so'rov - birinchi xabar qolganlarini kutmaydi), qolganlari bitta batch bilan
+    - Har bir shartnoma oldingi xabar Telegram'ga ketayotgan paytda formatlanadi
+    - Xabarlar shartnomalar tartibida, chat_limiter (chat bo'yicha token
+      bucket) orqali yuboriladi - ko'p shartnomali mijoz 429 olmaydi
+
+    Returns:
+        {contract_id: yuborilgan xabar (bo'laklangan bo'lsa - oxirgisi)}
+    """
+    contract_ids = [contract.contract_id for contract in contracts]
+    first = asyncio.create_task(erp_get_payment_schedules(contract_ids[:1], allow_stale=True))
+    rest = first
+    if len(contract_ids) > 1:
+        rest = asyncio.create_task(erp_get_payment_schedules(contract_ids[1:], allow_stale=True))
+
+    chat_id = msg.chat.id
+    sent_messages: Dict[str, Message] = {}
+    sending = None   # (contract_id, yuborilayotgan xabar task'i)
+
+    try:
+        for index, contract in enumerate(contracts):
+            schedules = await (first if index == 0 else rest)
+            contract_id = contract.contract_id or "—"
+            parts = split_message(_render_contract(contract, schedules.get(contract_id)))
+
+            # Tartib saqlanadi: keyingi xabar oldingisi yetib borgandan keyin
+            if sending:
+                sent_messages[sending[0]] = await sending[1]
+
+            await chat_limiter.acquire(chat_id, len(parts))
+            sending = (contract_id, asyncio.create_task(answer_parts(
+                msg,
+                parts,
+                reply_markup=main_menu_keyboard(),
+                parse_mode="HTML"
+            )))
+
+        if sending:
+            sent_messages[sending[0]] = await sending[1]
+    finally:
+        # Xato / deadline - qolgan so'rovlar va yuborish to'xtatiladi
+        for task in (first, rest, sending[1] if sending else None):
+            if task is not None and not task.done():
+                task.cancel()
+
+    return sent_messages
+
+
+_COMPLETED = "\n🎉 <b>SHARTNOMA YAKUNLANDI!</b> ✅\n<i>Barcha to'lovlar amalga oshirildi.</i>\n"
+
+
+def _contract_key(contract: Contract, schedule_data: dict) -> tuple:
+    """Render cache kaliti - shartnoma xabarida ko'rinadigan maydonlar."""
+    schedule_data = schedule_data or {}
+    schedule = schedule_data.get("schedule", []) if schedule_data.get("success") else []
+    next_payment = contract.next_payment
+
+    return (
+        contract.contract_id, contract.contract_date,
+        contract.total_amount, contract.paid, contract.remaining,
+        tuple((p.name, p.qty, p.imei) for p in contract.products),
+        tuple(
+            (s.month, s.due_date, s.amount, s.paid, s.outstanding, s.status, s.is_overdue)
+            for s in schedule
+        ),
+        (next_payment.due_date, next_payment.amount, next_payment.status_uz) if next_payment else None,
+    )
+
+
+@cached_render("contract_card", _contract_key)
+def _render_contract(contract: Contract, schedule_data: dict) -> str:
+    """Bitta shartnoma xabari (mahsulotlar + TO'LOV JADVALI bilan)."""
+    contract_id = contract.contract_id or "—"
+    contract_date = contract.contract_date or "—"
+    products = contract.products
+    next_payment = contract.next_payment
+
+    # ✅ YANGI: To'lov jadvali (oldindan olingan)
+    schedule_data = schedule_data or {}
+    schedule = schedule_data.get("schedule", []) if schedule_data.get("success") else []
+
+    # Shartnoma ma'lumotlari
+    out = Builder(header(f"📄 <b>SHARTNOMA: {contract_id}</b>"))
+    add = out.add
+    add(
+        f"📅 Tuzilgan sana: <b>{contract_date}</b>\n\n"
+        f"💰 Umumiy summa: <b>${format_money(contract.total_amount)}</b>\n"
+        f"✅ To'langan: <b>${format_money(contract.paid)}</b>\n"
+        f"📉 Qoldiq: <b>${format_money(contract.remaining)}</b>\n"
+    )
+
+    # ✅ YANGI: Shartnoma yakunlanganligini ko'rsatish
+    if contract.is_completed:
+        add(_COMPLETED)
+
+    # ✅ MAHSULOTLAR
+    if products:
+        add(section(f"🛍 <b>MAHSULOTLAR ({len(products)} ta)</b>"))
+        out.extend(_product_row(i, p) for i, p in enumerate(products, 1))
+
+    # ✅ YANGI: TO'LOV JADVALI (qaysi kunlari to'lov qilish kerak)
+    if schedule:
+        total_months = len(schedule)
+        paid_months = sum(1 for s in schedule if s.status == "paid")
+        overdue_months = sum(1 for s in schedule if s.is_overdue)
+
+        add(section(f"📅 <b>TO'LOV JADVALI ({total_months} oylik)</b>"))
+        add(
+            f"✅ To'langan oylar: <b>{paid_months}</b> ta\n"
+            f"⏳ Qolgan oylar: <b>{total_months - paid_months}</b> ta\n"
+        )
+        if overdue_months > 0:
+            add(f"❌ Kechikkan: <b>{overdue_months}</b> ta\n")
+
+        add("\n<b>Oylar tafsiloti:</b>\n\n")
+        out.extend(_schedule_row(month) for month in schedule)
+
+    # ✅ KEYINGI TO'LOV (qisqa xulosa)
+    elif next_payment:
+        add(
+            f"\n{RULE}\n"
+            f"📅 <b>KEYINGI TO'LOV:</b>\n"
+            f"   📆 Muddat: <b>{next_payment.due_date or '—'}</b>\n"
+            f"   💰 Summa: <b>${format_money(next_payment.amount)}</b>\n"
+            f"   ⏰ {next_payment.status_uz or 'Kutilmoqda'}\n"
+        )
+
+    add(FOOTER)
+
+    return out.render()
+
+
+def _product_row(idx: int, product: Product) -> str:
+    row = f"<b>{idx}. {product.name or '—'}</b> — {format_quantity(product.qty)} dona\n"
+    if product.imei:
+        row += f"   🔢 IMEI: <code>{product.imei}</code>\n"
+    return row
+
+
+def _schedule_row(month: ScheduleRow) -> str:
+    """Jadvaldagi bitta oy: holat emoji, sana, summa va qoldiq."""
+    status = month.status
+
+    # Status emoji va text
+    if status == "paid":
+        emoji = "✅"
+        status_text = "To'langan"
+    elif status == "partial":
+        emoji = "⚠️"
+        status_text = f"Qisman (${format_money(month.paid)})"
+    elif month.is_overdue:
+        emoji = "❌"
+        status_text = "Kechikkan!"
+    else:
+        emoji = "⏳"
+        status_text = "Kutilmoqda"
+
+    row = (
+        f"{emoji} <b>{month.month}-oy</b> | {month.due_date or '—'}\n"
+        f"   💵 ${format_money(month.amount)} — {status_text}\n"
+    )
+
+    if month.outstanding > 0 and status != "paid":
+        row += f"   📉 Qoldiq: ${format_money(month.outstanding)}\n"
+
+    return row
+
+
+async def _revalidate_contracts(msg: Message, telegram_id: int, stale_response: dict, sent_messages: dict):
+    """
+    Eskirgan shartnomalarni ERPNext'dan yangilash.
+
+    Faqat balansi yoki keyingi to'lovi o'zgargan shartnomalar xabari
+    tahrirlanadi; yangi shartnoma paydo bo'lsa - alohida xabar yuboriladi.
+    """
+    from loguru import logger
+    from app.services.erpnext_api import erp_get_my_contracts_by_telegram_id
+
+    try:
+        fresh = await erp_get_my_contracts_by_telegram_id(telegram_id)
+
+        # ERPNext hali ham ishlamayapti - ko'rsatilgan ma'lumot qoladi
+        if not fresh.get("success") or fresh.get("stale"):
+            return
+
+        old = balance_fingerprint(stale_response.get("contracts"))
+        new = balance_fingerprint(fresh.get("contracts"))
+        changed = [cid for cid, values in new.items() if old.get(cid) != values]
+        if not changed:
+            return
+
+        logger.info(f"Contracts changed after revalidation: telegram_id={telegram_id}, contracts={changed}")
+
+        schedules = await erp_get_payment_schedules(changed)
+        for contract in fresh.get("contracts", []):
+            contract_id = contract.contract_id or "—"
+            if contract_id not in changed:
+                continue
+
+            text = _render_contract(contract, schedules.get(contract_id))
+            if contract_id in sent_messages:
+                await edit_or_resend(sent_messages[contract_id], text)
+            else:
+                await answer_long(msg, text, reply_markup=main_menu_keyboard(), parse_mode="HTML")
+    except Exception as e:
+        logger.warning(f"Contracts revalidation failed: telegram_id={telegram_id} - {e}")
+
+
 # 3️⃣ CALLBACK → bitta kontrakt detali
 async def kontrakt_details(call: CallbackQuery, state: FSMContext):
     data = call.data.split(":")
@@ -207,7 +365,8 @@ async def kontrakt_details(call: CallbackQuery, state: FSMContext):
     # Formatlangan shartnoma
     formatted = format_contract_details(response)
 
-    await call.message.answer(
+    await answer_long(
+        call.message,
         formatted,
         reply_markup=main_menu_keyboard()
     )
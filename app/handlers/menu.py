@@ -15,9 +15,15 @@ Bu yerda faqat "Orqaga" tugmasi va profil handler'lari qoldirilgan.
 
 from aiogram import Router, F
 from aiogram.types import Message
+from loguru import logger
 
 from app.utils.keyboard import main_menu_keyboard
-from app.services.erpnext_api import erp_get_contracts_by_telegram_id
+from app.utils.messages import answer_long, edit_or_resend
+from app.services.erpnext_api import (
+    erp_get_contracts_by_telegram_id,
+    balance_fingerprint,
+    spawn_background,
+)
 
 router = Router()
 
@@ -47,12 +53,16 @@ async def menu_profile(msg: Message):
     Telegram ID bo'yicha.
 
     YANGI: format_customer_profile ishlatiladi - professional ko'rinish
+
+    Stale-while-revalidate: cache'dagi (biroz eskirgan) profil darhol
+    ko'rsatiladi, yangisi background'da olinadi - balans yoki keyingi
+    to'lov o'zgargan bo'lsa xabar tahrirlanadi.
     """
     telegram_id = msg.from_user.id
 
     await msg.answer("🔎 Profil ma'lumotlari yuklanmoqda...")
 
-    data = await erp_get_contracts_by_telegram_id(telegram_id)
+    data = await erp_get_contracts_by_telegram_id(telegram_id, allow_stale=True)
 
     if not data or not data.get("success"):
         await msg.answer(
@@ -68,7 +78,30 @@ async def menu_profile(msg: Message):
 
     profile_text = format_customer_profile(data)
 
-    await msg.answer(profile_text, reply_markup=main_menu_keyboard())
+    sent = await answer_long(msg, profile_text, reply_markup=main_menu_keyboard())
+
+    if data.get("stale"):
+        spawn_background(_revalidate_profile(sent, telegram_id, data))
+
+
+async def _revalidate_profile(sent: Message, telegram_id: int, stale_data: dict):
+    """Eskirgan profilni ERPNext'dan yangilash va kerak bo'lsa xabarni tahrirlash."""
+    from app.utils.formatters import format_customer_profile
+
+    try:
+        fresh = await erp_get_contracts_by_telegram_id(telegram_id)
+
+        # ERPNext hali ham ishlamayapti - ko'rsatilgan ma'lumot qoladi
+        if not fresh.get("success") or fresh.get("stale"):
+            return
+
+        if balance_fingerprint(fresh.get("contracts")) == balance_fingerprint(stale_data.get("contracts")):
+            return
+
+        logger.info(f"Profile changed after revalidation, editing message: telegram_id={telegram_id}")
+        await edit_or_resend(sent, format_customer_profile(fresh))
+    except Exception as e:
+        logger.warning(f"Profile revalidation failed: telegram_id={telegram_id} - {e}")
 
 
 # ============================================================
@@ -8,6 +8,7 @@ from app.states.user_states import PassportState
 from app.services.erpnext_api import erp_get_customer_by_passport
 from app.utils.formatters import format_customer_profile
 from app.utils.keyboard import main_menu_keyboard
+from app.utils.messages import answer_long
 from app.services.support import get_support_contact
 
 
@@ -72,7 +73,7 @@ async def passport_input_handler(msg: Message, state: FSMContext):
 
         # Success tekshiruvi
         success = data.get("success")
-        has_customer = data.get("customer") is not None and len(data.get("customer", {})) > 0
+        has_customer = data.get("customer") is not None
         if isinstance(success, str):
             success = success.lower() in ('true', '1', 'yes')
 
@@ -80,9 +81,9 @@ async def passport_input_handler(msg: Message, state: FSMContext):
 
         if is_success:
             # ✅ SUCCESS
-            customer = data.get("customer", {})
-            customer_name = customer.get("customer_name", "Mijoz")
-            customer_id = customer.get("customer_id")
+            customer = data["customer"]
+            customer_name = customer.customer_name or "Mijoz"
+            customer_id = customer.customer_id
             is_new_link = data.get("is_new_link", False)
 
             if is_new_link:
@@ -95,7 +96,8 @@ async def passport_input_handler(msg: Message, state: FSMContext):
 
             profile_text = format_customer_profile(data)
 
-            await msg.answer(
+            await answer_long(
+                msg,
                 welcome_text + profile_text,
                 reply_markup=main_menu_keyboard()
             )
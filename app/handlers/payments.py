@@ -9,11 +9,16 @@ from app.services.erpnext_api import (
     erp_get_payment_schedule,
     erp_get_contract_details,
 )
+from app.services.models import parse_schedule
 from app.utils.keyboard import main_menu_keyboard, contract_list_keyboard
 from app.utils.formatters import (
     format_payment_history_with_products,
     format_detailed_payment_history,
+    detailed_payment_history_key,
 )
+from app.utils.render import render_cache
+from app.utils.chunker import split_message
+from app.utils.messages import answer_parts
 from app.services.support import get_support_contact
 
 router = Router()
@@ -140,7 +145,7 @@ async def show_payment_history(callback: CallbackQuery, state: FSMContext):
             if schedule_data.get("success"):
                 safe_schedule_data = schedule_data
             elif schedule_data.get("schedule"):
-                safe_schedule_data = {"schedule": schedule_data.get("schedule", []), "success": True}
+                safe_schedule_data = {"schedule": parse_schedule(schedule_data.get("schedule")), "success": True}
 
         # Payment history data tayyorlash
         payment_history_data = {
@@ -153,33 +158,25 @@ async def show_payment_history(callback: CallbackQuery, state: FSMContext):
         logger.info(f"Payments count: {len(payment_history_data.get('payments', []))}")
         logger.info(f"Schedule count: {len(safe_schedule_data.get('schedule', []))}")
 
-        # ✅ Batafsil formatter ishlatish
-        formatted = format_detailed_payment_history(
-            contract_data=contract_data,
-            schedule_data=safe_schedule_data,
-            payment_history_data=payment_history_data
+        # ✅ Batafsil formatter ishlatish - Telegram 4096 limit uchun bo'laklangan.
+        # Ma'lumot o'zgarmagan bo'lsa bo'laklar render cache'dan olinadi
+        parts = render_cache.render(
+            "detailed_payment_history",
+            detailed_payment_history_key(contract_data, safe_schedule_data, payment_history_data),
+            lambda: tuple(split_message(format_detailed_payment_history(
+                contract_data=contract_data,
+                schedule_data=safe_schedule_data,
+                payment_history_data=payment_history_data
+            ))),
         )
 
-        # Xabar uzunligini tekshirish (Telegram 4096 limit)
-        if len(formatted) > 4000:
-            # Xabarni bo'laklarga ajratamiz
-            parts = split_long_message(formatted)
-            for i, part in enumerate(parts):
-                if i == len(parts) - 1:
-                    # Oxirgi qism - keyboard bilan
-                    await callback.message.answer(
-                        part,
-                        reply_markup=main_menu_keyboard(),
-                        parse_mode="HTML"
-                    )
-                else:
-                    await callback.message.answer(part, parse_mode="HTML")
-        else:
-            await callback.message.answer(
-                formatted,
-                reply_markup=main_menu_keyboard(),
-                parse_mode="HTML"
-            )
+        # Oxirgi qism - keyboard bilan
+        await answer_parts(
+            callback.message,
+            parts,
+            reply_markup=main_menu_keyboard(),
+            parse_mode="HTML"
+        )
 
         logger.success(f"Detailed payment history shown for {contract_id}")
 
@@ -201,40 +198,6 @@ async def show_payment_history(callback: CallbackQuery, state: FSMContext):
         )
 
 
-def split_long_message(text: str, max_length: int = 4000) -> list:
-    """
-    Uzun xabarni bo'laklarga ajratish.
-
-    Args:
-        text: Uzun xabar matni
-        max_length: Maksimal uzunlik (default 4000)
-
-    Returns:
-        List of message parts
-    """
-    if len(text) <= max_length:
-        return [text]
-
-    parts = []
-    current_part = ""
-
-    # Bo'laklarga ajratish (satrlar bo'yicha)
-    lines = text.split("\n")
-
-    for line in lines:
-        if len(current_part) + len(line) + 1 <= max_length:
-            current_part += line + "\n"
-        else:
-            if current_part:
-                parts.append(current_part.strip())
-            current_part = line + "\n"
-
-    if current_part:
-        parts.append(current_part.strip())
-
-    return parts
-
-
 def register_payment_handlers(dp):
     """
     Payment handler'larni register qilish.
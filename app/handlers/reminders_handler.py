@@ -19,14 +19,24 @@ Bot: Telegram ID orqali ERPNext'dan eslatmalarni oladi
 Bot: Eslatmalarni chiroyli formatda ko'rsatadi
 """
 
+import asyncio
+from typing import Any, Dict, List, Tuple
+
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 
 from app.utils.keyboard import main_menu_keyboard
-from app.utils.formatters import format_money
-from app.services.erpnext_api import erp_get_reminders_by_telegram_id
+from app.utils.formatters import format_money, format_quantity
+from app.utils.messages import answer_long
+from app.services.erpnext_api import (
+    erp_get_my_contracts_by_telegram_id,
+    erp_get_reminders_by_telegram_id,
+    spawn_background,
+)
+from app.services.models import Product
+from app.services.product_index import product_index
 from app.services.support import get_support_contact
 
 
@@ -49,9 +59,9 @@ async def show_reminders(msg: Message, state: FSMContext):
     await msg.answer("⏳ Eslatmalar yuklanmoqda...")
 
     try:
-        # ERPNext'dan eslatmalarni olish
+        # ERPNext'dan eslatmalarni (va mahsulotlarni) olish
         logger.info(f"Fetching reminders for telegram_id: {telegram_id}")
-        data = await erp_get_reminders_by_telegram_id(telegram_id)
+        data, contracts_products = await _load_reminders(telegram_id)
 
         # Success check
         if not data or not data.get("success"):
@@ -79,20 +89,6 @@ async def show_reminders(msg: Message, state: FSMContext):
             )
             return
 
-        # ✅ YANGI: Har bir shartnoma uchun mahsulot ma'lumotlarini olish
-        # Barcha shartnomalarni olish
-        from app.services.erpnext_api import erp_get_my_contracts_by_telegram_id
-        contracts_data = await erp_get_my_contracts_by_telegram_id(telegram_id)
-
-        # Contract ID bo'yicha mahsulotlarni dict'ga saqlash
-        contracts_products = {}
-        if contracts_data and contracts_data.get("success"):
-            for contract in contracts_data.get("contracts", []):
-                cid = contract.get("contract_id")
-                products = contract.get("products", [])
-                if cid:
-                    contracts_products[cid] = products
-
         # Eslatmalar bor - formatlash
         message = f"🔔 <b>ESLATMALAR</b>\n\n"
         message += f"👤 <b>{customer_name}</b>\n\n"
@@ -129,9 +125,7 @@ async def show_reminders(msg: Message, state: FSMContext):
             if products:
                 message += f"   🛍 Mahsulotlar:\n"
                 for p in products[:10]:  # Faqat birinchi 2 ta
-                    p_name = p.get("name", "—")
-                    p_qty = p.get("qty", 0)
-                    message += f"      • {p_name} ({p_qty} dona)\n"
+                    message += f"      • {p.name or '—'} ({format_quantity(p.qty)} dona)\n"
                 if len(products) > 2:
                     message += f"      • ... va yana {len(products) - 2} ta\n"
 
@@ -154,7 +148,9 @@ async def show_reminders(msg: Message, state: FSMContext):
         message += "ℹ️ To'lovni vaqtida amalga oshirishni unutmang.\n"
         message += "💳 Batafsil: <b>To'lovlar tarixi</b> tugmasini bosing"
 
-        await msg.answer(
+        # Ko'p shartnoma / mahsulot bo'lsa 4096 limitdan oshadi - bo'laklanadi
+        await answer_long(
+            msg,
             message,
             reply_markup=main_menu_keyboard(),
             parse_mode="HTML"
@@ -180,6 +176,74 @@ async def show_reminders(msg: Message, state: FSMContext):
         )
 
 
+async def _load_reminders(telegram_id: int) -> Tuple[Dict[str, Any], Dict[str, List[Product]]]:
+    """
+    Eslatmalar va shartnomalar mahsulotlari - bitta round trip vaqtida.
+
+    Mahsulotlar avval Redis'dagi indeksdan olinadi (product_index - bitta
+    HGETALL), faqat indeks bo'lmasa butun shartnomalar ro'yxati so'raladi;
+    ikkalasi eslatmalar bilan parallel ketadi. Shartnomalar cache'dan
+    eskirgan (SWR) holda ham olinadi - mahsulot nomlari deyarli o'zgarmaydi,
+    eskirgani background'da yangilanadi. Shartnomalar olinmasa eslatmalar
+    mahsulotlarsiz ko'rsatiladi.
+
+    Returns:
+        (eslatmalar javobi, {contract_id: mahsulotlar})
+    """
+    data, indexed = await asyncio.gather(
+        erp_get_reminders_by_telegram_id(telegram_id),
+        _load_products(telegram_id),
+        return_exceptions=True,
+    )
+
+    if isinstance(data, Exception):
+        raise data
+
+    if isinstance(indexed, Exception):
+        logger.warning(f"Contracts for reminders failed: telegram_id={telegram_id} - {indexed}")
+        return data, {}
+
+    contracts_products, from_index = indexed
+    if from_index and data and data.get("success"):
+        # Indeksdan keyin qo'shilgan shartnoma - to'liq ro'yxat bir marta olinadi
+        unknown = {r.get("contract_id") for r in data.get("reminders") or []} - contracts_products.keys()
+        if unknown - {None}:
+            contracts_products = await _fetch_products(telegram_id)
+
+    return data, contracts_products
+
+
+async def _load_products(telegram_id: int) -> Tuple[Dict[str, List[Product]], bool]:
+    """
+    {contract_id: mahsulotlar} - indeksdan yoki (bo'lmasa) shartnomalardan.
+
+    Returns:
+        (mahsulotlar, indeksdan olinganmi)
+    """
+    products = await product_index.get(telegram_id)
+    if products is not None:
+        return products, True
+    return await _fetch_products(telegram_id), False
+
+
+async def _fetch_products(telegram_id: int) -> Dict[str, List[Product]]:
+    """Shartnomalar ro'yxatidan mahsulotlar (javob indeksni ham to'ldiradi)."""
+    contracts_data = await erp_get_my_contracts_by_telegram_id(telegram_id, allow_stale=True)
+    if not contracts_data or not contracts_data.get("success"):
+        return {}
+
+    # Eskirgan cache ishlatildi - keyingi safar uchun background'da yangilanadi
+    if contracts_data.get("stale"):
+        spawn_background(erp_get_my_contracts_by_telegram_id(telegram_id))
+
+    # Contract ID bo'yicha mahsulotlarni dict'ga saqlash
+    return {
+        contract.contract_id: contract.products
+        for contract in contracts_data.get("contracts", [])
+        if contract.contract_id
+    }
+
+
 def register_reminders_handlers(dp):
     """
     Reminders handler'ni dispatcher'ga ulash.
@@ -28,6 +28,7 @@ from loguru import logger
 
 from app.utils.keyboard import main_menu_keyboard
 from app.utils.formatters import format_customer_profile, format_error_message
+from app.utils.messages import answer_long
 from app.services.erpnext_api import erp_get_customer_by_telegram_id
 from app.states.user_states import PassportState
 from app.services.support import get_support_contact
@@ -70,7 +71,7 @@ async def start_message(msg: Message, state: FSMContext):
 
         # ✅ SUCCESS CHECK - aniq va xavfsiz
         success = data.get("success")
-        has_customer = data.get("customer") is not None and len(data.get("customer", {})) > 0
+        has_customer = data.get("customer") is not None
 
         # String "true" ham qabul qilish
         if isinstance(success, str):
@@ -78,15 +79,16 @@ async def start_message(msg: Message, state: FSMContext):
 
         if bool(success) and has_customer:
             # ✅ Customer topildi - avtomatik kirish!
-            customer = data.get("customer", {})
-            customer_name = customer.get("customer_name", "Mijoz")
+            customer = data["customer"]
+            customer_name = customer.customer_name or "Mijoz"
 
-            logger.success(f"Customer found: {customer.get('customer_id')} - {customer_name}")
+            logger.success(f"Customer found: {customer.customer_id} - {customer_name}")
 
             # Profil ma'lumotlarini formatlash va ko'rsatish
             profile_text = format_customer_profile(data)
 
-            await msg.answer(
+            await answer_long(
+                msg,
                 f"✅ <b>Xush kelibsiz, {customer_name}!</b>\n\n"
                 f"{profile_text}",
                 reply_markup=main_menu_keyboard()
@@ -97,7 +99,7 @@ async def start_message(msg: Message, state: FSMContext):
 
             # Customer ID ni state'ga saqlash (keyingi handler'lar uchun)
             await state.update_data(
-                customer_id=customer.get("customer_id"),
+                customer_id=customer.customer_id,
                 customer_name=customer_name,
                 telegram_id=telegram_id
             )
@@ -60,8 +60,9 @@ async def on_startup():
     ---------
     1. Barcha handler'larni register qilish
     2. Redis connection tekshirish
-    3. Reminders scheduler'ni ishga tushirish (YANGI!)
-    4. Logging
+    3. ERPNext ulanishlarini isitish (warm-up)
+    4. Reminders scheduler'ni ishga tushirish (YANGI!)
+    5. Logging
     """
     # Barcha handler'larni dispatcher'ga ulash
     # (start, passport, menu, contract, payments, reminders)
@@ -77,6 +78,10 @@ async def on_startup():
         logger.warning("   sudo systemctl start redis")
         raise
 
+    # ✅ YANGI: ERPNext ulanishlarini oldindan ochish (birinchi so'rov handshake kutmasin)
+    from app.services.erpnext_api import warm_up_http_client
+    await warm_up_http_client()
+
     # ✅ YANGI: Reminders scheduler'ni ishga tushirish
     try:
         from app.services.reminders import start_reminders_scheduler
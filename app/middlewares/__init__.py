@@ -0,0 +1,3 @@
+from .deadline import ERPDeadlineMiddleware
+
+__all__ = ["ERPDeadlineMiddleware"]
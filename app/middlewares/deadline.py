@@ -0,0 +1,32 @@
+"""
+ERP Deadline Middleware - har bir update uchun ERPNext vaqt byudjeti
+
+Handler ichida bir nechta ERPNext so'rovi bo'lishi mumkin (masalan,
+shartnomalar + har biri uchun grafik). Har birining o'z timeout'i bor,
+lekin foydalanuvchi uchun muhimi - umumiy kutish vaqti. Bu middleware
+handler'ni erp_deadline() ichida ishga tushiradi: vaqt tugasa, keyingi
+so'rovlar va retry'lar yuborilmaydi, handler darhol xato xabarini ko'rsatadi.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.services.erpnext_api import erp_deadline
+
+
+class ERPDeadlineMiddleware(BaseMiddleware):
+    """Update'ni qayta ishlashni erp_deadline(seconds) bilan o'rash."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with erp_deadline(self.seconds):
+            return await handler(event, data)
@@ -0,0 +1,283 @@
+"""
+Broadcast - ko'p chatlarga xabarlarni Telegram limitlari ichida tez yuborish
+
+Ilgari eslatmalar birma-bir yuborilardi: `send_message` + `sleep(0.033)`.
+Har bir yuborishning o'z kechikishi (~50-300 ms) pauzaga qo'shilib, tezlik
+Telegram ruxsat berganidan bir necha barobar past edi (20 000 ta eslatma -
+soatlab).
+
+Broadcaster:
+------------
+- Navbat (asyncio.Queue, cheklangan) - manba (ro'yxat yoki async iterator)
+  uni to'ldiradi, workers ta yuboruvchi bo'shatadi; manba sekin bo'lsa ham
+  (sahifalab olinsa) yuborish darhol boshlanadi, xotira o'zgarmas
+- Har bir xabardan oldin: chat limiti (chat_limiter), keyin umumiy limit
+  (global_bucket) - ikkalasi ham rezervatsiyali token bucket
+  (app/services/rate_limit.py), shuning uchun parallel worker'lar limitdan
+  oshmaydi
+- Telegram xatolari (classify_error):
+  * 429 TelegramRetryAfter - umumiy va chat bucket'lari retry_after soniyaga
+    to'xtatiladi, xabar pauzadan keyin qayta yuboriladi
+  * vaqtinchalik (tarmoq, 5xx) - qisqa backoff bilan qayta urinish
+  * doimiy: bot bloklangan / chat topilmadi (unreachable) va boshqa
+    400'lar (failed) - qayta urinilmaydi
+  Urinishlar soni max_attempts bilan cheklangan; vaqtinchalik xato bilan
+  tugagan xabar - deferred (outbox'da ack qilinmaydi, keyin qayta yuboriladi)
+- Hisobot: yuborilgan / xato / yetib bo'lmaydigan / o'tkazib yuborilgan,
+  429 va qayta urinishlar soni, erishilgan msg/s (jarayon davomida har
+  report_every soniyada va oxirida)
+
+Example:
+    >>> broadcaster = Broadcaster(name="reminders")
+    >>> report = await broadcaster.run(reminders, send=_send, chat_of=lambda r: r["telegram_chat_id"])
+    >>> report.rate
+    24.8
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Awaitable, Callable, Hashable, Iterable, Optional, TypeVar, Union
+
+from aiogram.exceptions import (
+    RestartingTelegram,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from loguru import logger
+
+from app.config import config
+from app.services.rate_limit import ChatRateLimiter, TokenBucket, chat_limiter, global_bucket
+
+T = TypeVar("T")
+
+# Worker'larga "manba tugadi" belgisi
+_DONE = object()
+
+
+# ============================================================================
+# YUBORISH NATIJALARI VA TELEGRAM XATOLARI
+# ============================================================================
+
+SENT = "sent"
+SKIPPED = "skipped"           # chat ID yo'q
+DUPLICATE = "duplicate"       # allaqachon yuborilgan (delivery ledger) - send() qaytaradi
+RETRY_AFTER = "retry_after"   # 429 - flood limit, retry_after soniya kutish
+RETRYABLE = "retryable"       # tarmoq / Telegram 5xx - keyinroq o'tishi mumkin
+UNREACHABLE = "unreachable"   # bot bloklangan, chat topilmadi - doimiy
+FAILED = "failed"             # boshqa doimiy xato (noto'g'ri so'rov)
+DEFERRED = "deferred"         # vaqtinchalik xato, urinishlar tugadi - keyinroq qayta yuborish kerak
+
+# TelegramBadRequest matnlari - chatning o'zi yo'q (xabar emas, manzil xato)
+_UNREACHABLE_MESSAGES = ("chat not found", "user not found", "peer_id_invalid", "user is deactivated")
+
+
+def classify_error(exc: BaseException) -> str:
+    """Yuborishdagi xato turi: RETRY_AFTER, RETRYABLE, UNREACHABLE yoki FAILED."""
+    if isinstance(exc, TelegramRetryAfter):
+        return RETRY_AFTER
+    if isinstance(exc, (TelegramForbiddenError, TelegramNotFound)):
+        return UNREACHABLE
+    if isinstance(exc, TelegramBadRequest):
+        message = str(exc).lower()
+        if any(text in message for text in _UNREACHABLE_MESSAGES):
+            return UNREACHABLE
+        return FAILED
+    if isinstance(exc, (TelegramNetworkError, TelegramServerError, RestartingTelegram, asyncio.TimeoutError, OSError)):
+        return RETRYABLE
+    return FAILED
+
+
+@dataclass(slots=True)
+class BroadcastReport:
+    """Broadcast natijasi."""
+    name: str = ""
+    sent: int = 0
+    failed: int = 0
+    unreachable: int = 0
+    skipped: int = 0
+    duplicate: int = 0
+    deferred: int = 0
+    retried: int = 0
+    flood: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.failed + self.unreachable + self.skipped + self.duplicate + self.deferred
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """Erishilgan tezlik (yuborilgan xabarlar / soniya)."""
+        elapsed = self.elapsed
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.sent} sent, {self.failed} failed, {self.unreachable} unreachable, "
+            f"{self.skipped} skipped, {self.duplicate} duplicate, {self.deferred} deferred, "
+            f"{self.retried} retried ({self.flood} flood) "
+            f"in {self.elapsed:.1f}s ({self.rate:.1f} msg/s)"
+        )
+
+
+class Broadcaster:
+    """
+    Navbat + worker'lar pool'i + chat va umumiy token bucket'lar.
+
+    send(item) - bitta xabarni yuboradi: True (yuborildi) / False (xato) yoki
+    natija nomi (DUPLICATE); Telegram xatolarini tashqariga chiqarishi
+    kerak - ular classify_error bo'yicha qayta uriniladi yoki hisobotga yoziladi.
+    chat_of(item) - chat ID; None bo'lsa xabar o'tkazib yuboriladi (skipped).
+    """
+
+    def __init__(
+        self,
+        name: str = "broadcast",
+        workers: int = config.send.broadcast_workers,
+        bucket: TokenBucket = global_bucket,
+        chats: ChatRateLimiter = chat_limiter,
+        report_every: float = 30.0,
+        max_attempts: int = 5,
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.bucket = bucket
+        self.chats = chats
+        self.report_every = report_every
+        self.max_attempts = max(1, max_attempts)
+
+    async def run(
+        self,
+        items: Union[Iterable[T], AsyncIterable[T]],
+        send: Callable[[T], Awaitable[bool]],
+        chat_of: Callable[[T], Optional[Hashable]],
+        done: Optional[Callable[[T, str], Awaitable[None]]] = None,
+    ) -> BroadcastReport:
+        """
+        Barcha xabarlarni yuborish (manba tugaguncha).
+
+        Args:
+            done: Har bir xabar yakunlanganda (natija bilan: "sent", "failed",
+                "unreachable", "skipped", "duplicate", "deferred") - masalan,
+                outbox'da ack qilish uchun
+
+        Returns:
+            BroadcastReport
+        """
+        report = BroadcastReport(name=self.name)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 4)
+
+        workers = [asyncio.create_task(self._worker(queue, send, chat_of, done, report)) for _ in range(self.workers)]
+        producer = asyncio.create_task(self._produce(items, queue, len(workers)))
+        progress = asyncio.create_task(self._progress(report))
+        try:
+            # Navbat cheklangan: worker'lar xato bilan chiqib ketsa, producer
+            # queue.put() da abadiy qolmasin - birinchi xatoda to'xtatiladi
+            finished, _ = await asyncio.wait([producer, *workers], return_when=asyncio.FIRST_EXCEPTION)
+            for task in finished:
+                if task.exception() is not None:
+                    logger.error(f"❌ Broadcast [{self.name}] aborted: {task.exception()!r}")
+                    raise task.exception()
+        finally:
+            progress.cancel()
+            producer.cancel()
+            for task in workers:
+                task.cancel()
+            report.finished = time.monotonic()
+
+        logger.info(f"📤 Broadcast [{self.name}] done: {report.summary()}")
+        return report
+
+    @staticmethod
+    async def _produce(items: Union[Iterable[T], AsyncIterable[T]], queue: asyncio.Queue, workers: int):
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                await queue.put(item)
+        else:
+            for item in items:
+                await queue.put(item)
+        for _ in range(workers):
+            await queue.put(_DONE)
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        send: Callable[[T], Awaitable[bool]],
+        chat_of: Callable[[T], Optional[Hashable]],
+        done: Optional[Callable[[T, str], Awaitable[None]]],
+        report: BroadcastReport,
+    ):
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+
+            chat_id = chat_of(item)
+            if chat_id:
+                result = await self._deliver(item, chat_id, send, report)
+            else:
+                result = SKIPPED
+            setattr(report, result, getattr(report, result) + 1)
+
+            if done is not None:
+                try:
+                    await done(item, result)
+                except Exception as e:
+                    logger.error(f"❌ Broadcast [{self.name}] done callback error: chat_id={chat_id} - {e}")
+
+    async def _deliver(
+        self,
+        item: T,
+        chat_id: Hashable,
+        send: Callable[[T], Awaitable[bool]],
+        report: BroadcastReport,
+    ) -> str:
+        """Bitta xabar (kerak bo'lsa qayta urinishlar bilan). Returns: report maydoni nomi."""
+        for attempt in range(1, self.max_attempts + 1):
+            # Avval chat limiti (kutish uzoq bo'lishi mumkin), keyin umumiy
+            # token - kutayotgan worker umumiy navbatni band qilmaydi
+            await self.chats.acquire(chat_id)
+            await self.bucket.acquire()
+
+            try:
+                result = await send(item)
+                if isinstance(result, str):
+                    return result
+                return SENT if result else FAILED
+            except Exception as e:
+                kind = classify_error(e)
+                if kind in (UNREACHABLE, FAILED):
+                    logger.warning(f"⚠️ Broadcast [{self.name}] {kind}: chat_id={chat_id} - {e}")
+                    return kind
+                if attempt == self.max_attempts:
+                    # Vaqtinchalik xato (Telegram / tarmoq ishlamayapti) - xabarning
+                    # o'zida muammo yo'q, keyinroq yuborilishi kerak
+                    logger.error(f"❌ Broadcast [{self.name}] deferred after {attempt} attempts: chat_id={chat_id} - {e}")
+                    return DEFERRED
+
+                report.retried += 1
+                if kind == RETRY_AFTER:
+                    # Telegram butun bot uchun to'xtashni so'radi - barcha worker'lar kutadi
+                    report.flood += 1
+                    self.bucket.pause(e.retry_after)
+                    self.chats.bucket(chat_id).pause(e.retry_after)
+                    logger.warning(f"⏸ Broadcast [{self.name}] flood wait {e.retry_after}s (chat_id={chat_id})")
+                else:
+                    await asyncio.sleep(min(2 ** (attempt - 1), 30))
+
+        return FAILED
+
+    async def _progress(self, report: BroadcastReport):
+        while True:
+            await asyncio.sleep(self.report_every)
+            logger.info(f"📤 Broadcast [{self.name}]: {report.summary()}")
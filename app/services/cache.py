@@ -0,0 +1,394 @@
+"""
+ERPNext Response Cache - Ikki bosqichli (two-tier) cache
+
+Bu modul ERPNext'dan olingan read-only javoblarni vaqtincha saqlaydi.
+Bir xil mijoz bir necha soniya ichida bir xil menyuni qayta ochsa -
+ERPNext'ga qayta murojaat qilinmaydi.
+
+Architecture:
+-------------
+1. L1 - In-process LRU (OrderedDict) - eng tez, faqat shu process ichida
+2. L2 - Redis (app/loader.py dagi mavjud instance) - processlar orasida umumiy
+3. Tag'lar - har bir yozuv tag'larga bog'lanadi (tg:123, contract:CON-001, ...)
+   Tag bo'yicha invalidation - bitta mijozning barcha ma'lumotlarini o'chirish
+
+Cache Strategy:
+---------------
+- Faqat muvaffaqiyatli (success=True) javoblar saqlanadi
+- TTL har bir endpoint uchun alohida (erpnext_api.CACHE_TTLS)
+- Redis ishlamasa - faqat L1 ishlaydi, bot to'xtamaydi
+- TTL o'tgan yozuvlar yana stale_ttl davomida saqlanadi - ERPNext
+  ishlamay qolganda get_stale() orqali "last-known-good" sifatida beriladi
+- get_with_age() - stale-while-revalidate uchun: eskirgan qiymat darhol
+  ko'rsatiladi, yangisi background'da olinadi
+
+⚠️ MUHIM: Cache'dan qaytgan dict'lar umumiy (shared) obyektlar -
+ularni o'zgartirmang (read-only deb hisoblang)!
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.services import json_codec
+
+
+# Tag set'lar (tag -> key'lar ro'yxati) uchun TTL - eng uzun yozuvdan ham uzoq
+TAG_TTL = 86400  # 24 soat
+
+
+# ============================================================================
+# CACHE KEY HELPERS
+# ============================================================================
+
+def make_cache_key(name: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Endpoint nomi va parametrlardan barqaror (stable) cache key yasash.
+
+    None qiymatli parametrlar tashlab yuboriladi, tartib muhim emas.
+
+    Example:
+        >>> make_cache_key("get_payment_schedule", {"contract_id": "CON-001"})
+        'get_payment_schedule:contract_id=CON-001'
+    """
+    if not params:
+        return name
+
+    parts = [
+        f"{k}={params[k]}"
+        for k in sorted(params)
+        if params[k] is not None
+    ]
+    return f"{name}:{'&'.join(parts)}"
+
+
+# ============================================================================
+# L1 - IN-PROCESS LRU
+# ============================================================================
+
+class LocalLRU:
+    """
+    Oddiy in-process LRU cache (TTL bilan).
+
+    Yozuv: key -> (local_until, fresh_until, stale_until, value, tags)
+    - local_until gacha - oddiy cache hit (L1 da fresh_until dan qisqa bo'lishi mumkin)
+    - fresh_until - haqiqiy TTL oxiri (yozuv yoshi shundan hisoblanadi)
+    - stale_until gacha - faqat fallback uchun (ERPNext ishlamayotganda)
+    Tag index: tag -> {key, ...} - tag bo'yicha tez invalidation uchun.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, float, float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[float, Any]]:
+        """
+        Returns:
+            (fresh_until, value) yoki None - fresh_until haqiqiy TTL oxiri
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        local_until, fresh_until, stale_until, value, _ = entry
+        now = time.time()
+        if stale_until <= now:
+            self.delete(key)
+            return None
+        if local_until <= now and not allow_stale:
+            return None
+
+        self._data.move_to_end(key)
+        return fresh_until, value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        fresh_until: float,
+        tags: Iterable[str] = (),
+        stale_until: Optional[float] = None,
+        local_until: Optional[float] = None,
+    ):
+        """local_until - L1 da fresh hisoblanish muddati (default - fresh_until)."""
+        tags = tuple(tags)
+        if key in self._data:
+            self.delete(key)
+
+        local_until = fresh_until if local_until is None else min(local_until, fresh_until)
+        self._data[key] = (local_until, fresh_until, max(fresh_until, stale_until or 0), value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        # Eng eski yozuvlarni chiqarib tashlash
+        while len(self._data) > self.max_entries:
+            oldest = next(iter(self._data))
+            self.delete(oldest)
+
+    def delete(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry[4]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def delete_tag(self, tag: str) -> int:
+        keys = self._tags.pop(tag, set())
+        for key in list(keys):
+            self.delete(key)
+        return len(keys)
+
+    def clear(self):
+        self._data.clear()
+        self._tags.clear()
+
+
+# ============================================================================
+# TWO-TIER RESPONSE CACHE
+# ============================================================================
+
+class ResponseCache:
+    """
+    L1 (LocalLRU) + L2 (Redis) response cache.
+
+    Redis instance app/loader.py dan lazy import qilinadi (circular import
+    bo'lmasligi uchun: loader → handlers → erpnext_api → cache).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        local_ttl: int = 30,
+        stale_ttl: int = 86400,
+        prefix: str = "erp:cache",
+        enabled: bool = True,
+        redis=None,
+    ):
+        self.enabled = enabled
+        # L1 boshqa process'larda qilingan invalidation'ni ko'rmaydi
+        # (masalan, webhook server va polling bot alohida) - shuning uchun
+        # L1 da yozuv local_ttl dan uzoq turmaydi
+        self.local_ttl = local_ttl
+        # TTL o'tgandan keyin ham yozuv shuncha vaqt fallback uchun saqlanadi
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self.local = LocalLRU(max_entries)
+        self._redis = redis
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+
+    # ------------------------------------------------------------------
+    # Redis helpers
+    # ------------------------------------------------------------------
+
+    def _get_redis(self):
+        if self._redis is None:
+            try:
+                from app.loader import redis
+                self._redis = redis
+            except Exception as e:
+                logger.warning(f"Response cache: Redis unavailable, L1 only ({e})")
+                return None
+        return self._redis
+
+    def _rkey(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _rtag(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Cache'dan yangi (fresh) qiymat olish: avval L1, keyin Redis.
+
+        Redis'dan topilsa - L1 ga ham yoziladi.
+        """
+        entry = await self._lookup(key, allow_stale=False)
+        return entry[1] if entry is not None else None
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Oxirgi ma'lum yaxshi (last-known-good) qiymat - TTL o'tgan bo'lsa ham.
+
+        Faqat fallback uchun: ERPNext ishlamayotganda (circuit open, timeout)
+        eskirgan ma'lumot "kutish"dan yaxshiroq.
+        """
+        entry = await self._lookup(key, allow_stale=True)
+        return entry[1] if entry is not None else None
+
+    async def get_with_age(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Stale-while-revalidate uchun: qiymat va u necha sekund eskirganligi.
+
+        Returns:
+            (value, age) - age = 0 bo'lsa yangi (fresh), aks holda TTL
+            o'tganidan beri necha sekund o'tgan; yoki None
+        """
+        entry = await self._lookup(key, allow_stale=False)
+        if entry is None:
+            entry = await self._lookup(key, allow_stale=True)
+        if entry is None:
+            return None
+
+        fresh_until, value = entry
+        return value, max(0.0, time.time() - fresh_until)
+
+    async def _lookup(self, key: str, allow_stale: bool) -> Optional[Tuple[float, Any]]:
+        if not self.enabled:
+            return None
+
+        entry = self.local.get(key, allow_stale=allow_stale)
+        if entry is not None:
+            self.stats["local_hits"] += 1
+            return entry
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.get(self._rkey(key))
+                    pipe.pttl(self._rkey(key))
+                    raw, pttl = await pipe.execute()
+
+                if raw is None:
+                    # Redis'da yo'q - boshqa process invalidation qilgan (yoki
+                    # muddati tugagan): L1 nusxasi ham ishonchli emas
+                    self.local.delete(key)
+                else:
+                    # Redis'da tag'lar ham saqlanadi - L1 invalidation ishlashi uchun
+                    envelope = json_codec.loads(raw)
+                    value = envelope["v"]
+                    now = time.time()
+                    fresh_until = envelope.get("f", 0)
+
+                    if fresh_until > now or allow_stale:
+                        if pttl and pttl > 0:
+                            self.local.set(
+                                key,
+                                value,
+                                fresh_until,
+                                envelope.get("t", ()),
+                                stale_until=now + pttl / 1000,
+                                local_until=now + self.local_ttl,
+                            )
+                        self.stats["redis_hits"] += 1
+                        return fresh_until, value
+            except Exception as e:
+                logger.warning(f"Response cache Redis get error: {key} - {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        """
+        Qiymatni ikkala bosqichga yozish.
+
+        Yozuv ttl davomida "fresh", keyin yana stale_ttl davomida faqat
+        get_stale() orqali (fallback uchun) saqlanadi.
+
+        Args:
+            key: Cache key (make_cache_key)
+            value: JSON-serializable qiymat
+            ttl: Yashash muddati (sekund)
+            tags: Invalidation uchun tag'lar (tg:123, contract:CON-001)
+        """
+        if not self.enabled or ttl <= 0:
+            return
+
+        tags = tuple(dict.fromkeys(tags))
+        now = time.time()
+        fresh_until = now + ttl
+        self.local.set(
+            key,
+            value,
+            fresh_until,
+            tags,
+            stale_until=fresh_until + self.stale_ttl,
+            local_until=now + self.local_ttl,
+        )
+        self.stats["sets"] += 1
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                envelope = {"v": value, "t": list(tags), "f": fresh_until}
+                pipe.set(
+                    self._rkey(key),
+                    json_codec.dumps(envelope),
+                    ex=ttl + self.stale_ttl,
+                )
+                for tag in tags:
+                    pipe.sadd(self._rtag(tag), key)
+                    # Tag set yozuvlardan uzoqroq yashashi kerak
+                    pipe.expire(self._rtag(tag), max(ttl + self.stale_ttl, TAG_TTL))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Response cache Redis set error: {key} - {e}")
+
+    async def invalidate(self, *keys: str):
+        """Aniq key'larni o'chirish."""
+        for key in keys:
+            self.local.delete(key)
+        self.stats["invalidations"] += len(keys)
+
+        redis = self._get_redis()
+        if redis is None or not keys:
+            return
+
+        try:
+            await redis.delete(*(self._rkey(k) for k in keys))
+        except Exception as e:
+            logger.warning(f"Response cache Redis delete error: {e}")
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Tag'larga bog'langan barcha yozuvlarni o'chirish.
+
+        Returns:
+            int: O'chirilgan key'lar soni (L1 + Redis, takrorlanmagan)
+        """
+        removed: Set[str] = set()
+        for tag in tags:
+            removed.update(self.local._tags.get(tag, ()))
+            self.local.delete_tag(tag)
+
+        redis = self._get_redis()
+        if redis is not None and tags:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for tag in tags:
+                        pipe.smembers(self._rtag(tag))
+                    members = await pipe.execute()
+
+                for keys in members:
+                    removed.update(keys)
+
+                to_delete = [self._rkey(k) for k in removed] + [self._rtag(t) for t in tags]
+                await redis.delete(*to_delete)
+            except Exception as e:
+                logger.warning(f"Response cache Redis tag invalidation error: {tags} - {e}")
+
+        self.stats["invalidations"] += len(removed)
+        logger.debug(f"Response cache invalidated {len(removed)} keys for tags {tags}")
+        return len(removed)
+
+    def clear_local(self):
+        """L1 cache'ni tozalash (testing / debugging uchun)."""
+        self.local.clear()
@@ -0,0 +1,169 @@
+"""
+Circuit Breaker - ERPNext ishlamay qolganda tez javob qaytarish
+
+ERPNext o'chib qolsa, har bir foydalanuvchi so'rovi timeout'gacha kutadi,
+handler'lar to'planib qoladi va xotira o'sadi. Circuit breaker xatolar
+ko'payganda ERPNext'ga so'rov yuborishni vaqtincha to'xtatadi.
+
+Holatlar:
+---------
+- CLOSED - oddiy ish rejimi, natijalar oynada (window) hisoblanadi
+- OPEN - xatolar ulushi chegaradan oshdi: so'rovlar darhol rad etiladi
+  (cool_down sekund davomida)
+- HALF_OPEN - cool_down tugadi: bitta sinov (probe) so'rov o'tkaziladi
+  * muvaffaqiyatli → CLOSED
+  * xato → yana OPEN
+
+Avlod (generation): har bir holat o'zgarishida oshadi. So'rov qaysi avlodda
+o'tkazilganini saqlaydi va natijani shu avlod bilan qayd qiladi - breaker
+ochilishidan oldin boshlangan so'rovning kechikkan natijasi half-open
+sinovi sifatida hisoblanmaydi va cool-down'ni qayta boshlamaydi.
+
+Har bir ERPNext endpoint uchun alohida breaker (CircuitBreakerRegistry) -
+bitta sekin endpoint boshqalarini to'xtatib qo'ymaydi.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Bitta endpoint uchun circuit breaker (sliding time window).
+
+    Ishlatish:
+        if not breaker.allow():
+            return fallback
+        generation = breaker.generation
+        ok = await do_request()
+        breaker.record(ok, generation)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 30.0,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        cool_down: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cool_down = cool_down
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.generation = 0
+        self.opened_at = 0.0
+        self._probes_in_flight = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def _prune(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _transition(self, state: str):
+        self.state = state
+        self.generation += 1
+
+    def _open(self, now: float):
+        self._transition(OPEN)
+        self.opened_at = now
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        logger.error(f"🔌 Circuit OPEN: {self.name} (cool-down {self.cool_down:.0f}s)")
+
+    def allow(self) -> bool:
+        """
+        So'rov yuborish mumkinmi?
+
+        HALF_OPEN holatida faqat half_open_probes ta sinov so'rovi o'tadi.
+        """
+        now = time.monotonic()
+
+        if self.state == OPEN:
+            if now - self.opened_at < self.cool_down:
+                return False
+            self._transition(HALF_OPEN)
+            self._probes_in_flight = 0
+            logger.info(f"🔌 Circuit HALF-OPEN: {self.name} (probing)")
+
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                return False
+            self._probes_in_flight += 1
+
+        return True
+
+    def record(self, ok: bool, generation: Optional[int] = None):
+        """
+        So'rov natijasini qayd qilish.
+
+        generation - allow() dan keyingi self.generation; boshqa (eski) avlod
+        natijasi e'tiborsiz qoldiriladi.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        now = time.monotonic()
+
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if ok:
+                self._transition(CLOSED)
+                self._outcomes.clear()
+                logger.success(f"🔌 Circuit CLOSED: {self.name}")
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        self._prune(now)
+
+        total = len(self._outcomes)
+        if total >= self.min_calls:
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if failures / total >= self.error_rate:
+                self._open(now)
+
+    def abandon(self, generation: Optional[int] = None):
+        """Natijasiz tugagan so'rov (masalan, cancel) - probe slot'ini bo'shatish."""
+        if generation is not None and generation != self.generation:
+            return
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def retry_after(self) -> float:
+        """OPEN holatida yana necha sekunddan keyin sinov mumkin."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.cool_down - (time.monotonic() - self.opened_at))
+
+
+class CircuitBreakerRegistry:
+    """Endpoint nomi bo'yicha breaker'lar (bir xil sozlamalar bilan)."""
+
+    def __init__(self, **settings):
+        self._settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **self._settings)
+            self._breakers[name] = breaker
+        return breaker
+
+    def snapshot(self) -> Dict[str, str]:
+        """Monitoring uchun: endpoint -> holat."""
+        return {name: b.state for name, b in self._breakers.items()}
@@ -15,22 +15,65 @@ Architecture:
 Performance Optimizations:
 --------------------------
 - ERPNext'da batch queries ishlatilgan (N+1 problem hal qilingan)
-- Timeout 30s - katta ma'lumotlar uchun
-- Connection pooling - tez ishlash
+- Timeout va retry har bir endpoint uchun alohida (ENDPOINT_POLICIES),
+  handler'ning qolgan vaqti (deadline) erp_request'ga uzatiladi
+- Connection pooling - tez ishlash; ERP_HTTP2=true - HTTP/2 multiplexing,
+  startup'da ulanishlar oldindan ochiladi (warm_up_http_client)
 - Follow redirects - avtomatik
+- Typed models - shartnoma, mijoz, to'lov va jadval ma'lumotlari bir marta
+  app/services/models.py dataclass'lariga o'giriladi (_with_models)
+- Fast JSON - javoblar orjson/msgspec (o'rnatilgan bo'lsa) bilan bytes'dan
+  decode qilinadi (app/services/json_codec.py)
+- Streaming - katta to'lovlar tarixi javobi bo'laklab o'qiladi, shartnomalar
+  birma-bir keladi (ContractStream, app/services/json_stream.py)
+- Response cache - read-only erp_get_* javoblari L1 (LRU) + L2 (Redis) da
+  saqlanadi, TTL har bir endpoint uchun alohida (CACHE_TTLS)
+- Single-flight - bir vaqtda kelgan bir xil GET so'rovlar bitta HTTP
+  round trip'ni bo'lishadi (singleflight_stats)
+- Adaptive limiter - butun bot bo'yicha ERPNext'ga parallel so'rovlar soni
+  AIMD bilan cheklanadi; handler'lar background job'lardan oldin o'tadi
+- Circuit breaker - ERPNext ishlamasa so'rovlar darhol rad etiladi,
+  cache'dagi oxirgi javob "stale" belgisi bilan qaytariladi
+- Stale-while-revalidate - allow_stale=True bo'lsa eskirgan javob darhol
+  qaytariladi, handler yangisini background'da oladi (spawn_background)
+- Product index - shartnomalar olinganda mahsulotlar Redis'dagi ixcham
+  indeksga yoziladi (app/services/product_index.py) - eslatmalar ekrani
+  butun shartnomalar javobisiz ishlaydi
 """
 
+import asyncio
+import json
+import time
 import httpx
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, AsyncIterator, Iterable, List, Tuple
 from loguru import logger
 from tenacity import (
-    retry,
+    AsyncRetrying,
+    stop_any,
     stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
+    wait_random_exponential,
+    retry_if_exception,
 )
 
 from app.config import config
+from app.services.cache import ResponseCache, make_cache_key
+from app.services.limiter import AdaptiveLimiter
+from app.services.product_index import product_index
+from app.services.circuit_breaker import CircuitBreakerRegistry
+from app.services.http_transport import HTTP2_AVAILABLE, build_http_client, warm_up
+from app.services import json_codec
+from app.services.json_stream import JSONArrayStream
+from app.services.models import (
+    Contract,
+    Customer,
+    parse_contracts,
+    parse_payments,
+    parse_products,
+    parse_schedule,
+)
 
 
 # ============================================================================
@@ -42,31 +85,259 @@ from app.config import config
 # - Connection pooling - tez ishlash
 # - Memory efficient - bitta client instance
 # - Centralized configuration - bir joyda sozlash
-http_client = httpx.AsyncClient(
+# ERP_HTTP2=true - barcha so'rovlar bitta multiplexed ulanishda (h2 kerak)
+http_client = build_http_client(
     base_url=config.erp.base_url,
     headers={
         "Authorization": f"token {config.erp.api_key}:{config.erp.api_secret}",
         "Content-Type": "application/json",
     },
-    timeout=30.0,  # 30 sekund - katta ma'lumotlar uchun
-    follow_redirects=True,
-    limits=httpx.Limits(
-        max_keepalive_connections=20,
-        max_connections=100,
-    )
+    http2=config.erp.http2,
+    timeout=30.0,  # Default - har bir so'rov ENDPOINT_POLICIES bo'yicha override qiladi
+    max_connections=100,
+    # Limiter max_limit dan ortiq parallel so'rov bo'lmaydi - shuncha ulanishni
+    # ochiq saqlaymiz (20 da yuk ostida ulanishlar har so'rovda qayta ochilardi)
+    max_keepalive_connections=max(20, config.limiter.max_limit),
+)
+
+
+# Butun bot uchun umumiy concurrency limiter (barcha erp_request'lar orqali)
+# Priority: app.services.limiter.background_priority() - background job'lar uchun
+erp_limiter = AdaptiveLimiter(
+    initial=config.limiter.initial,
+    min_limit=config.limiter.min_limit,
+    max_limit=config.limiter.max_limit,
+    latency_target=config.limiter.latency_target,
+)
+
+# Har bir endpoint uchun alohida circuit breaker
+erp_breakers = CircuitBreakerRegistry(
+    window=config.breaker.window,
+    min_calls=config.breaker.min_calls,
+    error_rate=config.breaker.error_rate,
+    cool_down=config.breaker.cool_down,
 )
 
 
 # ============================================================================
-# BASE REQUEST FUNCTION WITH RETRY LOGIC
+# RESPONSE CACHE CONFIGURATION
 # ============================================================================
 
-@retry(
-    stop=stop_after_attempt(3),  # 3 marta urinish
-    wait=wait_exponential(multiplier=1, min=2, max=10),  # 2s, 4s, 8s
-    retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-    reraise=True,
+# Har bir read-only endpoint uchun TTL (sekund).
+# Bu ro'yxatda yo'q endpointlar cache'lanmaydi:
+# - get_customer_by_passport / get_customer_by_phone - telegram bog'lash (side effect)
+# - get_customers_needing_reminders / get_overdue_customers - broadcast uchun doim yangi
+CACHE_TTLS: Dict[str, int] = {
+    "get_customer_by_telegram_id": 60,
+    "get_customer_contracts_detailed": 120,
+    "get_my_contracts_by_telegram_id": 120,
+    "get_contract_details": 120,
+    "get_payment_schedule": 300,
+    "get_payment_history": 120,
+    "get_payment_history_with_products": 120,
+    "get_payment_history_by_telegram_id": 120,
+    "get_reminders_by_telegram_id": 300,
+    "get_upcoming_payments": 300,
+    "get_support_contacts": 3600,
+}
+
+response_cache = ResponseCache(
+    max_entries=config.cache.local_max_entries,
+    local_ttl=config.cache.local_ttl,
+    stale_ttl=config.cache.stale_ttl,
+    enabled=config.cache.enabled,
 )
+
+
+def _endpoint_name(endpoint: str) -> str:
+    """/api/method/...telegram_bot_api.get_payment_schedule → get_payment_schedule"""
+    return endpoint.rsplit(".", 1)[-1]
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+# Bu xatolar ERPNext "ishlamayapti" degani - breaker va stale fallback uchun
+TRANSIENT_ERROR_TYPES = ("timeout", "network_error", "circuit_open")
+
+# So'rov ERPNext'ga yetib bormadi (mahalliy limiter navbatida deadline tugadi) -
+# breaker uchun neytral, lekin stale fallback ishlaydi
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+def _is_transient_failure(result: Dict[str, Any]) -> bool:
+    """Javob ERPNext/tarmoq nosozligini bildiradimi (4xx - bildirmaydi)?"""
+    if result.get("success") is not False:
+        return False
+    if result.get("error_type") in TRANSIENT_ERROR_TYPES:
+        return True
+    status_code = result.get("status_code") or 0
+    return status_code >= 500 or status_code == 429
+
+
+async def _guarded_request(
+    breaker,
+    generation: int,
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    _erp_request + natijani circuit breaker'ga qayd qilish.
+
+    generation - allow() o'tkazgan paytdagi breaker.generation (eski avlod
+    natijasi breaker holatini o'zgartirmaydi).
+    """
+    try:
+        result = await _erp_request(method, endpoint, params=params, data=data)
+    except BaseException:
+        breaker.abandon(generation)
+        raise
+
+    _record_result(breaker, result, generation)
+    return result
+
+
+def _record_result(breaker, result: Dict[str, Any], generation: int):
+    """Natijani breaker'ga qayd qilish (ERPNext'ga yetib bormagan so'rov - hisobga olinmaydi)."""
+    if result.get("error_type") == QUEUE_TIMEOUT:
+        breaker.abandon(generation)
+    else:
+        breaker.record(not _is_transient_failure(result), generation)
+
+
+def _circuit_open_response(endpoint: str, retry_after: float) -> Dict[str, Any]:
+    logger.warning(f"ERP Circuit open, fast-fail: {endpoint}")
+    return {
+        "success": False,
+        "message": "ERPNext vaqtincha ishlamayapti. Birozdan keyin qaytadan urinib ko'ring.",
+        "error_type": "circuit_open",
+        "retry_after": round(retry_after, 1),
+    }
+
+
+# ============================================================================
+# ENDPOINT POLICIES & DEADLINES
+# ============================================================================
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """
+    Bitta endpoint uchun timeout va retry byudjeti.
+
+    Attributes:
+        connect_timeout: TCP/TLS ulanish uchun (sekund)
+        read_timeout: Javob kutish uchun (sekund)
+        retries: Qo'shimcha urinishlar soni (0 - faqat bitta urinish)
+        backoff: Jitter'li exponential backoff asosi (sekund)
+        max_backoff: Ikki urinish orasidagi eng uzoq kutish (sekund)
+        deadline: Barcha urinishlar uchun umumiy muddat (sekund)
+    """
+    connect_timeout: float = 5.0
+    read_timeout: float = 15.0
+    retries: int = 2
+    backoff: float = 0.5
+    max_backoff: float = 4.0
+    deadline: float = 20.0
+
+
+DEFAULT_POLICY = EndpointPolicy()
+
+# Interaktiv endpointlar - tez fail; broadcast/batch endpointlar - uzoq kutadi
+ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    # /start - eng tez javob kerak
+    "get_customer_by_telegram_id": EndpointPolicy(connect_timeout=3.0, read_timeout=5.0, retries=1, deadline=8.0),
+    "get_customer_by_passport": EndpointPolicy(connect_timeout=3.0, read_timeout=10.0, retries=1, deadline=15.0),
+    "get_customer_by_phone": EndpointPolicy(connect_timeout=3.0, read_timeout=10.0, retries=1, deadline=15.0),
+
+    # Og'ir shartnoma javoblari
+    "get_customer_contracts_detailed": EndpointPolicy(read_timeout=20.0, retries=1, deadline=30.0),
+    "get_my_contracts_by_telegram_id": EndpointPolicy(read_timeout=20.0, retries=1, deadline=30.0),
+    "get_payment_history_by_telegram_id": EndpointPolicy(read_timeout=20.0, retries=1, deadline=30.0),
+
+    # Bitta shartnoma bo'yicha - yengil
+    "get_payment_schedule": EndpointPolicy(read_timeout=10.0, retries=2, deadline=15.0),
+    "get_payment_schedules": EndpointPolicy(read_timeout=15.0, retries=1, deadline=20.0),
+    "get_reminders_by_telegram_id": EndpointPolicy(read_timeout=10.0, retries=2, deadline=15.0),
+
+    # Background job'lar (eslatmalar, notification worker) - shoshilmaydi
+    "get_customers_needing_reminders": EndpointPolicy(
+        connect_timeout=10.0, read_timeout=60.0, retries=3, backoff=2.0, max_backoff=30.0, deadline=180.0
+    ),
+    "get_overdue_customers": EndpointPolicy(
+        connect_timeout=10.0, read_timeout=60.0, retries=3, backoff=2.0, max_backoff=30.0, deadline=180.0
+    ),
+    "get_all_active_due_payments": EndpointPolicy(
+        connect_timeout=10.0, read_timeout=60.0, retries=3, backoff=2.0, max_backoff=30.0, deadline=180.0
+    ),
+}
+
+
+def get_endpoint_policy(endpoint: str) -> EndpointPolicy:
+    """Endpoint (yoki uning nomi) uchun policy."""
+    return ENDPOINT_POLICIES.get(_endpoint_name(endpoint), DEFAULT_POLICY)
+
+
+# Joriy handler/job uchun absolyut deadline (time.monotonic() bo'yicha)
+_deadline: ContextVar[Optional[float]] = ContextVar("erp_deadline", default=None)
+
+
+@contextmanager
+def erp_deadline(seconds: float):
+    """
+    Blok ichidagi barcha ERPNext so'rovlari uchun umumiy vaqt chegarasi.
+
+    Ichma-ich ishlatilsa - eng qisqa deadline amal qiladi. asyncio task'lar
+    contextvar'ni meros oladi, shuning uchun gather() ichidagi so'rovlar ham
+    shu deadline'ga bo'ysunadi.
+
+    Example:
+        >>> with erp_deadline(10):
+        >>>     data = await erp_get_my_contracts_by_telegram_id(telegram_id)
+    """
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(current, new_deadline)
+
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_deadline() -> Optional[float]:
+    """Joriy deadline'gacha qolgan vaqt (sekund) yoki None (deadline yo'q)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+# ============================================================================
+# SINGLE-FLIGHT (IN-FLIGHT DEDUPLICATION)
+# ============================================================================
+
+# Hozir bajarilayotgan GET so'rovlar: (method, endpoint, params) -> Task
+# Masalan, eslatma broadcast'idan keyin yuzlab mijoz bir vaqtda
+# "📅 Eslatmalar" ni bossa - bir xil so'rovlar bitta round trip'ni kutadi
+_inflight: Dict[Tuple, "asyncio.Task"] = {}
+
+# Statistika: requests - jami GET so'rovlar, coalesced - boshqa so'rovga qo'shilganlar
+singleflight_stats: Dict[str, int] = {"requests": 0, "coalesced": 0}
+
+
+def _inflight_key(method: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple:
+    frozen = tuple(sorted(
+        (k, None if v is None else str(v))
+        for k, v in (params or {}).items()
+    ))
+    return method.upper(), endpoint, frozen
+
+
 async def erp_request(
     method: str,
     endpoint: str,
@@ -74,95 +345,673 @@ async def erp_request(
     data: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
-    ERPNext API ga request yuborish (retry logic bilan).
+    ERPNext API ga request yuborish (single-flight + retry logic bilan).
 
-    Retry Logic:
-    ------------
-    - Timeout yoki network error bo'lsa - 3 marta qayta urinadi
-    - Har bir urinish o'rtasida 2s → 4s → 8s kutadi
-    - 3 martadan keyin ham xato bo'lsa - exception raise qiladi
+    Single-flight:
+    --------------
+    - Faqat body'siz GET so'rovlar birlashtiriladi (POST/PUT - hech qachon)
+    - Birinchi so'rov (leader) HTTP'ni bajaradi, qolganlari uning natijasini kutadi
+    - Natija (dict) barcha chaqiruvchilarga umumiy - read-only deb hisoblang
+    - Leader chaqiruvchi bekor qilinsa ham (cancel) so'rov davom etadi
 
-    Args:
-        method: HTTP method (GET, POST, PUT, DELETE)
-        endpoint: API endpoint (/api/method/...)
-        params: Query parameters (GET uchun)
-        data: Request body (POST uchun)
+    Circuit breaker:
+    ----------------
+    - Endpoint breaker'i OPEN bo'lsa - HTTP yuborilmaydi, darhol
+      {"success": False, "error_type": "circuit_open"} qaytariladi
+    - Allaqachon bajarilayotgan so'rovga qo'shilish breaker'ni chetlab o'tadi
+      (ERPNext'ga yangi yuk qo'shilmaydi)
+
+    Args/Returns: _erp_request bilan bir xil.
+    """
+    breaker = erp_breakers.get(_endpoint_name(endpoint))
+
+    if method.upper() != "GET" or data is not None:
+        if not breaker.allow():
+            return _circuit_open_response(endpoint, breaker.retry_after())
+        return await _guarded_request(breaker, breaker.generation, method, endpoint, params=params, data=data)
+
+    singleflight_stats["requests"] += 1
+    key = _inflight_key(method, endpoint, params)
+
+    task = _inflight.get(key)
+    if task is not None:
+        singleflight_stats["coalesced"] += 1
+        logger.debug(f"ERP Request coalesced: {method} {endpoint}")
+    else:
+        if not breaker.allow():
+            return _circuit_open_response(endpoint, breaker.retry_after())
+        task = asyncio.ensure_future(_guarded_request(breaker, breaker.generation, method, endpoint, params=params))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # shield - bitta chaqiruvchi cancel bo'lsa, boshqalar uchun so'rov to'xtamaydi
+    remaining = remaining_deadline()
+    if remaining is None:
+        return await asyncio.shield(task)
+
+    # Bu chaqiruvchining deadline'i leader'nikidan qisqa bo'lishi mumkin
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=remaining)
+    except asyncio.TimeoutError:
+        logger.error(f"ERP Deadline exceeded while waiting: {endpoint}")
+        return _timeout_response()
 
-    Returns:
-        dict: ERPNext API response
+
+# ============================================================================
+# BASE REQUEST FUNCTION WITH RETRY LOGIC
+# ============================================================================
+
+class ERPDeadlineExceeded(httpx.TimeoutException):
+    """Handler yoki endpoint deadline'i tugadi - yangi urinish qilinmaydi."""
+
+
+class ERPQueueTimeout(ERPDeadlineExceeded):
+    """Deadline limiter slot'ini kutishda tugadi - so'rov ERPNext'ga yuborilmadi."""
+
+
+def _timeout_response() -> Dict[str, Any]:
+    return {
+        "success": False,
+        "message": "ERPNext javob bermadi (timeout). Qaytadan urinib ko'ring.",
+        "error_type": "timeout",
+    }
+
+
+def _is_retryable(exc: BaseException, method: str) -> bool:
+    """
+    Qaysi xatolarda qayta urinish mumkin.
+
+    - Deadline tugagan bo'lsa - hech qachon
+    - Ulanish o'rnatilmagan (ConnectError/ConnectTimeout) - har doim (so'rov ketmagan)
+    - Timeout / tarmoq xatosi / 502-504 - faqat GET (idempotent)
+    """
+    if isinstance(exc, ERPDeadlineExceeded):
+        return False
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    if method.upper() != "GET":
+        return False
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in (502, 503, 504)
+    return False
+
+
+async def _send_once(
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]],
+    data: Optional[Dict[str, Any]],
+    policy: EndpointPolicy,
+    deadline: float,
+    stream: bool = False,
+) -> httpx.Response:
+    """
+    Bitta HTTP urinish: limiter slot + deadline'ga moslangan timeout.
+
+    stream=True - body o'qilmaydi (response.aiter_bytes() + aclose()
+    chaqiruvchida). Limiter slot header'lar kelganda bo'shatiladi: Frappe
+    javobni to'liq tayyorlab keyin yuboradi, body'ni o'qish tezligi esa
+    chaqiruvchiga (masalan, Telegram'ga yuborish) bog'liq.
 
     Raises:
-        httpx.TimeoutException: Request timeout
-        httpx.HTTPStatusError: HTTP error (4xx, 5xx)
+        ERPQueueTimeout: Deadline limiter slot'ini kutishda tugadi
+        ERPDeadlineExceeded: Deadline tugadi (javob kutishda)
+        httpx.HTTPStatusError: 4xx / 5xx
     """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise ERPDeadlineExceeded(f"ERP deadline exceeded before request: {endpoint}")
+
+    # Concurrency limiter - slot bo'lmasa priority navbatida kutadi (deadline'gacha)
     try:
-        logger.debug(f"ERP Request: {method} {endpoint}")
+        await asyncio.wait_for(erp_limiter.acquire(), timeout=remaining)
+    except asyncio.TimeoutError:
+        raise ERPQueueTimeout(f"ERP deadline exceeded waiting for limiter: {endpoint}")
+
+    started = time.monotonic()
+    remaining = max(0.001, deadline - started)
+    timeout = httpx.Timeout(
+        min(policy.read_timeout, remaining),
+        connect=min(policy.connect_timeout, remaining),
+    )
 
-        response = await http_client.request(
+    overloaded = True
+    try:
+        request = http_client.build_request(
             method=method,
             url=endpoint,
             params=params,
             json=data,
+            timeout=timeout,
         )
+        response = await asyncio.wait_for(
+            http_client.send(request, stream=stream),
+            timeout=remaining,
+        )
+        overloaded = response.status_code >= 500 or response.status_code == 429
+    except asyncio.TimeoutError:
+        raise ERPDeadlineExceeded(f"ERP deadline exceeded during request: {endpoint}")
+    except asyncio.CancelledError:
+        overloaded = False
+        raise
+    finally:
+        erp_limiter.release(time.monotonic() - started, overloaded)
+
+    if stream and response.is_error:
+        await response.aread()  # xato body'si log uchun (aread - ulanishni ham bo'shatadi)
+    response.raise_for_status()
+    return response
+
+
+def _request_deadline(policy: EndpointPolicy) -> float:
+    """Bitta so'rovning umumiy muddati: min(policy.deadline, handler deadline)."""
+    deadline = time.monotonic() + policy.deadline
+    handler_deadline = _deadline.get()
+    if handler_deadline is not None:
+        deadline = min(deadline, handler_deadline)
+    return deadline
+
+
+def _retrying(method: str, endpoint: str, policy: EndpointPolicy, deadline: float) -> AsyncRetrying:
+    """Endpoint policy bo'yicha retry (jitter'li backoff, deadline'dan oshmaydi)."""
+
+    def deadline_reached(retry_state) -> bool:
+        return time.monotonic() >= deadline
+
+    def backoff_within_deadline(retry_state) -> float:
+        wait = wait_random_exponential(multiplier=policy.backoff, max=policy.max_backoff)(retry_state)
+        return max(0.0, min(wait, deadline - time.monotonic()))
+
+    return AsyncRetrying(
+        stop=stop_any(stop_after_attempt(policy.retries + 1), deadline_reached),
+        wait=backoff_within_deadline,
+        retry=retry_if_exception(lambda exc: _is_retryable(exc, method)),
+        before_sleep=lambda rs: logger.warning(
+            f"ERP Retry {rs.attempt_number}/{policy.retries}: {endpoint} - {rs.outcome.exception()}"
+        ),
+        reraise=True,
+    )
 
-        response.raise_for_status()
-        result = response.json()
 
-        # ⚠️ MUHIM: ERPNext ba'zan response'ni "message" key ichida qaytaradi
-        # Agar shunday bo'lsa - unwrap qilamiz
-        if "message" in result and isinstance(result["message"], dict):
-            # Agar message ichida success field bo'lsa - bu wrapped response
-            if "success" in result["message"] or "customer" in result["message"]:
-                logger.debug(f"Unwrapping response from 'message' key")
-                result = result["message"]
+def _unwrap_message(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ⚠️ MUHIM: ERPNext ba'zan response'ni "message" key ichida qaytaradi.
+    Agar message ichida success field bo'lsa - bu wrapped response, unwrap qilamiz.
+    """
+    if "message" in result and isinstance(result["message"], dict):
+        if "success" in result["message"] or "customer" in result["message"]:
+            logger.debug(f"Unwrapping response from 'message' key")
+            return result["message"]
+    return result
 
-        logger.debug(f"ERP Response: {endpoint} -> success={result.get('success', 'unknown')}")
-        return result
 
-    except httpx.HTTPStatusError as e:
+def _error_response(endpoint: str, exc: Exception) -> Dict[str, Any]:
+    """Xatoni log qilish va {"success": False, ...} javobiga o'girish."""
+    if isinstance(exc, httpx.HTTPStatusError):
         # HTTP xato (4xx, 5xx)
         error_detail = {
             "success": False,
-            "message": f"ERPNext xato qaytardi: {e.response.status_code}",
-            "status_code": e.response.status_code,
-            "url": str(e.request.url),
+            "message": f"ERPNext xato qaytardi: {exc.response.status_code}",
+            "status_code": exc.response.status_code,
+            "url": str(exc.request.url),
         }
 
         # Response body'ni log qilish (debugging uchun)
         try:
-            error_detail["response_body"] = e.response.json()
+            error_detail["response_body"] = exc.response.json()
         except:
-            error_detail["response_text"] = e.response.text[:500]
+            error_detail["response_text"] = exc.response.text[:500]
 
         logger.error(f"ERP HTTP Error: {error_detail}")
         return error_detail
 
-    except httpx.TimeoutException as e:
-        # Timeout xatosi
-        logger.error(f"ERP Timeout: {endpoint} - {e}")
-        return {
-            "success": False,
-            "message": "ERPNext javob bermadi (timeout). Qaytadan urinib ko'ring.",
-            "error_type": "timeout",
-        }
+    if isinstance(exc, ERPQueueTimeout):
+        # Mahalliy navbat - ERPNext so'rovni olmadi
+        logger.error(f"ERP Queue timeout: {endpoint} - {exc}")
+        return {**_timeout_response(), "error_type": QUEUE_TIMEOUT}
+
+    if isinstance(exc, httpx.TimeoutException):
+        # Timeout xatosi (deadline ham shu yerga tushadi)
+        logger.error(f"ERP Timeout: {endpoint} - {exc}")
+        return _timeout_response()
 
-    except httpx.NetworkError as e:
+    if isinstance(exc, httpx.NetworkError):
         # Tarmoq xatosi
-        logger.error(f"ERP Network Error: {endpoint} - {e}")
+        logger.error(f"ERP Network Error: {endpoint} - {exc}")
         return {
             "success": False,
             "message": "ERPNext bilan bog'lanib bo'lmadi. Internetni tekshiring.",
             "error_type": "network_error",
         }
 
+    # Boshqa xatolar
+    logger.error(f"ERP Unexpected Error: {endpoint} - {exc}")
+    return {
+        "success": False,
+        "message": f"Kutilmagan xatolik: {str(exc)}",
+        "error_type": "unknown",
+    }
+
+
+async def _erp_request(
+    method: str,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    ERPNext API ga request yuborish (endpoint policy bo'yicha retry bilan).
+
+    Retry Logic:
+    ------------
+    - Timeout, tarmoq xatosi yoki 502/503/504 bo'lsa - policy.retries marta
+      qayta urinadi (POST/PUT - faqat ulanish o'rnatilmagan bo'lsa)
+    - Urinishlar orasida jitter'li exponential backoff (policy.backoff)
+    - Umumiy muddat: min(policy.deadline, handler deadline) - undan oshmaydi
+    - Oxirida ham xato bo'lsa - {"success": False, ...} qaytariladi
+
+    Args:
+        method: HTTP method (GET, POST, PUT, DELETE)
+        endpoint: API endpoint (/api/method/...)
+        params: Query parameters (GET uchun)
+        data: Request body (POST uchun)
+
+    Returns:
+        dict: ERPNext API response
+    """
+    policy = get_endpoint_policy(endpoint)
+    deadline = _request_deadline(policy)
+
+    try:
+        logger.debug(f"ERP Request: {method} {endpoint}")
+
+        response = None
+        async for attempt in _retrying(method, endpoint, policy, deadline):
+            with attempt:
+                response = await _send_once(method, endpoint, params, data, policy, deadline)
+
+        # Bytes'dan to'g'ridan-to'g'ri decode (orjson/msgspec bo'lsa - tezroq)
+        result = _unwrap_message(json_codec.loads(response.content))
+
+        logger.debug(f"ERP Response: {endpoint} -> success={result.get('success', 'unknown')}")
+        return result
+
     except Exception as e:
-        # Boshqa xatolar
-        logger.error(f"ERP Unexpected Error: {endpoint} - {e}")
-        return {
-            "success": False,
-            "message": f"Kutilmagan xatolik: {str(e)}",
-            "error_type": "unknown",
-        }
+        return _error_response(endpoint, e)
+
+
+# ============================================================================
+# STREAMING RESPONSES
+# ============================================================================
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class ContractStream:
+    """
+    Javobdagi shartnomalar massivini yuklanishi bilan birma-bir qaytaruvchi oqim.
+
+    - Cache'da javob bo'lsa - ERPNext'ga murojaat yo'q, cache'dan qaytariladi
+    - Aks holda HTTP body bo'laklab o'qiladi (JSONArrayStream), har bir
+      shartnoma to'liq kelishi bilan Contract modeli yield qilinadi
+    - Retry faqat ulanish/header bosqichida (birinchi shartnomadan keyin
+      qayta urinib bo'lmaydi); deadline va circuit breaker - erp_request kabi
+
+    result (iteratsiya tugagach):
+        Muvaffaqiyatli - javob konverti (success, customer_name, ...) +
+        "streamed": yield qilingan shartnomalar soni; xato -
+        {"success": False, ...} (erp_request formatida). Xato oqim o'rtasida
+        bo'lsa, oldin yield qilingan shartnomalar haqiqiy.
+
+    ⚠️ Oqim javobi cache'ga yozilmaydi (to'liq javob xotirada yig'ilmaydi).
+    ⚠️ Oxirigacha o'qilmasa (break) - `await stream.aclose()` (ulanish bo'shaydi).
+    """
+
+    def __init__(self, endpoint: str, params: Optional[Dict[str, Any]] = None, key: str = "contracts"):
+        self.endpoint = endpoint
+        self.params = params
+        self.key = key
+        self.result: Dict[str, Any] = {"success": False, "message": "Oqim hali o'qilmagan"}
+        self._iterator: Optional[AsyncIterator[Contract]] = None
+
+    def __aiter__(self) -> AsyncIterator[Contract]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    async def aclose(self):
+        """Oqimni to'xtatish - HTTP javob yopiladi."""
+        if self._iterator is not None:
+            await self._iterator.aclose()
+
+    async def _iterate(self) -> AsyncIterator[Contract]:
+        name = _endpoint_name(self.endpoint)
+        streamed = 0
+
+        if CACHE_TTLS.get(name, 0) > 0:
+            cached = await response_cache.get(make_cache_key(name, self.params))
+            if cached is not None:
+                logger.debug(f"ERP Cache hit (stream): {name}")
+                for contract in parse_contracts(cached.get(self.key)):
+                    streamed += 1
+                    yield contract
+                self.result = {**cached, self.key: [], "streamed": streamed}
+                return
+
+        breaker = erp_breakers.get(name)
+        if not breaker.allow():
+            self.result = _circuit_open_response(self.endpoint, breaker.retry_after())
+            return
+        generation = breaker.generation
+
+        policy = get_endpoint_policy(self.endpoint)
+        deadline = _request_deadline(policy)
+        parser = JSONArrayStream(self.key)
+        response = None
+
+        try:
+            logger.debug(f"ERP Stream: GET {self.endpoint}")
+            async for attempt in _retrying("GET", self.endpoint, policy, deadline):
+                with attempt:
+                    response = await _send_once("GET", self.endpoint, self.params, None, policy, deadline, stream=True)
+
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                if time.monotonic() >= deadline:
+                    raise ERPDeadlineExceeded(f"ERP deadline exceeded while streaming: {self.endpoint}")
+                for item in parser.feed(chunk):
+                    if isinstance(item, dict):
+                        streamed += 1
+                        yield Contract.from_dict(item)
+
+            self.result = {**_unwrap_message(parser.close()), "streamed": streamed}
+            logger.debug(
+                f"ERP Stream done: {name} -> {streamed} {self.key}, {parser.bytes / 1024:.0f} KB"
+            )
+
+        except Exception as e:
+            self.result = _error_response(self.endpoint, e)
+
+        except BaseException:
+            # Iste'molchi to'xtatdi (break / cancel) - natija noma'lum
+            breaker.abandon(generation)
+            raise
+
+        finally:
+            if response is not None:
+                await response.aclose()
+
+        _record_result(breaker, self.result, generation)
+
+
+# ============================================================================
+# TYPED RESPONSE MODELS
+# ============================================================================
+
+# Javob kaliti → parser (app/services/models.py)
+_MODEL_PARSERS = {
+    # Bo'sh / customer_id'siz customer - topilmadi (baseline: len(customer) > 0)
+    "customer": lambda v: Customer.from_dict(v) if isinstance(v, dict) and v.get("customer_id") else None,
+    "contract": lambda v: Contract.from_dict(v) if isinstance(v, dict) else None,
+    "contracts": parse_contracts,
+    "products": parse_products,
+    "payments": parse_payments,
+    "schedule": parse_schedule,
+}
+
+
+def _with_models(result: Dict[str, Any], *keys: str) -> Dict[str, Any]:
+    """
+    Muvaffaqiyatli javobning ko'rsatilgan kalitlarini typed modellarga o'girish.
+
+    Javob nusxasi qaytariladi - cache / single-flight'dagi umumiy dict
+    o'zgarmaydi. Xato javoblar (success=False) o'zgarishsiz qaytadi.
+
+    Example:
+        >>> _with_models(result, "customer", "contracts")
+        {"success": True, "customer": Customer(...), "contracts": [Contract(...)]}
+    """
+    if not result.get("success"):
+        return result
+
+    typed = dict(result)
+    for key in keys:
+        if key in typed:
+            typed[key] = _MODEL_PARSERS[key](typed[key])
+    return typed
+
+
+# ============================================================================
+# CACHED READ-ONLY REQUESTS
+# ============================================================================
+
+def _cache_tags(params: Optional[Dict[str, Any]], result: Dict[str, Any]) -> List[str]:
+    """
+    Cache yozuvi uchun invalidation tag'lari.
+
+    Tag'lar so'rov parametrlaridan va javobning o'zidan olinadi - shunda
+    telegram_id bo'yicha olingan shartnomalar contract_id bo'yicha ham
+    invalidation qilinishi mumkin.
+    """
+    params = params or {}
+    tags = []
+
+    if params.get("telegram_id"):
+        tags.append(f"tg:{params['telegram_id']}")
+    if params.get("contract_id"):
+        tags.append(f"contract:{params['contract_id']}")
+    if params.get("customer_name"):
+        tags.append(f"customer:{params['customer_name']}")
+
+    customer = result.get("customer")
+    customer_id = result.get("customer_id")
+    if not customer_id and isinstance(customer, dict):
+        customer_id = customer.get("customer_id")
+    if customer_id:
+        tags.append(f"customer:{customer_id}")
+
+    for contract in result.get("contracts") or []:
+        if isinstance(contract, dict) and contract.get("contract_id"):
+            tags.append(f"contract:{contract['contract_id']}")
+
+    return tags
+
+
+async def _erp_cached_get(
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    allow_stale: bool = False,
+) -> Dict[str, Any]:
+    """
+    Read-only GET so'rov - response cache orqali.
+
+    Flow:
+    -----
+    1. CACHE_TTLS dan endpoint TTL'ini topish (yo'q bo'lsa - cache'siz)
+    2. Cache'da bo'lsa - darhol qaytarish (ERPNext'ga murojaat yo'q)
+    3. allow_stale=True va TTL o'tganiga ERP_CACHE_SWR_MAX_AGE dan oshmagan
+       bo'lsa - eskirgan javob "stale": True bilan darhol qaytariladi
+       (yangilash - chaqiruvchining vazifasi, stale-while-revalidate)
+    4. Bo'lmasa - erp_request, muvaffaqiyatli javobni cache'ga yozish
+    5. ERPNext ishlamasa - cache'dagi eskirgan javob "stale": True bilan
+
+    Args:
+        endpoint: API endpoint (/api/method/...)
+        params: Query parameters
+        allow_stale: Eskirgan javobni kutmasdan qaytarish mumkinmi
+
+    Returns:
+        dict: ERPNext API response (cache'dan bo'lsa - read-only!)
+    """
+    name = _endpoint_name(endpoint)
+    ttl = CACHE_TTLS.get(name, 0)
+
+    if ttl <= 0:
+        return await erp_request(method="GET", endpoint=endpoint, params=params)
+
+    key = make_cache_key(name, params)
+    if allow_stale:
+        entry = await response_cache.get_with_age(key)
+        if entry is not None:
+            cached, age = entry
+            if age <= 0:
+                logger.debug(f"ERP Cache hit: {key}")
+                return cached
+            if age <= config.cache.swr_max_age:
+                logger.debug(f"ERP Cache stale hit: {key} (+{age:.0f}s)")
+                return {**cached, "stale": True}
+    else:
+        cached = await response_cache.get(key)
+        if cached is not None:
+            logger.debug(f"ERP Cache hit: {key}")
+            return cached
+
+    result = await erp_request(method="GET", endpoint=endpoint, params=params)
+
+    # ERPNext ishlamayapti (circuit open / timeout / 5xx) yoki navbat to'la - oxirgi ma'lum javob
+    if _is_transient_failure(result) or result.get("error_type") == QUEUE_TIMEOUT:
+        stale = await response_cache.get_stale(key)
+        if stale is not None:
+            logger.warning(f"ERP Stale fallback: {key} ({result.get('error_type') or result.get('status_code')})")
+            return {**stale, "stale": True}
+        return result
+
+    await _cache_put(name, params, result)
+    _index_products(params, result)
+
+    return result
+
+
+async def _cache_put(name: str, params: Optional[Dict[str, Any]], result: Dict[str, Any]):
+    """Muvaffaqiyatli javobni endpoint TTL'i bilan cache'ga yozish."""
+    ttl = CACHE_TTLS.get(name, 0)
+    if ttl > 0 and result.get("success"):
+        await response_cache.set(make_cache_key(name, params), result, ttl, _cache_tags(params, result))
+
+
+def _index_products(params: Optional[Dict[str, Any]], result: Dict[str, Any]):
+    """
+    ERPNext'dan yangi kelgan shartnomalar (telegram_id bo'yicha) - mahsulotlar
+    indeksini background'da qayta yozish (app/services/product_index.py).
+    """
+    telegram_id = (params or {}).get("telegram_id")
+    if telegram_id and result.get("success") and isinstance(result.get("contracts"), list):
+        spawn_background(product_index.put(telegram_id, result["contracts"]))
+
+
+async def invalidate_erp_cache(
+    telegram_id: Optional[Any] = None,
+    customer_id: Optional[str] = None,
+    contract_ids: Iterable[str] = (),
+) -> int:
+    """
+    Mijozga tegishli cache yozuvlarini o'chirish.
+
+    Masalan, to'lov qabul qilinganda - shartnoma, jadval, tarix va
+    eslatmalar keyingi so'rovda ERPNext'dan qayta olinadi. telegram_id
+    berilsa - mahsulotlar indeksi ham o'chiriladi.
+
+    Args:
+        telegram_id: Telegram user ID
+        customer_id: Customer ID (CUST-00001)
+        contract_ids: Shartnoma ID'lari
+
+    Returns:
+        int: O'chirilgan cache yozuvlari soni
+    """
+    tags = []
+    if telegram_id:
+        tags.append(f"tg:{telegram_id}")
+        await product_index.invalidate(telegram_id)
+    if customer_id:
+        tags.append(f"customer:{customer_id}")
+    tags.extend(f"contract:{cid}" for cid in contract_ids if cid)
+
+    if not tags:
+        return 0
+
+    return await response_cache.invalidate_tags(*tags)
+
+
+# Background task'lar - GC tomonidan yo'qolib ketmasligi uchun reference saqlanadi
+_background_tasks: set = set()
+
+
+def spawn_background(coro) -> "asyncio.Task":
+    """
+    Coroutine'ni background task sifatida ishga tushirish.
+
+    Task reference _background_tasks da saqlanadi (GC yo'qotmasligi uchun),
+    tugagach avtomatik o'chiriladi.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def balance_fingerprint(contracts: Iterable[Contract]) -> Dict[str, Tuple]:
+    """
+    Shartnomalarning mijoz uchun "muhim" qismi: balans va keyingi to'lov.
+
+    Stale-while-revalidate'da eskirgan va yangi javoblarni solishtirish
+    uchun - faqat shu qiymatlar o'zgarganda xabar tahrirlanadi.
+
+    Returns:
+        {contract_id: (total_amount, paid, remaining, next_due_date, next_amount)}
+    """
+    result = {}
+    for contract in contracts or []:
+        next_payment = contract.next_payment
+        result[contract.contract_id] = (
+            contract.total_amount,
+            contract.paid,
+            contract.remaining,
+            next_payment.due_date if next_payment else None,
+            next_payment.amount if next_payment else None,
+        )
+    return result
+
+
+async def _warm_customer_cache(telegram_id: Any):
+    """Mijozning eng ko'p ochiladigan ko'rinishlarini cache'ga oldindan yuklash."""
+    try:
+        await asyncio.gather(
+            erp_get_my_contracts_by_telegram_id(telegram_id),
+            erp_get_reminders_by_telegram_id(telegram_id),
+        )
+        logger.debug(f"ERP Cache warmed for telegram_id={telegram_id}")
+    except Exception as e:
+        logger.warning(f"ERP Cache warm-up failed for telegram_id={telegram_id}: {e}")
+
+
+async def refresh_customer_cache(
+    telegram_id: Optional[Any] = None,
+    customer_id: Optional[str] = None,
+    contract_ids: Iterable[str] = (),
+) -> int:
+    """
+    Mijoz cache'ini o'chirish va background'da qayta yuklash.
+
+    Payment Entry webhook'idan chaqiriladi: shartnoma, jadval, tarix va
+    eslatmalar darhol o'chiriladi, keyin shartnomalar va eslatmalar
+    background'da ERPNext'dan qayta olinadi - mijoz keyingi bosishda
+    yangi balansni tez ko'radi.
+
+    Returns:
+        int: O'chirilgan cache yozuvlari soni
+    """
+    removed = await invalidate_erp_cache(
+        telegram_id=telegram_id,
+        customer_id=customer_id,
+        contract_ids=contract_ids,
+    )
+
+    if telegram_id and response_cache.enabled:
+        spawn_background(_warm_customer_cache(telegram_id))
+
+    return removed
 
 
 # ============================================================================
@@ -210,10 +1059,10 @@ async def erp_get_customer_by_passport(
     )
 
     logger.info(f"[API] get_customer_by_passport response: success={result.get('success')}, is_new_link={result.get('is_new_link')}")
-    return result
+    return _with_models(result, "customer", "contracts")
 
 
-async def erp_get_customer_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
+async def erp_get_customer_by_telegram_id(telegram_id: int, allow_stale: bool = False) -> Dict[str, Any]:
     """
     Telegram ID orqali customer topish.
 
@@ -223,20 +1072,21 @@ async def erp_get_customer_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
 
     Args:
         telegram_id: Telegram user ID
+        allow_stale: Eskirgan cache javobini darhol qaytarish (_erp_cached_get)
 
     Returns:
         Customer ma'lumotlari yoki {success: False}
     """
     logger.info(f"[API] get_customer_by_telegram_id called with: {telegram_id}")
 
-    result = await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_customer_by_telegram_id",
-        params={"telegram_id": str(telegram_id)}  # ✅ MUHIM: str() qo'shildi!
+        params={"telegram_id": str(telegram_id)},  # ✅ MUHIM: str() qo'shildi!
+        allow_stale=allow_stale,
     )
 
     logger.info(f"[API] get_customer_by_telegram_id response: success={result.get('success')}")
-    return result
+    return _with_models(result, "customer", "contracts")
 
 
 async def erp_get_customer_by_phone(
@@ -253,7 +1103,7 @@ async def erp_get_customer_by_phone(
     Returns:
         Customer ma'lumotlari
     """
-    return await erp_request(
+    result = await erp_request(
         method="GET",
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_customer_by_phone",
         params={
@@ -261,6 +1111,7 @@ async def erp_get_customer_by_phone(
             "telegram_chat_id": str(telegram_chat_id) if telegram_chat_id else None,  # ✅ str()
         }
     )
+    return _with_models(result, "customer", "contracts")
 
 
 # ============================================================================
@@ -311,14 +1162,14 @@ async def erp_get_customer_contracts(customer_id: str) -> Dict[str, Any]:
             ]
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_customer_contracts_detailed",
         params={"customer_name": customer_id}
     )
+    return _with_models(result, "contracts")
 
 
-async def erp_get_contracts_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
+async def erp_get_contracts_by_telegram_id(telegram_id: int, allow_stale: bool = False) -> Dict[str, Any]:
     """
     Telegram ID orqali customer va uning shartnomalarini olish.
 
@@ -326,33 +1177,38 @@ async def erp_get_contracts_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
 
     Args:
         telegram_id: Telegram user ID
+        allow_stale: Eskirgan cache javobini darhol qaytarish
 
     Returns:
         {
             "success": True,
             "customer": {...},
-            "contracts": [...]
+            "contracts": [...],
+            "stale": True  # faqat eskirgan cache'dan bo'lsa
         }
     """
     # Avval telegram ID bo'yicha customerni topamiz
-    customer_data = await erp_get_customer_by_telegram_id(telegram_id)
+    customer_data = await erp_get_customer_by_telegram_id(telegram_id, allow_stale=allow_stale)
 
     if not customer_data.get("success"):
         return customer_data
 
     # Agar customer topilsa - contracts allaqachon API javobida kelgan!
     customer = customer_data.get("customer")
-    if not customer:
+    if customer is None:
         return {"success": False, "message": "Customer ma'lumotlari topilmadi"}
 
     # ✅ API javobidan contracts ni olish (allaqachon kelgan!)
     contracts = customer_data.get("contracts", [])
 
-    return {
+    result = {
         "success": True,
         "customer": customer,
         "contracts": contracts
     }
+    if customer_data.get("stale"):
+        result["stale"] = True
+    return result
 
 
 async def erp_get_contract_details(contract_id: str) -> Dict[str, Any]:
@@ -379,11 +1235,11 @@ async def erp_get_contract_details(contract_id: str) -> Dict[str, Any]:
             }
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_contract_details",
         params={"contract_id": contract_id}
     )
+    return _with_models(result, "contract")
 
 
 async def erp_get_payment_schedule(contract_id: str) -> Dict[str, Any]:
@@ -423,11 +1279,122 @@ async def erp_get_payment_schedule(contract_id: str) -> Dict[str, Any]:
             ]
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_schedule",
         params={"contract_id": contract_id}
     )
+    return _with_models(result, "schedule")
+
+
+# Batch schedule endpoint mavjudmi?
+# None - hali tekshirilmagan, True - ishlaydi, False - ERPNext'da yo'q (fan-out ishlatiladi)
+_batch_schedule_supported: Optional[bool] = None
+
+# Frappe "bunday method yo'q" javoblari (xato matni response_body / response_text da)
+_MISSING_METHOD_MESSAGES = ("not whitelisted", "has no attribute", "no module named")
+
+
+def _method_missing(response: Dict[str, Any]) -> bool:
+    """Xato javob ERPNext'da method mavjud emasligini bildiradimi (404 / 417 / Frappe matni)?"""
+    if response.get("status_code") in (404, 417):
+        return True
+    text = str(response.get("response_body") or response.get("response_text") or "").lower()
+    return any(message in text for message in _MISSING_METHOD_MESSAGES)
+
+# Fan-out rejimida bir vaqtda nechta get_payment_schedule yuboriladi
+SCHEDULE_FANOUT_CONCURRENCY = 5
+
+
+async def erp_get_payment_schedules(
+    contract_ids: List[str],
+    allow_stale: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Bir nechta shartnoma uchun to'lov jadvallarini bitta chaqiruvda olish.
+
+    Flow:
+    -----
+    1. Cache'da bor jadvallar darhol olinadi
+    2. Qolganlari - batch endpoint (get_payment_schedules) orqali bitta so'rovda
+    3. Agar batch endpoint ERPNext'da bo'lmasa (4xx) - bu eslab qolinadi va
+       erp_get_payment_schedule() bilan cheklangan parallel (fan-out) so'rovlar
+
+    Batch endpoint javobi:
+    ----------------------
+        {
+            "success": True,
+            "schedules": {
+                "CON-2025-00245": {"success": True, "contract_id": "...", "schedule": [...]},
+                ...
+            }
+        }
+
+    Args:
+        contract_ids: Shartnoma ID'lari ro'yxati
+        allow_stale: SWR oynasidagi eskirgan jadvallarni ham cache'dan olish
+
+    Returns:
+        {contract_id: erp_get_payment_schedule() javobi} - har bir ID uchun
+    """
+    global _batch_schedule_supported
+
+    unique_ids = list(dict.fromkeys(cid for cid in contract_ids if cid))
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # 1. Cache
+    missing = []
+    for contract_id in unique_ids:
+        key = make_cache_key("get_payment_schedule", {"contract_id": contract_id})
+        if allow_stale:
+            entry = await response_cache.get_with_age(key)
+            cached = entry[0] if entry and entry[1] <= config.cache.swr_max_age else None
+        else:
+            cached = await response_cache.get(key)
+
+        if cached is not None:
+            results[contract_id] = _with_models(cached, "schedule")
+        else:
+            missing.append(contract_id)
+
+    if not missing:
+        return results
+
+    # 2. Batch endpoint (bitta round trip)
+    if len(missing) > 1 and _batch_schedule_supported is not False:
+        response = await erp_request(
+            method="GET",
+            endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_schedules",
+            params={"contract_ids": json.dumps(missing)},
+        )
+        schedules = response.get("schedules")
+
+        if response.get("success") and isinstance(schedules, dict):
+            _batch_schedule_supported = True
+            for contract_id in missing:
+                item = schedules.get(contract_id)
+                if isinstance(item, dict):
+                    await _cache_put("get_payment_schedule", {"contract_id": contract_id}, item)
+                    results[contract_id] = _with_models(item, "schedule")
+            missing = [cid for cid in missing if cid not in results]
+
+        elif _method_missing(response):
+            # Frappe: method yo'q - qayta urinib o'tirmaymiz (process davomida fan-out)
+            _batch_schedule_supported = False
+            logger.info("ERPNext get_payment_schedules not available - using fan-out")
+        # Boshqa xatolar (429, 401/403, 5xx) - vaqtinchalik: faqat shu so'rov fan-out
+
+    # 3. Fan-out (cheklangan parallel)
+    if missing:
+        semaphore = asyncio.Semaphore(SCHEDULE_FANOUT_CONCURRENCY)
+
+        async def fetch_one(contract_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await erp_get_payment_schedule(contract_id)
+
+        fetched = await asyncio.gather(*(fetch_one(cid) for cid in missing))
+        results.update(zip(missing, fetched))
+
+    return results
 
 
 async def erp_get_payment_history(contract_id: str) -> Dict[str, Any]:
@@ -452,11 +1419,11 @@ async def erp_get_payment_history(contract_id: str) -> Dict[str, Any]:
             ]
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_history",
         params={"contract_id": contract_id}
     )
+    return _with_models(result, "payments")
 
 
 async def erp_get_payment_history_with_products(contract_id: str) -> Dict[str, Any]:
@@ -504,11 +1471,15 @@ async def erp_get_payment_history_with_products(contract_id: str) -> Dict[str, A
             "total_payments": 1
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_history_with_products",
         params={"contract_id": contract_id}
     )
+    typed = _with_models(result, "contract", "products", "payments")
+    if typed.get("success") and typed.get("contract") is None:
+        # Eski javob formati: shartnoma maydonlari yuqori darajada
+        typed["contract"] = Contract.from_dict(result)
+    return typed
 
 
 # ============================================================================
@@ -553,8 +1524,7 @@ async def erp_get_reminders_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
             "message": "Eslatmalar yuklandi"
         }
     """
-    return await erp_request(
-        method="GET",
+    return await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_reminders_by_telegram_id",
         params={"telegram_id": str(telegram_id)}
     )
@@ -603,14 +1573,38 @@ async def erp_get_payment_history_by_telegram_id(telegram_id: int) -> Dict[str,
             "message": "To'lovlar tarixi yuklandi"
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_history_by_telegram_id",
         params={"telegram_id": str(telegram_id)}
     )
+    return _with_models(result, "contracts")
 
 
-async def erp_get_my_contracts_by_telegram_id(telegram_id: int) -> Dict[str, Any]:
+def erp_stream_payment_history_by_telegram_id(telegram_id: int) -> "ContractStream":
+    """
+    erp_get_payment_history_by_telegram_id ning streaming varianti.
+
+    Ko'p shartnoma va yuzlab Payment Entry'li mijozlar uchun: shartnomalar
+    javob yuklanishi bilan birma-bir keladi - birinchi shartnoma xabarini
+    qolganlari yuklanmasdan yuborish mumkin, xotirada bitta shartnoma turadi.
+
+    Example:
+        >>> stream = erp_stream_payment_history_by_telegram_id(telegram_id)
+        >>> async for contract in stream:
+        ...     await msg.answer(format_contract_with_products(contract))
+        >>> if not stream.result.get("success"):
+        ...     await msg.answer(format_error_message(stream.result))
+
+    Returns:
+        ContractStream - async iterator (Contract), oxirida stream.result
+    """
+    return ContractStream(
+        endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_history_by_telegram_id",
+        params={"telegram_id": str(telegram_id)},
+    )
+
+
+async def erp_get_my_contracts_by_telegram_id(telegram_id: int, allow_stale: bool = False) -> Dict[str, Any]:
     """
     Telegram ID orqali customerning barcha shartnomalarini olish.
 
@@ -668,11 +1662,12 @@ async def erp_get_my_contracts_by_telegram_id(telegram_id: int) -> Dict[str, Any
             "total_contracts": 1
         }
     """
-    return await erp_request(
-        method="GET",
+    result = await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_my_contracts_by_telegram_id",
-        params={"telegram_id": str(telegram_id)}
+        params={"telegram_id": str(telegram_id)},
+        allow_stale=allow_stale,
     )
+    return _with_models(result, "contracts")
 
 
 async def erp_get_upcoming_payments(customer_id: str) -> Dict[str, Any]:
@@ -699,15 +1694,16 @@ async def erp_get_upcoming_payments(customer_id: str) -> Dict[str, Any]:
             ]
         }
     """
-    return await erp_request(
-        method="GET",
+    return await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_upcoming_payments",
         params={"customer_name": customer_id}
     )
 
 
 async def erp_get_customers_needing_reminders(
-    reminder_days: Optional[int] = None
+    reminder_days: Optional[int] = None,
+    limit_start: Optional[int] = None,
+    limit_page_length: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     Eslatma yuborish kerak bo'lgan customerlarni topish.
@@ -726,6 +1722,10 @@ async def erp_get_customers_needing_reminders(
 
     Args:
         reminder_days: Necha kun oldin/keyin (None = barchasi)
+        limit_start: Sahifa boshi (Frappe limit_start) - None = butun ro'yxat
+        limit_page_length: Sahifa uzunligi (Frappe limit_page_length)
+
+    Katta ro'yxat uchun - ReminderPages (sahifalab, birma-bir).
 
     Returns:
         {
@@ -748,6 +1748,9 @@ async def erp_get_customers_needing_reminders(
     params = {}
     if reminder_days is not None:
         params["reminder_days"] = reminder_days
+    if limit_page_length is not None:
+        params["limit_start"] = limit_start or 0
+        params["limit_page_length"] = limit_page_length
 
     return await erp_request(
         method="GET",
@@ -756,6 +1759,87 @@ async def erp_get_customers_needing_reminders(
     )
 
 
+class ReminderPages:
+    """
+    get_customers_needing_reminders ro'yxati sahifalab (limit_start / limit_page_length).
+
+    Butun ro'yxat bitta javobda kelsa - portfel o'sgani sari javob og'irlashadi,
+    read_timeout'ga yaqinlashadi va yuborish u to'liq kelguncha boshlanmaydi.
+    Sahifalar birma-bir so'raladi: iste'molchi (broadcast) birinchi sahifa
+    kelishi bilan ishlay boshlaydi, xotirada bir vaqtda bitta sahifa turadi.
+
+    - cursor - keyingi sahifa boshi (shu paytgacha olingan yozuvlar soni);
+      to'xtagan joydan davom ettirish uchun start sifatida beriladi
+    - Oxirgi sahifa: bo'sh sahifa (has_more nima bo'lishidan qat'i nazar),
+      javobda has_more=False yoki page_size'dan qisqa sahifa
+    - max_pages - xavfsizlik chegarasi: undan ko'p sahifa bo'lsa to'xtatiladi
+      (result - xato, cursor - to'xtagan joy)
+    - ERPNext pagination'ni qo'llamasa (page_size'dan uzun javob yoki bir xil
+      sahifa qaytsa) - ro'yxat bitta sahifa deb olinadi
+
+    result (iteratsiya tugagach):
+        {"success": True, "total": ...} yoki erp_request xato javobi - bu holda
+        oldin berilgan sahifalar haqiqiy, cursor - to'xtagan joy.
+
+    ⚠️ limit_start - offset: sahifalar orasida ro'yxat o'zgarsa (to'lov
+    qilindi) yozuv siljishi mumkin; takroriy yuborishni delivery ledger to'xtatadi.
+    """
+
+    def __init__(
+        self,
+        page_size: int = 500,
+        start: int = 0,
+        reminder_days: Optional[int] = None,
+        max_pages: int = 1000,
+    ):
+        self.page_size = max(1, page_size)
+        self.max_pages = max(1, max_pages)
+        self.cursor = start
+        self.reminder_days = reminder_days
+        self.pages = 0
+        self.result: Dict[str, Any] = {"success": False, "message": "Sahifalar hali o'qilmagan"}
+
+    def __aiter__(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        first_row = None
+        while True:
+            if self.pages >= self.max_pages:
+                logger.error(f"❌ Reminders pages limit reached ({self.max_pages}) at {self.cursor}")
+                self.result = {"success": False, "message": f"Sahifalar soni {self.max_pages} dan oshdi"}
+                return
+
+            response = await erp_get_customers_needing_reminders(
+                self.reminder_days, limit_start=self.cursor, limit_page_length=self.page_size,
+            )
+            if not response or not response.get("success"):
+                logger.warning(f"⚠️ Reminders page failed at {self.cursor}: {response.get('message') if response else None}")
+                self.result = response or {"success": False, "message": "Bo'sh javob"}
+                return
+
+            page = response.get("reminders") or []
+            unpaginated = len(page) > self.page_size or (self.pages and page and page[0] == first_row)
+            if unpaginated and self.pages:
+                # Server limit_start'ni e'tiborsiz qoldirdi - birinchi sahifa butun ro'yxat edi
+                break
+            if not page:
+                # Bo'sh sahifa - ro'yxat tugadi (has_more=True bo'lsa ham: cursor
+                # siljimaydi, aks holda bir xil sahifa cheksiz so'ralardi)
+                break
+
+            first_row = first_row or page[0]
+            self.pages += 1
+            self.cursor += len(page)
+            logger.debug(f"ERP Reminders page {self.pages}: {len(page)} items (cursor {self.cursor})")
+            yield page
+
+            if unpaginated or not response.get("has_more", len(page) == self.page_size):
+                break
+
+        self.result = {"success": True, "total": self.cursor, "pages": self.pages}
+
+
 async def erp_get_today_reminders() -> Dict[str, Any]:
     """
     Bugun eslatma yuborish kerak bo'lgan customerlar.
@@ -798,6 +1882,27 @@ async def erp_get_overdue_customers() -> Dict[str, Any]:
 # 🛠️ UTILITY FUNCTIONS
 # ============================================================================
 
+async def warm_up_http_client() -> int:
+    """
+    ERPNext ulanishlarini oldindan ochish (startup'da chaqiriladi).
+
+    Birinchi foydalanuvchi so'rovi TCP/TLS handshake'ni kutmaydi.
+    ERPNext javob bermasa ham bot ishga tushaveradi.
+
+    Returns:
+        int: Muvaffaqiyatli ochilgan ulanishlar (ping'lar) soni
+    """
+    try:
+        return await warm_up(
+            http_client,
+            connections=config.erp.warmup_connections,
+            http2=config.erp.http2 and HTTP2_AVAILABLE,
+        )
+    except Exception as e:
+        logger.warning(f"ERP warm-up failed: {e}")
+        return 0
+
+
 async def close_http_client():
     """
     HTTP client'ni yopish (cleanup).
@@ -861,7 +1966,6 @@ async def erp_get_support_contacts() -> Dict[str, Any]:
         >>>     phone = data["contact"]["phone"]
         >>>     print(f"Support: {phone}")
     """
-    return await erp_request(
-        method="GET",
+    return await _erp_cached_get(
         endpoint="/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_support_contacts"
     )
@@ -0,0 +1,110 @@
+"""
+HTTP Transport - ERPNext uchun httpx client yaratish va "isitish" (warm-up)
+
+HTTP/1.1 da har bir parallel so'rov alohida TCP/TLS ulanish talab qiladi:
+fan-out (har bir shartnoma uchun jadval) yoki broadcast paytida ERPNext
+host'iga o'nlab ulanish ochiladi. HTTP/2 da barcha so'rovlar bitta
+ulanish ichida multiplex qilinadi.
+
+HTTP/2 ixtiyoriy:
+-----------------
+- ERP_HTTP2=true bo'lsa va `h2` paketi o'rnatilgan bo'lsa - HTTP/2 (TLS ALPN)
+- `h2` yo'q bo'lsa - ogohlantirish va HTTP/1.1 pool (bot to'xtamaydi)
+- Server HTTP/2 ni qo'llamasa - httpx o'zi HTTP/1.1 ga qaytadi
+
+Bu modul config'ga bog'liq emas - benchmarks/ dan ham ishlatiladi.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+from loguru import logger
+
+try:
+    import h2  # noqa: F401 - faqat mavjudligini tekshirish
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Frappe'ning autentifikatsiyasiz, eng yengil endpoint'i
+PING_PATH = "/api/method/ping"
+
+
+def build_http_client(
+    base_url: str,
+    headers: Optional[Dict[str, str]] = None,
+    http2: bool = False,
+    prior_knowledge: bool = False,
+    timeout: float = 30.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+) -> httpx.AsyncClient:
+    """
+    ERPNext uchun httpx.AsyncClient.
+
+    Args:
+        base_url: ERPNext URL
+        headers: Default header'lar (Authorization va h.k.)
+        http2: HTTP/2 ni yoqish (h2 o'rnatilgan bo'lsa)
+        prior_knowledge: TLS'siz HTTP/2 (h2c) - faqat local stub/benchmark uchun
+        timeout: Default timeout (endpoint policy'lar har so'rovda override qiladi)
+        max_connections: Pool'dagi maksimal ulanishlar
+        max_keepalive_connections: Ochiq saqlanadigan ulanishlar
+
+    Returns:
+        httpx.AsyncClient
+    """
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warning("ERP_HTTP2=true, lekin 'h2' o'rnatilmagan - HTTP/1.1 ishlatiladi (pip install h2)")
+        http2 = False
+
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=True,
+        http1=not (http2 and prior_knowledge),
+        http2=http2,
+        limits=httpx.Limits(
+            max_keepalive_connections=max_keepalive_connections,
+            max_connections=max_connections,
+        ),
+    )
+
+
+async def warm_up(
+    client: httpx.AsyncClient,
+    connections: int = 4,
+    http2: bool = False,
+    path: str = PING_PATH,
+) -> int:
+    """
+    Ulanishlarni oldindan ochish - birinchi foydalanuvchi DNS + TCP + TLS
+    handshake'ni kutmasligi uchun.
+
+    HTTP/1.1: `connections` ta parallel ping - pool'da shuncha keep-alive ulanish
+    HTTP/2: bitta ping yetarli - barcha so'rovlar shu ulanishdan o'tadi
+
+    Returns:
+        int: Muvaffaqiyatli ping'lar soni
+    """
+    count = 1 if http2 and HTTP2_AVAILABLE else max(1, connections)
+
+    results = await asyncio.gather(
+        *(client.get(path, timeout=10.0) for _ in range(count)),
+        return_exceptions=True,
+    )
+
+    ok = 0
+    version = None
+    for result in results:
+        if isinstance(result, httpx.Response) and result.status_code < 500:
+            ok += 1
+            version = result.http_version
+        elif isinstance(result, Exception):
+            logger.warning(f"ERP warm-up ping failed: {result}")
+
+    logger.info(f"ERP connections warmed up: {ok}/{count} ({version or 'no response'})")
+    return ok
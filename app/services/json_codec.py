@@ -0,0 +1,72 @@
+"""
+JSON Codec - tez JSON decode/encode (ixtiyoriy backend bilan)
+
+ERPNext javoblari (get_customer_contracts_detailed,
+get_payment_history_by_telegram_id) mahsulotlar va to'lovlar bilan katta
+bo'ladi. Stdlib json avval bytes → str decode qiladi, keyin parse qiladi;
+orjson / msgspec to'g'ridan-to'g'ri bytes'dan, C'da parse qiladi.
+
+Backend tanlash (birinchi topilgani):
+-------------------------------------
+1. orjson
+2. msgspec
+3. json (stdlib) - har doim mavjud
+
+ERP_JSON_BACKEND=json - majburan stdlib (debug uchun).
+
+⚠️ Farqlar: orjson/msgspec NaN/Infinity'ni qabul qilmaydi - ERPNext
+(frappe.as_json) ularni yubormaydi.
+"""
+
+import json
+import os
+from typing import Any, Callable, Union
+
+JsonInput = Union[bytes, bytearray, memoryview, str]
+
+
+def _stdlib_loads(data: JsonInput) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _select_backend():
+    preferred = os.getenv("ERP_JSON_BACKEND", "").strip().lower()
+
+    if preferred in ("", "orjson"):
+        try:
+            import orjson
+
+            def orjson_dumps(obj: Any) -> str:
+                return orjson.dumps(obj).decode()
+
+            return "orjson", orjson.loads, orjson_dumps
+        except ImportError:
+            pass
+
+    if preferred in ("", "orjson", "msgspec"):
+        try:
+            import msgspec
+
+            decoder = msgspec.json.Decoder()
+            encoder = msgspec.json.Encoder()
+
+            def msgspec_dumps(obj: Any) -> str:
+                return encoder.encode(obj).decode()
+
+            return "msgspec", decoder.decode, msgspec_dumps
+        except ImportError:
+            pass
+
+    return "json", _stdlib_loads, _stdlib_dumps
+
+
+BACKEND: str
+loads: Callable[[JsonInput], Any]
+dumps: Callable[[Any], str]
+BACKEND, loads, dumps = _select_backend()
@@ -0,0 +1,158 @@
+"""
+JSON Stream - katta javoblardagi massivni bo'laklab (incremental) o'qish
+
+get_payment_history_by_telegram_id kabi javoblarda asosiy hajm bitta
+massivda ("contracts"). JSONArrayStream HTTP javob bo'laklarini (chunk)
+qabul qiladi va massivning har bir elementi (obyekt) to'liq kelishi bilan
+uni decode qilib qaytaradi - butun javob xotiraga yig'ilmaydi.
+
+Xotirada faqat:
+- hozir o'qilayotgan bitta element
+- "konvert" - massivdan tashqaridagi maydonlar (success, customer_name, ...)
+
+Example:
+    >>> stream = JSONArrayStream("contracts")
+    >>> async for chunk in response.aiter_bytes():
+    ...     for contract in stream.feed(chunk):
+    ...         ...
+    >>> envelope = stream.close()   # {"success": True, "contracts": [], ...}
+
+Cheklovlar:
+-----------
+- Kalit bo'yicha birinchi topilgan massiv olinadi (ichma-ich elementlar
+  ichidagi bir xil nomli kalitlar hisobga olinmaydi)
+- Massivdagi obyekt bo'lmagan elementlar (son, satr) tashlab yuboriladi
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from app.services import json_codec
+
+# Bitta qadam: satrlar va oddiy qiymatlar (C'da) o'tkazib yuboriladi, keyingi
+# tuzilma belgisi ({ } [ ]) olinadi. Bo'lak oxirida uzilgan satr - "open"
+# (esc - oxirgi belgi "\\"), hech narsa qolmasa - bo'sh moslik.
+_STRING_BODY = rb'[^"\\]*(?:\\.[^"\\]*)*'
+_SKIP = rb'[^"{}\[\]]*(?:"' + _STRING_BODY + rb'"[^"{}\[\]]*)*'
+_TOKEN = re.compile(
+    _SKIP + rb'(?:(?P<struct>[{}\[\]])|(?P<open>")' + _STRING_BODY + rb'(?P<esc>\\)?\Z|\Z)',
+    re.S,
+)
+_STRING_REST = re.compile(_STRING_BODY + rb'(?:(?P<closed>")|(?P<esc>\\)?\Z)', re.S)
+
+_OPEN_OBJECT, _CLOSE_OBJECT = 0x7B, 0x7D
+_OPEN_ARRAY = 0x5B
+
+
+class JSONArrayStream:
+    """
+    Bitta kalitdagi massiv elementlarini chunk'lardan ajratib oluvchi parser.
+
+    Args:
+        key: Massiv kaliti (masalan, "contracts")
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._key_pattern = re.compile(rb'"' + re.escape(key.encode()) + rb'"\s*:\s*$')
+        self._key_tail = len(key.encode()) + 64
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None   # massiv ichidagi chuqurlik
+        self._array_closed = False
+        self._item: Optional[bytearray] = None    # o'qilayotgan element
+        self._envelope = bytearray()
+
+        self.items = 0
+        self.bytes = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Yangi bo'lak - shu bo'lakda tugagan elementlar (decode qilingan)."""
+        self.bytes += len(chunk)
+        completed: List[Any] = []
+        copied = 0   # chunk'ning shu indeksigacha bo'lgan qismi joylashtirilgan
+        pos = 0
+        end = len(chunk)
+
+        if self._in_string:
+            # Oldingi bo'lakda boshlangan satr davomi
+            if self._escape:
+                self._escape = False
+                pos = 1
+            match = _STRING_REST.match(chunk, pos)
+            if match.group("closed") is None:
+                self._escape = match.group("esc") is not None
+                pos = end
+            else:
+                self._in_string = False
+                pos = match.end()
+
+        while pos < end:
+            match = _TOKEN.match(chunk, pos)
+            if match.group("struct") is None:
+                if match.group("open") is not None:
+                    # Satr keyingi bo'lakda davom etadi
+                    self._in_string = True
+                    self._escape = match.group("esc") is not None
+                break
+
+            pos = match.end() - 1
+            char = chunk[pos]
+
+            if char in (_OPEN_OBJECT, _OPEN_ARRAY):
+                if self._item is None and self._depth == self._array_depth:
+                    if char == _OPEN_OBJECT:
+                        # Yangi element boshlandi (oldidagi vergul/bo'shliq tashlanadi)
+                        self._item = bytearray()
+                        copied = pos
+                elif (
+                    char == _OPEN_ARRAY
+                    and self._item is None
+                    and self._array_depth is None
+                    and not self._array_closed
+                ):
+                    self._envelope += chunk[copied:pos]
+                    copied = pos
+                    if self._key_pattern.search(self._envelope[-self._key_tail:]):
+                        self._envelope += b"["
+                        copied = pos + 1
+                        self._array_depth = self._depth + 1
+                self._depth += 1
+
+            else:
+                self._depth -= 1
+                if self._item is not None:
+                    if char == _CLOSE_OBJECT and self._depth == self._array_depth:
+                        self._item += chunk[copied:pos + 1]
+                        copied = pos + 1
+                        completed.append(json_codec.loads(bytes(self._item)))
+                        self._item = None
+                        self.items += 1
+                elif self._array_depth is not None and self._depth == self._array_depth - 1:
+                    # Massiv yopildi - "]" dan boshlab yana konvertga
+                    copied = pos
+                    self._array_depth = None
+                    self._array_closed = True
+
+            pos += 1
+
+        tail = chunk[copied:]
+        if self._item is not None:
+            self._item += tail
+        elif self._array_depth is None:
+            self._envelope += tail
+
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Oqim tugadi - konvertni qaytarish (massiv o'rnida []).
+
+        Raises:
+            ValueError: JSON to'liq kelmagan (uzilgan javob)
+        """
+        if self._depth != 0 or self._in_string or self._item is not None:
+            raise ValueError(f"Incomplete JSON stream ({self.bytes} bytes, {self.items} items)")
+        return json_codec.loads(bytes(self._envelope))
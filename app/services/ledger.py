@@ -0,0 +1,232 @@
+"""
+Delivery Ledger - yuborilgan eslatmalar daftari (Redis, TTL bilan)
+
+app/services/reminders.py (har kuni 09:00) va
+app/services/notification.py::notification_worker (har soatda) bir xil
+mijozga bir xil to'lov sanasi haqida yozishi mumkin edi; qayta ishga
+tushirish ham yuborilganlarni takrorlardi - nima yuborilgani hech qayerda
+yozilmasdi.
+
+Kalit: (chat_id, contract_id, due_date, reminder_type)
+-----------------------------------------------------
+- due_date ISO (YYYY-MM-DD) ga keltiriladi - ERPNext endpoint'lari turli
+  formatda qaytaradi (20.03.2025 / 2025-03-20)
+- Har bir kalit - alohida Redis string (SET ... EX): TTL har bir yozuvga
+  alohida, shuning uchun set (SMISMEMBER) emas, MGET bilan tekshiriladi
+
+Qo'llanishi:
+------------
+1. unsent() - yuborishdan oldin: manba bo'laklab (batch) pipelined MGET bilan
+   tekshiriladi, yuborilganlar tashlab yuboriladi (on_duplicate - masalan,
+   outbox'da ack). Faqat "yuborildi" belgisi hisobga olinadi: "band"
+   (yuborilayotgan) eslatma o'tkaziladi - uni send_once() hal qiladi
+2. send_once() - yuborish paytida: SET NX bilan "band" qilinadi (claim_ttl),
+   muvaffaqiyatli bo'lsa "yuborildi" (ttl), xato bo'lsa o'chiriladi -
+   bir vaqtda ishlagan ikki worker'dan faqat bittasi yuboradi. Boshqa worker
+   band qilgan (hali yubormagan) eslatma - DEFERRED: outbox'da ack qilinmaydi,
+   keyingi ishga tushirishda qayta tekshiriladi
+
+Redis ishlamasa - daftar "bo'sh" deb hisoblanadi: eslatma takrorlanishi
+mumkin, lekin yo'qolmaydi.
+
+Example:
+    >>> key = ledger_key(chat_id, "CON-001", "20.03.2025", "3_days_before")
+    >>> async for item in delivery_ledger.unsent(items, key_of=...):
+    ...     await delivery_ledger.send_once(key, lambda: send(item))
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, TypeVar, Union
+
+from loguru import logger
+
+from app.config import config
+from app.services.broadcast import DEFERRED, DUPLICATE
+
+T = TypeVar("T")
+
+# Yozuv qiymatlari
+_CLAIMED = "1"
+_SENT = "2"
+
+# Bir xil eslatma turlarining boshqa nomlari (ERPNext / notification_worker)
+_TYPE_ALIASES = {"payment_day": "today"}
+
+
+def _iso_date(value: Any) -> str:
+    """20.03.2025 / 2025-03-20 → 2025-03-20 (tanilmasa - o'zgarishsiz)."""
+    text = str(value or "").strip()
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return text
+
+
+def ledger_key(chat_id: Any, contract_id: Any, due_date: Any, reminder_type: str) -> str:
+    """Daftar kaliti (prefikssiz)."""
+    reminder_type = _TYPE_ALIASES.get(reminder_type, reminder_type)
+    return f"{chat_id}:{contract_id}:{_iso_date(due_date)}:{reminder_type}"
+
+
+class DeliveryLedger:
+    """
+    ledger_key → yuborilgan / yuborilmoqda belgisi (Redis string, TTL bilan).
+
+    Redis instance app/loader.py dan lazy import qilinadi (ResponseCache kabi).
+    """
+
+    def __init__(
+        self,
+        ttl: int = 604800,
+        claim_ttl: int = 120,
+        enabled: bool = True,
+        prefix: str = "ledger:reminder",
+        redis=None,
+    ):
+        self.ttl = ttl
+        self.claim_ttl = claim_ttl
+        self.enabled = enabled
+        self.prefix = prefix
+        self._redis = redis
+        self.stats = {"checked": 0, "duplicates": 0, "deferred": 0, "claimed": 0, "sent": 0, "errors": 0}
+
+    def _get_redis(self):
+        if not self.enabled:
+            return None
+        if self._redis is None:
+            try:
+                from app.loader import redis
+                self._redis = redis
+            except Exception as e:
+                logger.warning(f"Delivery ledger: Redis unavailable ({e})")
+                return None
+        return self._redis
+
+    def _rkey(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def seen(self, keys: List[str]) -> List[bool]:
+        """Har bir kalit yuborilganmi (bitta MGET; "band" belgisi - yo'q)."""
+        redis = self._get_redis()
+        if redis is None or not keys:
+            return [False] * len(keys)
+
+        self.stats["checked"] += len(keys)
+        try:
+            values = await redis.mget([self._rkey(key) for key in keys])
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Delivery ledger check error: {e}")
+            return [False] * len(keys)
+        return [value == _SENT for value in values]
+
+    async def unsent(
+        self,
+        items: Union[Iterable[T], AsyncIterable[T]],
+        key_of: Callable[[T], Optional[str]],
+        batch: int = 100,
+        on_duplicate: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> AsyncIterator[T]:
+        """
+        Manbadan faqat hali yuborilmaganlarini berish (batch bo'yicha tekshiriladi).
+
+        key_of None qaytarsa (kalit yasab bo'lmaydi) - element tekshiruvsiz beriladi.
+        """
+        chunk: List[T] = []
+
+        async def flush():
+            keys = [key_of(item) for item in chunk]
+            known = await self.seen([key for key in keys if key])
+            flags = iter(known)
+            for item, key in zip(chunk, keys):
+                if key and next(flags):
+                    self.stats["duplicates"] += 1
+                    if on_duplicate is not None:
+                        await on_duplicate(item)
+                else:
+                    yield item
+            chunk.clear()
+
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                chunk.append(item)
+                if len(chunk) >= batch:
+                    async for fresh in flush():
+                        yield fresh
+        else:
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= batch:
+                    async for fresh in flush():
+                        yield fresh
+
+        if chunk:
+            async for fresh in flush():
+                yield fresh
+
+    async def send_once(self, key: str, send: Callable[[], Awaitable[bool]]) -> Union[bool, str]:
+        """
+        Kalit bo'yicha faqat bir marta yuborish.
+
+        Returns:
+            send() natijasi, DUPLICATE (yuborilgan) yoki DEFERRED (boshqa worker
+            band qilgan - yuborilishi hali noma'lum)
+
+        Raises:
+            send() xatosi - belgi olib tashlanadi, qayta urinish mumkin
+        """
+        redis = self._get_redis()
+        if redis is None:
+            return await send()
+
+        rkey = self._rkey(key)
+        try:
+            if not await redis.set(rkey, _CLAIMED, nx=True, ex=self.claim_ttl):
+                if await redis.get(rkey) == _SENT:
+                    self.stats["duplicates"] += 1
+                    return DUPLICATE
+                # Band, lekin yuborilmagan (yoki o'lgan jarayon qoldirgan) -
+                # yo'qotmaslik uchun keyinroq qayta tekshiriladi
+                self.stats["deferred"] += 1
+                return DEFERRED
+            self.stats["claimed"] += 1
+        except Exception as e:
+            # Redis ishlamayapti - takrorlanish xavfi bilan yuboriladi (yo'qolgandan yaxshi)
+            self.stats["errors"] += 1
+            logger.warning(f"Delivery ledger claim error: {key} - {e}")
+            return await send()
+
+        try:
+            ok = await send()
+        except Exception:
+            await self._forget(rkey)
+            raise
+        # CancelledError (to'xtatish) - belgi qoladi: xabar ketgan bo'lishi mumkin,
+        # claim_ttl o'tgach bo'shaydi
+
+        if ok:
+            self.stats["sent"] += 1
+            try:
+                await redis.set(rkey, _SENT, ex=self.ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Delivery ledger mark error: {key} - {e}")
+        else:
+            await self._forget(rkey)
+        return ok
+
+    async def _forget(self, rkey: str):
+        try:
+            await self._redis.delete(rkey)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Delivery ledger release error: {rkey} - {e}")
+
+
+delivery_ledger = DeliveryLedger(
+    ttl=config.ledger.ttl,
+    claim_ttl=config.ledger.claim_ttl,
+    enabled=config.ledger.enabled,
+)
@@ -0,0 +1,184 @@
+"""
+Adaptive Concurrency Limiter - ERPNext'ga bir vaqtdagi so'rovlar chegarasi
+
+httpx pool 100 tagacha ulanishga ruxsat beradi, lekin Frappe gunicorn
+worker'lari buncha parallel so'rovni ko'tara olmaydi. Bu modul butun bot
+bo'yicha ERPNext'ga ketayotgan so'rovlar sonini cheklaydi.
+
+Algoritm (AIMD):
+----------------
+- Additive Increase: javob tez kelsa (latency <= target) - limit sekin oshadi
+  (har bir "oyna" uchun taxminan +1)
+- Multiplicative Decrease: 5xx / 429 / timeout yoki sekin javob bo'lsa -
+  limit * backoff (masalan 0.7), lekin har latency_target oralig'ida 1 martadan ko'p emas
+
+Priority Lanes:
+---------------
+- INTERACTIVE (0) - handler'lar (menyu tugmalari) - birinchi navbatda
+- BACKGROUND (1) - eslatmalar, notification worker - bo'sh joy bo'lsa
+
+Priority contextvar orqali uzatiladi:
+
+    with background_priority():
+        await erp_get_customers_needing_reminders()
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+# ============================================================================
+# PRIORITY LANES
+# ============================================================================
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar("erp_request_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    """Joriy task'ning ERPNext so'rov prioriteti."""
+    return _priority.get()
+
+
+@contextmanager
+def background_priority():
+    """
+    Blok ichidagi barcha ERPNext so'rovlarini BACKGROUND lane'ga o'tkazish.
+
+    asyncio task'lar contextvar'ni meros oladi - blok ichida yaratilgan
+    task'lar ham background bo'ladi.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# ============================================================================
+# ADAPTIVE LIMITER
+# ============================================================================
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter (priority navbati bilan).
+
+    Ishlatish:
+        await limiter.acquire()
+        try:
+            ...
+        finally:
+            limiter.release(latency, overloaded)
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 2,
+        max_limit: int = 40,
+        latency_target: float = 2.0,
+        backoff: float = 0.7,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+
+        self.stats: Dict[str, int] = {"acquired": 0, "queued": 0, "increases": 0, "decreases": 0}
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self, priority: Optional[int] = None):
+        """
+        Slot olish. Bo'sh slot bo'lmasa - priority bo'yicha navbatda kutish.
+
+        Args:
+            priority: INTERACTIVE / BACKGROUND (None - contextvar'dan)
+        """
+        if priority is None:
+            priority = current_priority()
+
+        self.stats["acquired"] += 1
+
+        # Navbat bo'sh va joy bor - darhol
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            return
+
+        self.stats["queued"] += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot berilgan edi, lekin chaqiruvchi bekor qilindi - qaytaramiz
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    def release(self, latency: float, overloaded: bool = False):
+        """
+        Slot'ni qaytarish va limit'ni yangilash.
+
+        Args:
+            latency: So'rov davomiyligi (sekund)
+            overloaded: 5xx / 429 / timeout - ERPNext yuklangan
+        """
+        # Limit faqat to'liq ishlatilganda oshiriladi (kam trafikda "shishib" ketmasligi uchun)
+        saturated = self.in_flight >= int(self.limit) or bool(self._waiters)
+        self.in_flight -= 1
+
+        now = time.monotonic()
+        if overloaded or latency > self.latency_target:
+            # Bitta yuklanish "to'lqini" limit'ni bir necha marta kesmasligi uchun
+            if now - self._last_decrease >= self.latency_target:
+                old = self.limit
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.stats["decreases"] += 1
+                logger.warning(
+                    f"ERP limiter: {old:.1f} → {self.limit:.1f} "
+                    f"(latency={latency:.2f}s, overloaded={overloaded})"
+                )
+        elif saturated and self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self.stats["increases"] += 1
+
+        self._wake()
+
+    def _wake(self):
+        """Bo'sh slot'larni navbatdagilarga (priority tartibida) berish."""
+        while self._waiters and self._has_capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Monitoring uchun joriy holat."""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            **self.stats,
+        }
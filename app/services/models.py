@@ -0,0 +1,237 @@
+"""
+ERPNext Response Models - typed, slotted dataclass'lar
+
+ERPNext javoblari (dict) erpnext_api.py da bir marta shu modellarga
+o'giriladi; handler va formatter'lar `.get(...)` zanjirlari va qayta-qayta
+`float(x or 0)` o'rniga tayyor, normallashtirilgan atributlarni ishlatadi.
+
+Normalizatsiya:
+---------------
+- Summalar (total_amount, paid, amount, ...) - doim float (None / "" → 0.0)
+- Matnlar - doim str (None → "")
+- Ro'yxatlar - doim list (None → [])
+- Noto'g'ri (dict bo'lmagan) elementlar tashlab yuboriladi
+
+slots=True - har bir obyekt uchun __dict__ yo'q: katta shartnoma
+ro'yxatlarida xotira sezilarli kamayadi.
+
+⚠️ Cache'da (app/services/cache.py) xom JSON dict'lar saqlanadi - modellar
+faqat erp_get_* qaytargan javob nusxasida bo'ladi.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# ============================================================================
+# NORMALIZATION HELPERS
+# ============================================================================
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _str(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _dicts(items: Any) -> Iterable[Dict[str, Any]]:
+    return (item for item in (items or []) if isinstance(item, dict))
+
+
+# ============================================================================
+# MODELS
+# ============================================================================
+
+@dataclass(slots=True)
+class Customer:
+    customer_id: str = ""
+    customer_name: str = ""
+    phone: str = ""
+    passport: str = ""
+    classification: str = ""
+    telegram_id: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Customer":
+        return cls(
+            customer_id=_str(data.get("customer_id")),
+            customer_name=_str(data.get("customer_name")),
+            phone=_str(data.get("phone")),
+            passport=_str(data.get("passport")),
+            classification=_str(data.get("classification")),
+            telegram_id=_str(data.get("telegram_id")),
+        )
+
+
+@dataclass(slots=True)
+class Product:
+    name: str = ""
+    qty: float = 0.0
+    price: float = 0.0
+    total_price: float = 0.0
+    imei: str = ""
+    notes: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Product":
+        return cls(
+            name=_str(data.get("name")),
+            qty=_float(data.get("qty")),
+            price=_float(data.get("price")),
+            total_price=_float(data.get("total_price")),
+            imei=_str(data.get("imei")),
+            notes=_str(data.get("notes")),
+        )
+
+
+@dataclass(slots=True)
+class Payment:
+    """
+    Payment Entry.
+
+    amount - ishorali (Pay - manfiy), display_amount - ko'rsatish uchun musbat.
+    """
+    payment_id: str = ""
+    date: str = ""
+    amount: float = 0.0
+    display_amount: float = 0.0
+    method: str = ""
+    payment_type: str = "Receive"
+    remarks: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Payment":
+        amount = _float(data.get("amount"))
+        return cls(
+            payment_id=_str(data.get("payment_id")),
+            date=_str(data.get("date")),
+            amount=amount,
+            display_amount=_float(data.get("display_amount")) or abs(amount),
+            method=_str(data.get("method")),
+            payment_type=_str(data.get("payment_type")) or "Receive",
+            remarks=_str(data.get("remarks")),
+        )
+
+    @property
+    def is_refund(self) -> bool:
+        """Pay - mijozga pul qaytarilgan."""
+        return self.payment_type == "Pay"
+
+
+@dataclass(slots=True)
+class ScheduleRow:
+    month: int = 0
+    due_date: str = ""
+    amount: float = 0.0
+    paid: float = 0.0
+    outstanding: float = 0.0
+    status: str = "pending"
+    status_uz: str = ""
+    days_left: Optional[int] = None
+    is_overdue: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScheduleRow":
+        return cls(
+            month=_int(data.get("month")) or 0,
+            due_date=_str(data.get("due_date")),
+            amount=_float(data.get("amount")),
+            paid=_float(data.get("paid")),
+            outstanding=_float(data.get("outstanding")),
+            status=_str(data.get("status")) or "pending",
+            status_uz=_str(data.get("status_uz")),
+            days_left=_int(data.get("days_left")),
+            is_overdue=bool(data.get("is_overdue")),
+        )
+
+
+@dataclass(slots=True)
+class NextPayment:
+    due_date: str = ""
+    amount: float = 0.0
+    days_left: Optional[int] = None
+    status: str = ""
+    status_uz: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NextPayment":
+        return cls(
+            due_date=_str(data.get("due_date")),
+            amount=_float(data.get("amount")),
+            days_left=_int(data.get("days_left")),
+            status=_str(data.get("status")),
+            status_uz=_str(data.get("status_uz") or data.get("status_text")),
+        )
+
+
+@dataclass(slots=True)
+class Contract:
+    contract_id: str = ""
+    contract_date: str = ""
+    total_amount: float = 0.0
+    downpayment: float = 0.0
+    paid: float = 0.0
+    remaining: float = 0.0
+    status: str = ""
+    status_uz: str = ""
+    products: List[Product] = field(default_factory=list)
+    payments: List[Payment] = field(default_factory=list)
+    next_payment: Optional[NextPayment] = None
+    total_payments: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Contract":
+        # get_my_contracts: "payments_history", get_payment_history_by_telegram_id: "payments"
+        payments = parse_payments(data.get("payments_history") or data.get("payments"))
+        next_payment = data.get("next_payment")
+
+        return cls(
+            contract_id=_str(data.get("contract_id")),
+            contract_date=_str(data.get("contract_date")),
+            total_amount=_float(data.get("total_amount")),
+            downpayment=_float(data.get("downpayment")),
+            paid=_float(data.get("paid")),
+            remaining=_float(data.get("remaining")),
+            status=_str(data.get("status")),
+            status_uz=_str(data.get("status_uz")),
+            products=parse_products(data.get("products")),
+            payments=payments,
+            next_payment=NextPayment.from_dict(next_payment) if isinstance(next_payment, dict) else None,
+            total_payments=_int(data.get("total_payments")) or len(payments),
+        )
+
+    @property
+    def is_completed(self) -> bool:
+        """Barcha to'lovlar amalga oshirilgan."""
+        return self.remaining <= 0 and self.paid >= self.total_amount
+
+
+# ============================================================================
+# LIST PARSERS
+# ============================================================================
+
+def parse_products(items: Any) -> List[Product]:
+    return [Product.from_dict(item) for item in _dicts(items)]
+
+
+def parse_payments(items: Any) -> List[Payment]:
+    return [Payment.from_dict(item) for item in _dicts(items)]
+
+
+def parse_schedule(items: Any) -> List[ScheduleRow]:
+    return [ScheduleRow.from_dict(item) for item in _dicts(items)]
+
+
+def parse_contracts(items: Any) -> List[Contract]:
+    return [Contract.from_dict(item) for item in _dicts(items)]
@@ -1,9 +1,16 @@
 import asyncio
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
 
 from loguru import logger
 from app.loader import bot
-from app.services.erpnext_api import http_client
+from app.services.broadcast import Broadcaster
+from app.services.erpnext_api import erp_request
+from app.services.ledger import delivery_ledger, ledger_key
+from app.services.limiter import background_priority
+
+# (ledger kaliti, chat_id, matn)
+DueMessage = Tuple[str, Any, str]
 
 API_METHOD = "/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_all_active_due_payments"
 
@@ -14,18 +21,20 @@ async def fetch_due_payments():
     """
     try:
         # GET so'rov yuboramiz (parametrlar shart emas, server o'zi hisoblaydi)
-        response = await http_client.get(API_METHOD)
-
-        # Statusni tekshiramiz
-        response.raise_for_status()
+        # erp_request orqali - umumiy concurrency limiter'dan background lane'da o'tadi
+        with background_priority():
+            result = await erp_request(method="GET", endpoint=API_METHOD)
 
-        # Server {"data": [...]} ko'rinishida qaytaradi
-        result = response.json()
+        # erp_request xatolarni {"success": False, ...} sifatida qaytaradi
+        if result.get("success") is False:
+            logger.error(f"❌ fetch_due_payments error: {result.get('message')}")
+            return []
 
         # Agar result ichida 'message' bo'lsa (Frappe ba'zan shunday qaytaradi)
-        if "message" in result:
+        if isinstance(result.get("message"), dict):
             return result["message"].get("data", [])
 
+        # Server {"data": [...]} ko'rinishida qaytaradi
         return result.get("data", [])
 
     except Exception as e:
@@ -33,9 +42,92 @@ async def fetch_due_payments():
         return []
 
 
+def _due_message(so: Dict[str, Any], today: date) -> Optional[DueMessage]:
+    """
+    Shartnoma (Sales Order) uchun bugungi xabar: (ledger kaliti, chat_id, matn).
+
+    None - bugun xabar kerak emas (yoki ma'lumot yetarli emas).
+    """
+    chat_id = so.get("custom_telegram_id")
+    next_date_str = so.get("next_payment_date")
+    amount = so.get("next_payment_amount", 0)
+    contract_name = so.get("name")
+
+    if not chat_id or not next_date_str:
+        return None
+
+    try:
+        next_date = datetime.strptime(next_date_str, "%Y-%m-%d").date()
+    except ValueError as e:
+        logger.error(f"⚠️ Bad next_payment_date for {chat_id}: {e}")
+        return None
+
+    # === 3 KUN OLDIN ===
+    if next_date == today + timedelta(days=3):
+        reminder_type = "3_days_before"
+        text = (
+            f"📅 <b>3 kundan keyin to'lov kuni!</b>\n\n"
+            f"📄 Shartnoma: <b>{contract_name}</b>\n"
+            f"💰 To'lov summasi: <b>${amount:,.2f}</b>\n"
+            f"🕒 Iltimos o'z vaqtida to'lang."
+        )
+
+    # === 1 KUN OLDIN ===
+    elif next_date == today + timedelta(days=1):
+        reminder_type = "1_day_before"
+        text = (
+            f"📅 <b>Ertaga to'lov kuni!</b>\n\n"
+            f"📄 Shartnoma: <b>{contract_name}</b>\n"
+            f"💰 Summa: <b>${amount:,.2f}</b>"
+        )
+
+    # === BUGUN ===
+    elif next_date == today:
+        reminder_type = "today"
+        text = (
+            f"🔴 <b>DIQQAT: Bugun to'lov kuni!</b>\n\n"
+            f"📄 Shartnoma: <b>{contract_name}</b>\n"
+            f"💰 Summa: <b>${amount:,.2f}</b>\n\n"
+            f"Iltimos to'lovni amalga oshiring."
+        )
+
+    # === 1 KUN O'TIB KETGAN ===
+    elif next_date == today - timedelta(days=1):
+        reminder_type = "1_day_overdue"
+        text = (
+            f"⚠️ <b>Kecha to'lov muddati o'tdi!</b>\n\n"
+            f"📄 Shartnoma: <b>{contract_name}</b>\n"
+            f"Iltimos zudlik bilan to'lang."
+        )
+
+    # === 3 KUN O'TIB KETGAN ===
+    elif next_date == today - timedelta(days=3):
+        reminder_type = "3_days_overdue"
+        text = (
+            f"❌ <b>To'lov muddati o'tib ketgan!</b>\n\n"
+            f"📄 Shartnoma: <b>{contract_name}</b>\n"
+            f"⚠️ Sizda qarzdorlik mavjud. Iltimos, to'lov qiling!"
+        )
+
+    else:
+        return None
+
+    # Kalit reminders.py bilan bir xil - bir eslatma ikki yo'ldan kelmaydi
+    return ledger_key(chat_id, contract_name, next_date, reminder_type), chat_id, text
+
+
+async def _send(message: DueMessage) -> bool:
+    _, chat_id, text = message
+    await bot.send_message(chat_id, text)
+    return True
+
+
 async def notification_worker():
     """
     Background worker: har 1 soatda ishlaydi.
+
+    Soatlik tekshiruvlar va kunlik eslatmalar (reminders.py) bir xil
+    eslatmani qayta yubormaydi - delivery ledger (app/services/ledger.py).
     """
     logger.info("🔔 Notification worker started...")
 
@@ -51,71 +143,28 @@ async def notification_worker():
                 logger.info("✅ No active due payments found or API empty.")
 
             today = datetime.today().date()
-
+            messages = []
             for so in orders:
+                # Bitta buzuq shartnoma (masalan, summa None) qolganlarini to'xtatmasin
                 try:
-                    chat_id = so.get("custom_telegram_id")
-                    next_date_str = so.get("next_payment_date")
-                    amount = so.get("next_payment_amount", 0)
-                    contract_name = so.get("name")
-
-                    if not chat_id or not next_date_str:
-                        continue
-
-                    next_date = datetime.strptime(next_date_str, "%Y-%m-%d").date()
-
-                    # === 3 KUN OLDIN ===
-                    if next_date == today + timedelta(days=3):
-                        await bot.send_message(
-                            chat_id,
-                            f"📅 <b>3 kundan keyin to'lov kuni!</b>\n\n"
-                            f"📄 Shartnoma: <b>{contract_name}</b>\n"
-                            f"💰 To'lov summasi: <b>${amount:,.2f}</b>\n"
-                            f"🕒 Iltimos o'z vaqtida to'lang."
-                        )
-
-                    # === 1 KUN OLDIN ===
-                    elif next_date == today + timedelta(days=1):
-                        await bot.send_message(
-                            chat_id,
-                            f"📅 <b>Ertaga to'lov kuni!</b>\n\n"
-                            f"📄 Shartnoma: <b>{contract_name}</b>\n"
-                            f"💰 Summa: <b>${amount:,.2f}</b>"
-                        )
-
-                    # === BUGUN ===
-                    elif next_date == today:
-                        await bot.send_message(
-                            chat_id,
-                            f"🔴 <b>DIQQAT: Bugun to'lov kuni!</b>\n\n"
-                            f"📄 Shartnoma: <b>{contract_name}</b>\n"
-                            f"💰 Summa: <b>${amount:,.2f}</b>\n\n"
-                            f"Iltimos to'lovni amalga oshiring."
-                        )
-
-                    # === 1 KUN O'TIB KETGAN ===
-                    elif next_date == today - timedelta(days=1):
-                        await bot.send_message(
-                            chat_id,
-                            f"⚠️ <b>Kecha to'lov muddati o'tdi!</b>\n\n"
-                            f"📄 Shartnoma: <b>{contract_name}</b>\n"
-                            f"Iltimos zudlik bilan to'lang."
-                        )
-
-                    # === 3 KUN O'TIB KETGAN ===
-                    elif next_date == today - timedelta(days=3):
-                        await bot.send_message(
-                            chat_id,
-                            f"❌ <b>To'lov muddati o'tib ketgan!</b>\n\n"
-                            f"📄 Shartnoma: <b>{contract_name}</b>\n"
-                            f"⚠️ Sizda qarzdorlik mavjud. Iltimos, to'lov qiling!"
-                        )
-
-                except Exception as send_err:
-                    logger.error(f"⚠️ Error sending message to {so.get('custom_telegram_id')}: {send_err}")
+                    message = _due_message(so, today)
+                except Exception as e:
+                    logger.error(f"⚠️ Error preparing message for {so.get('custom_telegram_id')}: {e}")
+                    continue
+                if message:
+                    messages.append(message)
+
+            if messages:
+                # Yuborilganlar bitta MGET bilan tashlab yuboriladi, qolganlari
+                # chat / umumiy limitlar ichida, har biri bir marta
+                await Broadcaster(name="notifications").run(
+                    delivery_ledger.unsent(messages, key_of=lambda message: message[0]),
+                    send=lambda message: delivery_ledger.send_once(message[0], lambda: _send(message)),
+                    chat_of=lambda message: message[1],
+                )
 
         except Exception as e:
             logger.error(f"❌ Notification worker error: {e}")
 
         # Har 1 soatda (3600 sekund) tekshiradi
-        await asyncio.sleep(3600)
\ No newline at end of file
+        await asyncio.sleep(3600)
@@ -0,0 +1,377 @@
+"""
+Outbox - broadcast xabarlari uchun Redis stream (ack bilan, davom ettiriladigan)
+
+Muammo: 09:00 dagi daily_reminders yarmida jarayon qayta ishga tushsa
+(deploy, crash) - qaysi mijozlarga yuborilgani yo'qoladi: qolganlari hech
+narsa olmaydi, qo'lda qayta ishga tushirish esa yuborilganlarga ikkinchi
+marta yuboradi.
+
+Tuzilishi (har bir job - masalan, "reminders" + sana):
+-------------------------------------------------------
+- outbox:{name}:{job} - Redis stream: har bir yozuv - bitta xabar
+  ma'lumoti (JSON, "d" maydonida)
+- outbox:{name}:{job}:meta - hash: filled=1 (ro'yxat to'liq yozildi), total,
+  cursor (sahifalab yozilganda - manbadan olingan yozuvlar soni)
+- consumer group "senders" - har bir yozuv bitta consumer'ga beriladi va
+  yuborilgandan keyin XACK qilinadi
+- outbox:{name}:{job}:owner - ro'yxatni yozayotgan consumer (SET NX, lease
+  soniya): webhook server va polling bot ikkalasi scheduler ishlatsa ham
+  stream'ni faqat bittasi qayta yaratadi / to'ldiradi, ikkinchisi faqat yuboradi
+
+Davom ettirish:
+---------------
+- fill() - stream, group va meta bitta MULTI'da yoziladi: yarim yozilgan
+  ro'yxat bo'lmaydi; filled bo'lsa ERPNext'dan qayta olinmaydi
+- start() / append() / finish() - ro'yxat sahifalab keladigan bo'lsa: har
+  bir sahifa va uning cursor'i bitta MULTI'da; filled faqat finish() da.
+  To'xtab qolsa - keyingi ishga tushirish manbani meta'dagi cursor'dan
+  davom ettiradi
+- entries() - avval shu consumer'ning ack qilinmagan yozuvlari (id "0"),
+  keyin yangilari (">") - tugasa refill() bilan keyingi sahifa yoziladi
+  (yuborish va olish bir-biriga ulanadi), oxirida boshqa (o'lgan) consumer'larning
+  claim_idle soniyadan beri ack qilinmagan yozuvlari (XAUTOCLAIM)
+- ack qilingan yozuv qayta berilmaydi - shu kungi qayta ishga tushirish
+  faqat qolganlarini yuboradi
+
+Redis ishlamasa state() None qaytaradi - chaqiruvchi outbox'siz
+(to'g'ridan-to'g'ri) yuboradi.
+
+Example:
+    >>> if not (await reminder_outbox.state(job)).get("filled"):
+    ...     await reminder_outbox.fill(job, reminders)
+    >>> async for entry_id, reminder in reminder_outbox.entries(job):
+    ...     await send(reminder)
+    ...     await reminder_outbox.ack(job, entry_id)
+"""
+
+import asyncio
+import os
+import socket
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.config import config
+from app.services import json_codec
+
+Entry = Tuple[str, Dict[str, Any]]
+
+
+class Outbox:
+    """
+    Redis stream + consumer group asosidagi outbox.
+
+    Redis instance app/loader.py dan lazy import qilinadi (ResponseCache kabi).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: int = 172800,
+        claim_idle: int = 60,
+        enabled: bool = True,
+        group: str = "senders",
+        lease: int = 300,
+        redis=None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.claim_idle = claim_idle
+        self.enabled = enabled
+        self.group = group
+        self.lease = lease
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._redis = redis
+        # Berilgan, lekin hali ack qilinmagan yozuvlar - XAUTOCLAIM ularni
+        # (navbatda uzoq turib qolsa) shu consumer'ga ikkinchi marta bermasin
+        self._inflight: Set[str] = set()
+
+    def _get_redis(self):
+        if self._redis is None:
+            try:
+                from app.loader import redis
+                self._redis = redis
+            except Exception as e:
+                logger.warning(f"Outbox [{self.name}]: Redis unavailable ({e})")
+                return None
+        return self._redis
+
+    def _stream(self, job: str) -> str:
+        return f"outbox:{self.name}:{job}"
+
+    def _meta(self, job: str) -> str:
+        return f"outbox:{self.name}:{job}:meta"
+
+    def _owner(self, job: str) -> str:
+        return f"outbox:{self.name}:{job}:owner"
+
+    async def own(self, job: str) -> bool:
+        """
+        Job ro'yxatini yozish huquqini olish yoki uzaytirish (lease soniyaga).
+
+        Returns:
+            bool: True - shu consumer egasi; False - boshqa jarayon yozmoqda
+            (yoki Redis xatosi)
+        """
+        redis = self._get_redis()
+        if redis is None:
+            return False
+
+        key = self._owner(job)
+        try:
+            if await redis.set(key, self.consumer, nx=True, ex=self.lease):
+                return True
+            if await redis.get(key) == self.consumer:
+                await redis.expire(key, self.lease)
+                return True
+        except Exception as e:
+            logger.warning(f"Outbox [{self.name}] owner error: {job} - {e}")
+            return False
+
+        logger.info(f"Outbox [{self.name}] {job}: list is being written by another process")
+        return False
+
+    async def state(self, job: str) -> Optional[Dict[str, str]]:
+        """
+        Job holati: {"filled": "1", "total": "...", "cursor": "..."} yoki {} (hali yozilmagan).
+
+        filled bo'lmasa, lekin cursor bor - sahifalab yozish yarimda to'xtagan.
+
+        Returns:
+            None - outbox ishlamaydi (o'chirilgan / Redis xatosi)
+        """
+        redis = self._get_redis() if self.enabled else None
+        if redis is None:
+            return None
+
+        try:
+            return await redis.hgetall(self._meta(job))
+        except Exception as e:
+            logger.warning(f"Outbox [{self.name}] state error: {job} - {e}")
+            return None
+
+    async def fill(self, job: str, items: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Xabarlar ro'yxatini stream'ga yozish (atomik: hammasi yoki hech biri).
+
+        Returns:
+            bool: True - yozildi; False - xato yoki boshqa jarayon egasi (own)
+        """
+        redis = self._get_redis()
+        if redis is None or not await self.own(job):
+            return False
+
+        stream, meta = self._stream(job), self._meta(job)
+        total = 0
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(stream, meta)
+                for item in items:
+                    pipe.xadd(stream, {"d": json_codec.dumps(item)})
+                    total += 1
+                pipe.xgroup_create(stream, self.group, id="0", mkstream=True)
+                pipe.hset(meta, mapping={"filled": "1", "total": str(total)})
+                pipe.expire(stream, self.ttl)
+                pipe.expire(meta, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Outbox [{self.name}] fill error: {job} - {e}")
+            return False
+
+        logger.info(f"📥 Outbox [{self.name}] filled: {job} - {total} items")
+        return True
+
+    async def unfinished(self, job: str) -> bool:
+        """
+        Job boshlangan, lekin tugamaganmi: ro'yxat to'liq yozilmagan, ack
+        qilinmagan yoki hali hech kimga berilmagan yozuvlar bor.
+        """
+        state = await self.state(job)
+        if not state:
+            return False
+        if not state.get("filled"):
+            return True
+
+        stream = self._stream(job)
+        try:
+            summary = await self._redis.xpending(stream, self.group)
+            if summary.get("pending"):
+                return True
+            groups = await self._redis.xinfo_groups(stream)
+            last = next((g["last-delivered-id"] for g in groups if g["name"] == self.group), "0-0")
+            return bool(await self._redis.xrange(stream, min=f"({last}", count=1))
+        except Exception as e:
+            logger.warning(f"Outbox [{self.name}] unfinished check error: {job} - {e}")
+            return False
+
+    async def start(self, job: str) -> bool:
+        """
+        Sahifalab yozishni boshlash: bo'sh stream, group va meta (cursor=0).
+
+        Faqat egasi (own) - boshqa jarayon ishlayotgan stream o'chirilmaydi.
+        """
+        redis = self._get_redis()
+        if redis is None or not await self.own(job):
+            return False
+
+        stream, meta = self._stream(job), self._meta(job)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(stream, meta)
+                pipe.xgroup_create(stream, self.group, id="0", mkstream=True)
+                pipe.hset(meta, mapping={"cursor": "0", "total": "0"})
+                pipe.expire(stream, self.ttl)
+                pipe.expire(meta, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Outbox [{self.name}] start error: {job} - {e}")
+            return False
+        return True
+
+    async def append(self, job: str, items: List[Dict[str, Any]], cursor: int) -> bool:
+        """
+        Bitta sahifani yozish (atomik: yozuvlar va cursor birga).
+
+        Args:
+            cursor: Manbadagi keyingi sahifa boshi - davom ettirish shu yerdan
+
+        Faqat egasi yozadi (har bir sahifa lease'ni uzaytiradi); egasi to'xtab
+        qolsa, lease tugagach boshqa jarayon cursor'dan davom ettiradi.
+        """
+        redis = self._get_redis()
+        if redis is None or not await self.own(job):
+            return False
+
+        stream, meta = self._stream(job), self._meta(job)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                for item in items:
+                    pipe.xadd(stream, {"d": json_codec.dumps(item)})
+                pipe.hincrby(meta, "total", len(items))
+                pipe.hset(meta, "cursor", str(cursor))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Outbox [{self.name}] append error: {job} @{cursor} - {e}")
+            return False
+        return True
+
+    async def finish(self, job: str) -> bool:
+        """Sahifalab yozish tugadi - ro'yxat to'liq (qayta olinmaydi)."""
+        redis = self._get_redis()
+        if redis is None:
+            return False
+
+        try:
+            await redis.hset(self._meta(job), "filled", "1")
+            total = await redis.hget(self._meta(job), "total")
+        except Exception as e:
+            logger.error(f"❌ Outbox [{self.name}] finish error: {job} - {e}")
+            return False
+
+        logger.info(f"📥 Outbox [{self.name}] filled: {job} - {total} items")
+        return True
+
+    async def ack(self, job: str, entry_id: str):
+        """Yozuv yakunlandi - qayta berilmaydi."""
+        self._inflight.discard(entry_id)
+        redis = self._get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.xack(self._stream(job), self.group, entry_id)
+        except Exception as e:
+            # Ack qilinmagan yozuv keyingi ishga tushirishda qayta yuboriladi
+            logger.warning(f"Outbox [{self.name}] ack error: {job} {entry_id} - {e}")
+
+    async def entries(
+        self,
+        job: str,
+        batch: int = 64,
+        refill: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[Entry]:
+        """
+        Yuborilishi kerak bo'lgan yozuvlar: (entry_id, ma'lumot).
+
+        Boshqa consumer'larda ack qilinmagan yozuvlar qolmaguncha tugamaydi
+        (claim_idle o'tgach ular shu consumer'ga olinadi).
+
+        Args:
+            refill: Yangi yozuvlar tugaganda chaqiriladi (masalan, keyingi
+                sahifani append() qilish); False - manba tugadi
+        """
+        redis = self._get_redis()
+        stream = self._stream(job)
+
+        # 1. Shu consumer nomi bilan oldin olingan, ack qilinmagan yozuvlar
+        #    (bir xil host/pid bilan qayta ishga tushganda - masalan, container'da)
+        response = await redis.xreadgroup(self.group, self.consumer, {stream: "0"}, count=batch)
+        pending = self._decode(response)
+        while pending:
+            for entry in pending:
+                self._inflight.add(entry[0])
+                yield entry
+            # Aniq ID bilan - shu ID'dan keyingi pending yozuvlar
+            response = await redis.xreadgroup(self.group, self.consumer, {stream: pending[-1][0]}, count=batch)
+            pending = self._decode(response)
+
+        while True:
+            # 2. Yangi yozuvlar
+            response = await redis.xreadgroup(self.group, self.consumer, {stream: ">"}, count=batch)
+            fresh = self._decode(response)
+            if fresh:
+                for entry in fresh:
+                    self._inflight.add(entry[0])
+                    yield entry
+                continue
+            if refill is not None:
+                if await refill():
+                    continue
+                refill = None
+
+            # 3. Boshqa (to'xtab qolgan) consumer'larning eskirgan yozuvlari
+            claimed = [entry for entry in await self._claim(redis, stream, batch) if entry[0] not in self._inflight]
+            if claimed:
+                for entry in claimed:
+                    self._inflight.add(entry[0])
+                    yield entry
+                continue
+
+            others = await self._pending_elsewhere(redis, stream)
+            if not others:
+                return
+            logger.info(f"⏳ Outbox [{self.name}] {job}: {others} items pending on other consumers")
+            await asyncio.sleep(min(self.claim_idle, 5))
+
+    async def _claim(self, redis, stream: str, batch: int) -> List[Entry]:
+        _, entries, *_ = await redis.xautoclaim(
+            stream, self.group, self.consumer, self.claim_idle * 1000, "0-0", count=batch,
+        )
+        return [(entry_id, json_codec.loads(fields["d"])) for entry_id, fields in entries if fields]
+
+    async def _pending_elsewhere(self, redis, stream: str) -> int:
+        summary = await redis.xpending(stream, self.group)
+        return sum(
+            consumer["pending"]
+            for consumer in summary.get("consumers") or []
+            if consumer["name"] != self.consumer
+        )
+
+    @staticmethod
+    def _decode(response) -> List[Entry]:
+        entries = []
+        for _, items in response or []:
+            for entry_id, fields in items:
+                if fields:
+                    entries.append((entry_id, json_codec.loads(fields["d"])))
+        return entries
+
+
+reminder_outbox = Outbox(
+    "reminders",
+    ttl=config.outbox.ttl,
+    claim_idle=config.outbox.claim_idle,
+    enabled=config.outbox.enabled,
+    # Egasi to'xtab qolsa - tezda (REMINDER_RETRY_DELAY dan oldin) bo'shaydi
+    lease=config.outbox.claim_idle * 2,
+)
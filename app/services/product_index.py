@@ -0,0 +1,167 @@
+"""
+Product Index - mijoz shartnomalari mahsulotlarining ixcham indeksi (Redis)
+
+Eslatmalar va shartnoma ko'rinishlariga faqat "X shartnomadagi mahsulotlar"
+kerak. Ilgari ular faqat og'ir get_my_contracts_by_telegram_id javobidan
+(to'lovlar tarixi, keyingi to'lov va h.k. bilan) olinardi.
+
+Tuzilishi:
+----------
+- Har bir mijoz uchun bitta Redis hash: products:tg:{telegram_id}
+- Maydon - contract_id, qiymat - mahsulotlar JSON ro'yxati, har bir mahsulot
+  maydonlar tartibidagi massiv: [name, qty, price, total_price, imei, notes]
+- "*" maydoni - indeks to'liq yozilganini bildiradi (shartnomasiz mijoz ham
+  "hit" bo'ladi, yarim yozilgan hash "miss")
+
+Yangilanish:
+------------
+- erpnext_api: shartnomalar (mahsulotlari bilan) ERPNext'dan olinganda
+  hash butunlay qayta yoziladi (MULTI: DEL + HSET + EXPIRE)
+- invalidate_erp_cache (Payment Entry webhook) - hash o'chiriladi, keyingi
+  shartnomalar so'rovi uni qayta to'ldiradi
+- TTL (PRODUCT_INDEX_TTL) - webhook'siz o'zgarishlar (yangi shartnoma) uchun
+
+Redis ishlamasa - har bir o'qish "miss", chaqiruvchi shartnomalarni
+ERPNext'dan oladi; bot to'xtamaydi.
+
+Example:
+    >>> products = await product_index.get(telegram_id)
+    >>> if products is None:
+    ...     ...  # indeks yo'q - erp_get_my_contracts_by_telegram_id
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.services import json_codec
+from app.services.models import Product
+
+# Indeks to'liq yozilganini bildiruvchi maydon (contract_id bo'la olmaydi)
+COMPLETE = "*"
+
+
+def pack_products(products: Iterable[Dict[str, Any]]) -> str:
+    """ERPNext mahsulot dict'lari → ixcham JSON (maydon nomlarisiz)."""
+    return json_codec.dumps([
+        [p.get("name"), p.get("qty"), p.get("price"), p.get("total_price"), p.get("imei"), p.get("notes")]
+        for p in products or ()
+        if isinstance(p, dict)
+    ])
+
+
+def unpack_products(data: str) -> List[Product]:
+    """pack_products natijasi → Product ro'yxati (Product.from_dict normalizatsiyasi bilan)."""
+    return [
+        Product.from_dict(dict(zip(("name", "qty", "price", "total_price", "imei", "notes"), row)))
+        for row in json_codec.loads(data)
+    ]
+
+
+class ProductIndex:
+    """
+    telegram_id → {contract_id: mahsulotlar} Redis hash'lari.
+
+    Redis instance app/loader.py dan lazy import qilinadi (ResponseCache kabi).
+    """
+
+    def __init__(self, ttl: int = 86400, prefix: str = "products:tg", enabled: bool = True, redis=None):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.enabled = enabled
+        self._redis = redis
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "invalidations": 0, "errors": 0}
+
+    def _get_redis(self):
+        if self._redis is None:
+            try:
+                from app.loader import redis
+                self._redis = redis
+            except Exception as e:
+                logger.warning(f"Product index: Redis unavailable ({e})")
+                return None
+        return self._redis
+
+    def _key(self, telegram_id: Any) -> str:
+        return f"{self.prefix}:{telegram_id}"
+
+    async def get(self, telegram_id: Any) -> Optional[Dict[str, List[Product]]]:
+        """
+        Mijozning barcha shartnomalari mahsulotlari.
+
+        Returns:
+            {contract_id: [Product, ...]} yoki None (indeks yo'q / Redis xatosi)
+        """
+        redis = self._get_redis() if self.enabled else None
+        if redis is None:
+            return None
+
+        try:
+            fields = await redis.hgetall(self._key(telegram_id))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Product index get error: telegram_id={telegram_id} - {e}")
+            return None
+
+        if fields.pop(COMPLETE, None) is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        try:
+            return {contract_id: unpack_products(data) for contract_id, data in fields.items()}
+        except Exception as e:
+            # Buzilgan yozuv - keyingi shartnomalar so'rovi qayta yozadi
+            logger.warning(f"Product index decode error: telegram_id={telegram_id} - {e}")
+            return None
+
+    async def put(self, telegram_id: Any, contracts: Iterable[Dict[str, Any]]):
+        """
+        Indeksni ERPNext shartnomalar javobidan (xom dict'lar) qayta yozish.
+
+        Shartnomalardan birortasida "products" kaliti bo'lmasa (mahsulotsiz
+        endpoint javobi) - indeks o'zgarmaydi: to'liq bo'lmagan ma'lumotni
+        yozgandan ko'ra "miss" yaxshi.
+        """
+        redis = self._get_redis() if self.enabled else None
+        if redis is None:
+            return
+
+        mapping = {COMPLETE: "1"}
+        for contract in contracts or ():
+            if not isinstance(contract, dict) or "products" not in contract:
+                return
+            if contract.get("contract_id"):
+                mapping[contract["contract_id"]] = pack_products(contract["products"])
+
+        key = self._key(telegram_id)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+            self.stats["writes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Product index put error: telegram_id={telegram_id} - {e}")
+
+    async def invalidate(self, telegram_id: Any):
+        """Mijoz indeksini o'chirish (to'lov / shartnoma o'zgarganda)."""
+        redis = self._get_redis() if self.enabled else None
+        if redis is None:
+            return
+
+        try:
+            await redis.delete(self._key(telegram_id))
+            self.stats["invalidations"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Product index invalidate error: telegram_id={telegram_id} - {e}")
+
+
+product_index = ProductIndex(
+    ttl=config.product_index.ttl,
+    enabled=config.product_index.enabled,
+)
@@ -0,0 +1,158 @@
+"""
+Telegram Rate Limits - bot yuboradigan xabarlar tezligi
+
+Telegram cheklovlari (Bot API FAQ):
+- bitta chatga - soniyasiga ~1 xabar (qisqa "burst" ruxsat etiladi)
+- barcha chatlarga jami - soniyasiga ~30 xabar
+
+Oshib ketsa Telegram 429 (TelegramRetryAfter) qaytaradi va bot bir necha
+soniya "jazolanadi". Shuning uchun xabarlar oldindan, token bucket orqali
+tekislanadi.
+
+Tarkibi:
+- TokenBucket - rate (token/s) va burst (sig'im); acquire() navbatni
+  rezervatsiya bilan beradi: har bir chaqiruvchi o'z vaqtini oladi va
+  shuncha kutadi (lock'siz, FIFO tartibida)
+- ChatRateLimiter - har bir chat uchun alohida TokenBucket (LRU bilan cheklangan)
+- chat_limiter - config.send bo'yicha umumiy instance
+- global_bucket - butun bot bo'yicha (barcha chatlarga) tezlik, broadcast'lar uchun
+- pause() - Telegram 429 (retry_after) qaytarsa bucket shuncha soniya to'xtaydi
+
+Example:
+    >>> await chat_limiter.acquire(chat_id)
+    >>> await bot.send_message(chat_id, text)
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+from app.config import config
+
+
+class TokenBucket:
+    """
+    Token bucket: soniyasiga `rate` token, eng ko'pi `burst` token to'planadi.
+
+    tokens manfiy bo'lishi mumkin - bu navbatdagi rezervatsiyalar (har biri
+    o'z vaqtini kutadi), shuning uchun parallel chaqiruvlar ham limitdan oshmaydi.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "resume_at")
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        # pause() - shu vaqtgacha (monotonic) hech kim token olmaydi
+        self.resume_at = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Token(lar)ni rezerv qilish.
+
+        Returns:
+            Necha soniya kutish kerak (0 - darhol yuborish mumkin)
+        """
+        if self.rate <= 0:
+            return 0.0   # cheklovsiz
+
+        self._refill(time.monotonic())
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self, tokens: int = 1) -> float:
+        """Token olish (kerak bo'lsa kutib). Kutilgan vaqtni qaytaradi."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # Kutish paytida pause() chaqirilgan (boshqa worker 429 oldi) - pauzadan
+        # keyin navbat qaytadan olinadi, eski rezervatsiyalar bir vaqtda yopirilmasin
+        paused = self.resume_at - time.monotonic()
+        if paused > 0:
+            await asyncio.sleep(paused)
+            delay += paused + await self.acquire(tokens)
+        return delay
+
+    def pause(self, seconds: float):
+        """
+        Bucket'ni `seconds` soniyaga to'xtatish (Telegram retry_after).
+
+        Navbatdagi rezervatsiyalar ham pauzadan keyin, rate bo'yicha
+        tekis davom etadi (hammasi bir vaqtda yopirilib kelmaydi).
+        """
+        now = time.monotonic()
+        self.resume_at = max(self.resume_at, now + seconds)
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    @property
+    def idle(self) -> bool:
+        """Bucket to'la - uni o'chirib yuborish mumkin (yangisi ham to'la bo'ladi)."""
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class ChatRateLimiter:
+    """
+    Har bir chat uchun TokenBucket.
+
+    Bucket'lar LRU tartibida saqlanadi; max_chats oshsa eng eski bo'sh
+    (to'la, ya'ni idle) bucket'lar o'chiriladi.
+    """
+
+    def __init__(self, rate: float, burst: int, max_chats: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_chats = max_chats
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self.stats: Dict[str, float] = {"acquired": 0, "delayed": 0, "waited": 0.0}
+
+    def bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+            self._evict()
+        else:
+            self._buckets.move_to_end(chat_id)
+        return bucket
+
+    def _evict(self):
+        while len(self._buckets) > self.max_chats:
+            chat_id, bucket = next(iter(self._buckets.items()))
+            if not bucket.idle:
+                # Eng eskisi hali ishlatilmoqda - qolganlari undan ham yangi
+                break
+            del self._buckets[chat_id]
+
+    async def acquire(self, chat_id: Hashable, tokens: int = 1) -> float:
+        """Chatga `tokens` ta xabar yuborishdan oldin chaqiriladi."""
+        waited = await self.bucket(chat_id).acquire(tokens)
+        self.stats["acquired"] += tokens
+        if waited:
+            self.stats["delayed"] += 1
+            self.stats["waited"] += waited
+        return waited
+
+
+chat_limiter = ChatRateLimiter(
+    rate=config.send.chat_rate,
+    burst=config.send.chat_burst,
+)
+
+# Barcha chatlarga jami - broadcast'lar (eslatmalar, bildirishnomalar) shu
+# bucket orqali o'tadi (app/services/broadcast.py)
+global_bucket = TokenBucket(
+    rate=config.send.global_rate,
+    burst=config.send.global_burst,
+)
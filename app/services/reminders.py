@@ -6,7 +6,7 @@ Bu modul mijozlarga to'lov vaqtlari haqida avtomatik eslatmalar yuboradi.
 LOGIKA:
 -------
 1. Har kuni 1 marta ishga tushadi (background task)
-2. ERPNext'dan yaqin to'lovlar ro'yxatini oladi
+2. ERPNext'dan yaqin to'lovlar ro'yxatini sahifalab oladi
 3. Har bir mijozga telegram orqali eslatma yuboradi
 
 ESLATMA JADVALI:
@@ -23,18 +23,35 @@ Architecture:
 -------------
 - AsyncIO task - background'da ishlaydi
 - APScheduler ishlatiladi - har kuni 09:00 da
+- Broadcaster (app/services/broadcast.py) - parallel worker'lar, chat va
+  umumiy token bucket (~25 msg/s), oxirida msg/s hisoboti
+- ReminderPages (app/services/erpnext_api.py) - ro'yxat sahifalab
+  (REMINDER_PAGE_SIZE): yuborish birinchi sahifadan boshlanadi, xotira o'zgarmas
+- Outbox (app/services/outbox.py) - kunlik ro'yxat Redis stream'da, ack
+  bilan: qayta ishga tushganda yuborilganlar takrorlanmaydi
+- Delivery ledger (app/services/ledger.py) - yuborilgan eslatmalar daftari,
+  notification_worker bilan umumiy
+- Davom ettirish - startup'da shu kungi tugallanmagan outbox davom
+  ettiriladi; deferred eslatmalar shu kuni REMINDER_RETRY_DELAY dan keyin
+  qayta yuboriladi (resume_reminders)
 - Error handling - agar xato bo'lsa ham to'xtamaydi
 """
 
-import asyncio
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
 from loguru import logger
 from aiogram import Bot
 
-from app.services.erpnext_api import erp_get_customers_needing_reminders
+from app.services.broadcast import DEFERRED, DUPLICATE, Broadcaster
+from app.services.erpnext_api import ReminderPages
+from app.services.ledger import delivery_ledger, ledger_key
+from app.services.limiter import background_priority
+from app.services.outbox import reminder_outbox
 from app.config import config
 
+# start_reminders_scheduler() yaratadi - deferred eslatmalarni qayta yuborish uchun
+_scheduler = None
+
 
 # ============================================================================
 # REMINDER TEMPLATES
@@ -130,6 +147,40 @@ def get_reminder_template(reminder_type: str, payment_data: Dict[str, Any]) -> s
 # SEND REMINDER
 # ============================================================================
 
+async def deliver_reminder(
+    bot: Bot,
+    telegram_chat_id: str,
+    reminder_type: str,
+    payment_data: Dict[str, Any]
+) -> bool:
+    """
+    Bitta mijozga eslatma yuborish - Telegram xatolari tashqariga chiqadi.
+
+    Broadcaster (process_reminders) uchun: 429 da kutib qayta yuboradi,
+    bloklangan / topilmagan chatlarni alohida sanaydi.
+
+    Returns:
+        bool: True - yuborildi
+
+    Raises:
+        aiogram.exceptions.TelegramAPIError: Telegram xatosi (RetryAfter, Forbidden, ...)
+    """
+    message = get_reminder_template(reminder_type, payment_data)
+
+    await bot.send_message(
+        chat_id=int(telegram_chat_id),
+        text=message,
+        parse_mode="HTML"
+    )
+
+    logger.info(
+        f"✅ Reminder sent: {telegram_chat_id} - {reminder_type} - "
+        f"{payment_data.get('contract_id')}"
+    )
+
+    return True
+
+
 async def send_reminder(
     bot: Bot,
     telegram_chat_id: str,
@@ -149,20 +200,7 @@ async def send_reminder(
         bool: True - muvaffaqiyatli, False - xato
     """
     try:
-        message = get_reminder_template(reminder_type, payment_data)
-
-        await bot.send_message(
-            chat_id=int(telegram_chat_id),
-            text=message,
-            parse_mode="HTML"
-        )
-
-        logger.info(
-            f"✅ Reminder sent: {telegram_chat_id} - {reminder_type} - "
-            f"{payment_data.get('contract_id')}"
-        )
-
-        return True
+        return await deliver_reminder(bot, telegram_chat_id, reminder_type, payment_data)
 
     except Exception as e:
         logger.error(
@@ -175,6 +213,81 @@ async def send_reminder(
 # PROCESS REMINDERS
 # ============================================================================
 
+def _reminder_chat(entry: Tuple[Optional[str], Dict[str, Any]]) -> Optional[str]:
+    """Eslatma yuboriladigan chat (yo'q bo'lsa - broadcast o'tkazib yuboradi)."""
+    reminder = entry[1]
+    chat_id = reminder.get("telegram_chat_id")
+    if not chat_id:
+        logger.warning(f"⚠️ No telegram_chat_id for {reminder.get('customer_id')}")
+    return chat_id
+
+
+def _reminder_key(entry: Tuple[Optional[str], Dict[str, Any]]) -> Optional[str]:
+    """Delivery ledger kaliti: (chat, shartnoma, to'lov sanasi, eslatma turi)."""
+    reminder = entry[1]
+    if not reminder.get("telegram_chat_id"):
+        return None
+    return ledger_key(
+        reminder["telegram_chat_id"],
+        reminder.get("contract_id"),
+        reminder.get("due_date"),
+        reminder.get("reminder_type", "today"),
+    )
+
+
+async def _next_page(pages: AsyncIterator) -> Optional[list]:
+    """ERPNext'dan keyingi sahifa (None - ro'yxat tugadi yoki xato)."""
+    # Background lane - handler'lardagi foydalanuvchi so'rovlari oldinda o'tadi
+    with background_priority():
+        try:
+            return await anext(pages)
+        except StopAsyncIteration:
+            return None
+
+
+def _log_fetched(pages: ReminderPages):
+    if pages.result.get("success"):
+        logger.info(f"📊 Found {pages.cursor} reminders to send ({pages.pages} pages)")
+    else:
+        logger.warning(f"⚠️ Reminders list incomplete: stopped at {pages.cursor} - {pages.result.get('message')}")
+
+
+async def _direct_entries(pages: ReminderPages) -> AsyncIterator[Tuple[None, Dict[str, Any]]]:
+    """Outbox'siz: sahifalar kelishi bilan eslatmalar (xotirada bitta sahifa)."""
+    iterator = aiter(pages)
+    while (page := await _next_page(iterator)) is not None:
+        for reminder in page:
+            yield None, reminder
+    _log_fetched(pages)
+
+
+def _outbox_refill(job: str, pages: ReminderPages) -> Callable[[], Awaitable[bool]]:
+    """Outbox'dagi yozuvlar tugaganda - keyingi sahifani (cursor bilan) yozish."""
+    iterator = aiter(pages)
+
+    async def refill() -> bool:
+        page = await _next_page(iterator)
+        if page is None:
+            _log_fetched(pages)
+            # Ro'yxat to'liq olinmagan bo'lsa filled qo'yilmaydi - keyingi
+            # ishga tushirish cursor'dan davom ettiradi
+            if pages.result.get("success"):
+                await reminder_outbox.finish(job)
+            return False
+        return await reminder_outbox.append(job, page, pages.cursor)
+
+    return refill
+
+
+def _outbox_done(job: str) -> Callable[[Tuple[str, Dict[str, Any]], str], Awaitable[None]]:
+    """Yakunlangan eslatmani ack qilish (deferred - ack'siz: pending qoladi, qayta yuboriladi)."""
+    async def done(entry, result: str):
+        if result != DEFERRED:
+            await reminder_outbox.ack(job, entry[0])
+
+    return done
+
+
 async def process_reminders(bot: Bot):
     """
     Barcha eslatmalarni yuborish.
@@ -182,58 +295,127 @@ async def process_reminders(bot: Bot):
     Bu function har kuni 1 marta ishga tushadi va barcha mijozlarga
     kerakli eslatmalarni yuboradi.
 
+    Ro'yxat ERPNext'dan sahifalab olinadi (ReminderPages) va har bir sahifa
+    outbox'ga (Redis stream, kun bo'yicha) yozilishi bilan yuborila
+    boshlaydi; har bir eslatma yakunlangach ack qilinadi. Jarayon yarmida
+    to'xtasa, qayta ishga tushirish (shu kuni) olingan sahifalarni ERPNext'dan
+    qayta so'ramaydi (cursor'dan davom etadi) va faqat qolganlarini yuboradi.
+    Redis ishlamasa - outbox'siz, sahifalar to'g'ridan-to'g'ri.
+
+    Delivery ledger (app/services/ledger.py) - bir xil eslatma (chat,
+    shartnoma, sana, tur) hech qaysi yo'l bilan ikki marta yuborilmaydi.
+
     Args:
         bot: Telegram Bot instance
     """
     logger.info("🔔 Starting reminders processing...")
 
     try:
-        # ERPNext'dan eslatma kerak bo'lgan mijozlar ro'yxatini olish
-        response = await erp_get_customers_needing_reminders()
-
-        if not response or not response.get("success"):
-            logger.warning("⚠️ No reminders data from ERPNext")
-            return
-
-        reminders = response.get("reminders", [])
-
-        if not reminders:
-            logger.info("ℹ️ No reminders to send today")
-            return
-
-        logger.info(f"📊 Found {len(reminders)} reminders to send")
-
-        # Har bir eslatmani yuborish
-        sent = 0
-        failed = 0
+        job = date.today().isoformat()
+        state = await reminder_outbox.state(job)
+        page_size = config.outbox.page_size
+
+        if state is None:
+            # Outbox ishlamaydi - sahifalar to'g'ridan-to'g'ri broadcast'ga
+            entries = _direct_entries(ReminderPages(page_size))
+            done = None
+        else:
+            refill = None
+            if state.get("filled"):
+                logger.info(f"🔁 Resuming reminders outbox {job} ({state.get('total')} items)")
+            elif state.get("cursor"):
+                logger.info(f"🔁 Resuming reminders outbox {job}: fetching from {state['cursor']}")
+                refill = _outbox_refill(job, ReminderPages(page_size, start=int(state["cursor"])))
+            elif await reminder_outbox.start(job):
+                refill = _outbox_refill(job, ReminderPages(page_size))
+            else:
+                return
+            entries = reminder_outbox.entries(job, refill=refill)
+            done = _outbox_done(job)
+
+        # Allaqachon yuborilganlar (qayta ishga tushirish, notification_worker)
+        # bo'laklab, bitta MGET bilan tashlab yuboriladi
+        already_sent = 0
+
+        async def on_duplicate(entry):
+            nonlocal already_sent
+            already_sent += 1
+            if done is not None:
+                await done(entry, DUPLICATE)
+
+        # Parallel yuborish - chat va umumiy (TG_GLOBAL_RATE) limitlar ichida,
+        # 429 da pauza + qayta yuborish, bloklangan chatlar alohida sanaladi;
+        # har bir eslatma daftarda band qilinib, faqat bir marta yuboriladi
+        report = await Broadcaster(name="reminders").run(
+            delivery_ledger.unsent(entries, key_of=_reminder_key, on_duplicate=on_duplicate),
+            send=lambda entry: delivery_ledger.send_once(
+                _reminder_key(entry),
+                lambda: deliver_reminder(
+                    bot,
+                    entry[1]["telegram_chat_id"],
+                    entry[1].get("reminder_type", "today"),
+                    entry[1],
+                ),
+            ),
+            chat_of=_reminder_chat,
+            done=done,
+        )
+        report.duplicate += already_sent
+        # Deferred eslatmalar yoki to'liq olinmagan ro'yxat (boshqa jarayon
+        # egasi / ERPNext xatosi) - shu kuni qayta urinish
+        if done is not None and await reminder_outbox.unfinished(job) and _schedule_retry(bot, job):
+            logger.warning(
+                f"⏳ Reminders outbox {job} unfinished ({report.deferred} deferred) - "
+                f"retry in {config.outbox.retry_delay}s"
+            )
+        elif report.deferred:
+            logger.warning(f"⚠️ {report.deferred} reminders deferred and not retried (no outbox / scheduler)")
+
+        logger.success(f"✅ Reminders processing completed: {report.summary()}")
 
-        for reminder in reminders:
-            telegram_chat_id = reminder.get("telegram_chat_id")
-            reminder_type = reminder.get("reminder_type", "today")
+    except Exception as e:
+        logger.error(f"❌ Reminders processing error: {e}")
+        logger.exception("Full traceback:")
 
-            if not telegram_chat_id:
-                logger.warning(f"⚠️ No telegram_chat_id for {reminder.get('customer_id')}")
-                failed += 1
-                continue
 
-            # Eslatma yuborish
-            success = await send_reminder(bot, telegram_chat_id, reminder_type, reminder)
+# ============================================================================
+# RESUME / RETRY
+# ============================================================================
 
-            if success:
-                sent += 1
-            else:
-                failed += 1
+async def resume_reminders(bot: Bot, job: Optional[str] = None):
+    """
+    Shu kungi tugallanmagan outbox'ni davom ettirish.
 
-            # Rate limiting - 30 xabar/soniyadan ko'p yubormaslik
-            await asyncio.sleep(0.033)  # ~30 msg/sec
+    Startup'da (jarayon yarmida to'xtagan bo'lsa) va deferred eslatmalar
+    uchun qayta urinishda chaqiriladi. Boshqa kunning job'i yoki hali
+    boshlanmagan / tugagan job - hech narsa qilinmaydi.
+    """
+    today = date.today().isoformat()
+    job = job or today
+    if job != today:
+        logger.info(f"Reminders outbox {job}: day is over, not resuming")
+        return
+    if not await reminder_outbox.unfinished(job):
+        return
+
+    logger.info(f"🔁 Reminders outbox {job} is unfinished - resuming")
+    await process_reminders(bot)
 
-        logger.success(
-            f"✅ Reminders processing completed: {sent} sent, {failed} failed"
-        )
 
-    except Exception as e:
-        logger.error(f"❌ Reminders processing error: {e}")
-        logger.exception("Full traceback:")
+def _schedule_retry(bot: Bot, job: str) -> bool:
+    """Deferred eslatmalar uchun shu kuni bir martalik qayta urinish."""
+    if _scheduler is None:
+        return False
+    _scheduler.add_job(
+        resume_reminders,
+        trigger="date",
+        run_date=datetime.now() + timedelta(seconds=config.outbox.retry_delay),
+        args=[bot, job],
+        id="reminders_retry",
+        name="Deferred Payment Reminders",
+        replace_existing=True,
+    )
+    return True
 
 
 # ============================================================================
@@ -244,11 +426,13 @@ async def start_reminders_scheduler(bot: Bot):
     """
     Eslatmalar scheduler'ni ishga tushirish.
 
-    Har kuni 09:00 da process_reminders() ni ishga tushiradi.
+    Har kuni 09:00 da process_reminders() ni ishga tushiradi; ishga tushganda
+    shu kungi tugallanmagan outbox'ni davom ettiradi (resume_reminders).
 
     Args:
         bot: Telegram Bot instance
     """
+    global _scheduler
     logger.info("🕐 Starting reminders scheduler...")
 
     try:
@@ -264,7 +448,19 @@ async def start_reminders_scheduler(bot: Bot):
             args=[bot],
             id="daily_reminders",
             name="Daily Payment Reminders",
-            replace_existing=True
+            replace_existing=True,
+            # Event loop band bo'lib 09:00 o'tkazib yuborilsa - kechikib bo'lsa ham bir marta
+            misfire_grace_time=3600,
+            coalesce=True,
+        )
+
+        # Oldingi jarayon shu kungi ro'yxatni yarmida qoldirgan bo'lsa - davom ettirish
+        scheduler.add_job(
+            resume_reminders,
+            args=[bot],
+            id="reminders_resume",
+            name="Resume Payment Reminders",
+            replace_existing=True,
         )
 
         # Test uchun - har daqiqada (production'da o'chirish kerak!)
@@ -278,6 +474,7 @@ async def start_reminders_scheduler(bot: Bot):
         # )
 
         scheduler.start()
+        _scheduler = scheduler
 
         logger.success("✅ Reminders scheduler started successfully!")
 
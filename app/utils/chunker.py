@@ -0,0 +1,225 @@
+"""
+Chunker - uzun Telegram HTML xabarlarini bo'laklarga ajratish
+
+Telegram xabar matnini 4096 belgigacha qabul qiladi - belgilar UTF-16
+birliklarida va HTML teglar/entity'lar parse qilingandan keyin sanaladi
+(emoji 🔔 = 2 birlik, `<b>` = 0, `&amp;` = 1). Limitdan oshsa so'rov
+"message is too long" bilan qaytadi - bir round trip behuda ketadi.
+
+split_message():
+- chiziqli vaqt: satr uzunliklari C darajasida (regex sub + map), bo'lak
+  chegaralari binary search bilan, teglar faqat bo'lak yopilganda sanaladi
+- imkon qadar satr chegarasida bo'ladi; bitta satr limitdan uzun bo'lsa -
+  so'z (bo'shliq) chegarasida, bo'lmasa belgi chegarasida
+- ochiq teglarni kuzatadi: bo'lak oxirida ular yopiladi va keyingi bo'lak
+  boshida qayta ochiladi (`<b>`/`<code>` hech qachon ikkiga bo'linmaydi)
+
+Example:
+    >>> for part in split_message(text):
+    ...     await msg.answer(part)
+"""
+
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+
+# Telegram limiti (UTF-16 birliklarida, teglarsiz)
+MESSAGE_LIMIT = 4096
+
+# Teg | entity | oddiy matn | yakka "<" yoki "&"
+_TOKEN = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^>\n]*>|&#?\w+;|[^<&]+|[<&]")
+# Teg: findall uchun (butun teg, "/", nom) va sub uchun guruhlarsiz (tezroq)
+_TAG_PARTS = re.compile(r"(<(/?)([a-zA-Z][\w-]*)[^>\n]*>)")
+_TAG_TEXT = re.compile(r"</?[a-zA-Z][^>\n]*>")
+_ENTITY = re.compile(r"&#?\w+;")
+
+
+def utf16_len(text: str) -> int:
+    """Matn uzunligi UTF-16 birliklarida (Telegram shunday sanaydi)."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def visible_text(text: str) -> str:
+    """Telegram ko'rsatadigan matn uzunligi uchun: teglar olib tashlanadi, entity - 1 belgi."""
+    return _ENTITY.sub("&", _TAG_TEXT.sub("", text))
+
+
+def open_tags(text: str) -> List[Tuple[str, str]]:
+    """text oxirida yopilmay qolgan teglar: [(nom, asl teg), ...]."""
+    stack: List[Tuple[str, str]] = []
+    for tag, closing, name in _TAG_PARTS.findall(text):
+        if not closing:
+            stack.append((name.lower(), tag))
+        elif stack and stack[-1][0] == name:
+            stack.pop()
+        else:
+            # Mos ochiq tegni olib tashlash (ichma-ich tartib buzilgan / katta harf)
+            name = name.lower()
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i][0] == name:
+                    del stack[i]
+                    break
+    return stack
+
+
+def _cut(text: str, room: int) -> int:
+    """text'ning room UTF-16 birlikka sig'adigan prefiksi uzunligi (belgilarda)."""
+    if text.isascii():
+        cut = room
+    else:
+        cut, units = 0, 0
+        for char in text:
+            units += 2 if ord(char) > 0xFFFF else 1
+            if units > room:
+                break
+            cut += 1
+
+    # Imkon bo'lsa so'z chegarasida (bo'lakning yarmidan keyingi bo'shliq)
+    space = text.rfind(" ", 0, cut)
+    if space > cut // 2:
+        return space + 1
+    return cut
+
+
+class _Chunks:
+    """split_message holati: tayyor bo'laklar va joriy bo'lak boshi (head)."""
+
+    __slots__ = ("limit", "chunks", "head", "head_units")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.chunks: List[str] = []
+        # Joriy bo'lak boshi: oldingi bo'lakdan qayta ochilgan teglar
+        # (yoki uzun satrning qoldig'i + "\n")
+        self.head = ""
+        self.head_units = 0
+
+    def flush(self, body: str):
+        """
+        Bo'lakni yopish: ochiq teglar teskari tartibda yopiladi va keyingi
+        bo'lak boshida (head) qayta ochiladi.
+        """
+        # Valid HTML'da "<" faqat teglarda (matnda &lt;): ochilish/yopilish
+        # soni teng bo'lsa - hamma teg yopilgan, skanerlash shart emas
+        stack = [] if body.count("<") == 2 * body.count("</") else open_tags(body)
+        text = body.strip()
+        if text and (not stack or _TAG_TEXT.sub("", text).strip()):
+            self.chunks.append(text + "".join(f"</{name}>" for name, _ in reversed(stack)))
+        self.head = "".join(tag for _, tag in stack)
+        self.head_units = 0
+
+    def split_line(self, line: str) -> int:
+        """
+        Limitdan uzun satr - token'lar bo'yicha, sig'maganini so'z/belgi
+        chegarasida bo'lish. Oxirgi (to'lmagan) qism head'da qoladi.
+
+        Returns:
+            head'dagi qoldiqning ko'rinadigan uzunligi
+        """
+        parts = [self.head]
+        units = 0
+        for match in _TOKEN.finditer(line):
+            token = match.group(0)
+            if match.group(2):
+                parts.append(token)
+                continue
+
+            size = 1 if token[0] == "&" and len(token) > 1 else utf16_len(token)
+            while units + size > self.limit:
+                room = self.limit - units
+                # Entity bo'linmaydi - butunligicha keyingi bo'lakka
+                cut = _cut(token, room) if room > 0 and size != 1 else 0
+                if not cut and not units:
+                    cut = 1   # limit bitta belgidan ham kichik - cheksiz sikl bo'lmasin
+                parts.append(token[:cut])
+                self.flush("".join(parts))
+                parts = [self.head]
+                units = 0
+                if cut:
+                    token = token[cut:]
+                    size = utf16_len(token)
+
+            parts.append(token)
+            units += size
+
+        self.head = "".join(parts) + "\n"
+        self.head_units = units + 1
+        return self.head_units
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Telegram HTML xabarini limitga sig'adigan bo'laklarga ajratish.
+
+    Args:
+        text: HTML (parse_mode="HTML") xabar matni
+        limit: Bitta bo'lakdagi ko'rinadigan belgilar (UTF-16 birliklarida)
+
+    Returns:
+        Bo'laklar ro'yxati (qisqa xabar - bitta element, o'zgarishsiz)
+    """
+    # Tez yo'l: teglar bilan birga ham sig'adi
+    if len(text) * 2 <= limit or utf16_len(text) <= limit:
+        return [text]
+
+    # Ko'rinadigan satrlar: teglar yangi satrni o'z ichiga olmaydi, shuning
+    # uchun ular asl satrlarga mos keladi. Uzunliklar belgilarda, C darajasida
+    # (map + accumulate) - emoji (2 UTF-16 birlik) hisobga olinmagan, aniq
+    # uzunlik har bir bo'lak yopilganda bir marta tekshiriladi (_fit)
+    shown = visible_text(text).split("\n")
+    sizes = list(map(len, shown))
+    lines = text.split("\n")
+    count = len(lines)
+
+    # cum[i] - 0..i satrlar uzunligi (har biri yangi satr belgisi bilan)
+    cum = list(accumulate(map((1).__add__, sizes)))
+    long_lines = []
+    if max(sizes) * 2 > limit:
+        long_lines = [i for i, size in enumerate(sizes) if size * 2 > limit and utf16_len(shown[i]) > limit]
+
+    state = _Chunks(limit)
+    start = 0
+    for stop in long_lines + [count]:
+        # start..stop - limitga sig'adigan satrlar: bo'lak oxiri binary search bilan
+        while start < stop:
+            base = cum[start - 1] if start else 0
+            end = bisect_right(cum, base + limit - state.head_units, start, stop)
+            if not state.head_units:
+                end = max(end, start + 1)
+            end = _fit(shown, cum, start, end, state.head_units, limit)
+            state.flush(state.head + "\n".join(lines[start:end]))
+            start = end
+
+        if stop < count:
+            # Limitdan uzun satr - oldingi qoldiq yopiladi, satr o'zi token'lar bo'yicha
+            if state.head_units:
+                state.flush(state.head)
+            state.split_line(lines[stop])
+            start = stop + 1
+
+    if state.head_units:
+        state.flush(state.head)
+    return state.chunks or [text]
+
+
+def _fit(shown: List[str], cum: List[int], start: int, end: int, head_units: int, limit: int) -> int:
+    """
+    shown[start:end] satrlaridan limitga aniq (UTF-16 bo'yicha) sig'adigan
+    qismining oxiri: odatda end o'zi, emoji ko'p bo'lsa - bir necha satr oldin.
+
+    Ortiqcha birliklar bitta binary search bilan olib tashlanadi: satrning
+    UTF-16 uzunligi belgilar sonidan kam emas, shuning uchun belgilar bo'yicha
+    `over` dan ko'p olib tashlangan satrlardan keyin bo'lak albatta sig'adi.
+    """
+    block = "\n".join(shown[start:end])
+    if block.isascii():
+        return end
+    over = head_units + utf16_len(block) - limit
+    if over <= 0:
+        return end
+    end = bisect_right(cum, cum[end - 1] - over, start, end)
+    # Bitta satr har doim sig'adi (uzunroqlari split_line'ga tushadi)
+    return end if head_units else max(end, start + 1)
@@ -1,5 +1,7 @@
 from typing import Dict, List, Any, Optional
+from app.services.models import Contract, Customer, Payment, Product, ScheduleRow
 from app.services.support import get_support_contact_sync
+from app.utils.render import FOOTER, RULE, Builder, cache_key, cached_render, header, section
 
 
 # ============================================================================
@@ -99,10 +101,91 @@ def clean_customer_name(name: Any) -> str:
     return cleaned if cleaned else str(name)
 
 
+def _format_product(idx: int, product: Product) -> str:
+    """Mahsulot bloki (nomi, miqdori, narxi, IMEI, izoh)."""
+    text = (
+        f"<b>{idx}. {product.name}</b>\n"
+        f"   📦 Miqdor: {format_quantity(product.qty)} dona\n"
+        f"   💵 Narx: ${format_money(product.price)}\n"
+        f"   💰 Jami: ${format_money(product.total_price)}\n"
+    )
+
+    if product.imei:
+        text += f"   🔢 IMEI: <code>{product.imei}</code>\n"
+
+    if product.notes:
+        text += f"   📝 Izoh: {product.notes}\n"
+
+    return text
+
+
+def _format_products(products: List[Product]) -> str:
+    """Mahsulot bloklari (orasida bo'sh qator)."""
+    return "\n".join(_format_product(idx, product) for idx, product in enumerate(products, 1))
+
+
+def _payment_amount_line(payment: Payment) -> str:
+    """To'lov summasi qatori: Receive = 🟢 Kirim, Pay = 🔴 Qaytarish."""
+    if payment.is_refund:
+        return f"🔴 <b>${format_money(payment.display_amount)}</b> (Qaytarish)"
+    return f"🟢 <b>${format_money(payment.display_amount)}</b> (Kirim)"
+
+
 # ============================================================================
 # CUSTOMER PROFILE FORMATTER
 # ============================================================================
 
+_PROFILE_HEADER = header("👤 <b>SHAXSIY MA'LUMOTLAR</b>")
+_PROFILE_CONTRACTS = section("📊 <b>SHARTNOMALAR</b>")
+_PROFILE_NO_CONTRACTS = section("📄 <b>SHARTNOMALAR</b>") + "ℹ️ Hozircha shartnomalar mavjud emas\n"
+_PROFILE_NEXT_PAYMENTS = section("🔔 <b>YAQIN TO'LOVLAR</b>")
+
+_CLASSIFICATIONS = {
+    'A': 'A (A\'lo)',
+    'B': 'B (Yaxshi)',
+    'C': 'C (O\'rtacha)',
+    'D': 'D (Past)'
+}
+
+_NEXT_PAYMENT_EMOJI = {
+    "overdue": "❌",
+    "today": "⏰",
+    "soon": "⚠️",
+    "upcoming": "📅"
+}
+
+
+def _next_payment_row(idx: int, payment: Dict[str, Any]) -> str:
+    status_emoji = _NEXT_PAYMENT_EMOJI.get(payment.get('status'), "📅")
+    return (
+        f"{idx}. {status_emoji} <b>{payment.get('contract_id')}</b>\n"
+        f"   📅 Sana: <b>{payment.get('due_date')}</b>\n"
+        f"   💵 Summa: <b>${format_money(payment.get('amount'))}</b>\n"
+        f"   📊 Holat: <i>{payment.get('status_uz', payment.get('status_text', '—'))}</i>\n"
+    )
+
+
+def _profile_key(data: Dict[str, Any]) -> Optional[tuple]:
+    """Render cache kaliti - profil xabarida ko'rinadigan maydonlar."""
+    customer = data.get("customer")
+    if not data.get("success") or not isinstance(customer, Customer):
+        return None   # qisqa xato matnlari - cache kerak emas
+
+    return (
+        customer.customer_name, customer.phone, customer.passport,
+        customer.classification, customer.customer_id,
+        tuple((c.total_amount, c.paid, c.remaining) for c in data.get("contracts", [])),
+        tuple(
+            (
+                p.get('status'), p.get('contract_id'), p.get('due_date'), p.get('amount'),
+                p.get('status_uz', p.get('status_text', '—')),
+            )
+            for p in data.get("next_payments", [])[:5]
+        ),
+    )
+
+
+@cached_render("customer_profile", _profile_key)
 def format_customer_profile(data: Dict[str, Any]) -> str:
     """
     Customer profil ma'lumotlarini formatlash.
@@ -133,8 +216,8 @@ def format_customer_profile(data: Dict[str, Any]) -> str:
         if not data.get("success"):
             return "❌ Ma'lumot yuklanmadi"
 
-        customer = data.get("customer", {})
-        if not customer or not isinstance(customer, dict):
+        customer = data.get("customer")
+        if not isinstance(customer, Customer):
             return "❌ Mijoz ma'lumotlari topilmadi"
 
         contracts = data.get("contracts", [])
@@ -143,78 +226,51 @@ def format_customer_profile(data: Dict[str, Any]) -> str:
         # ============================================
         # SHAXSIY MA'LUMOTLAR
         # ============================================
-        text = "━━━━━━━━━━━━━━━━━━━━\n"
-        text += "👤 <b>SHAXSIY MA'LUMOTLAR</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+        out = Builder(_PROFILE_HEADER)
+        add = out.add
 
-        text += f"👨‍💼 <b>Ism:</b> {clean_customer_name(customer.get('customer_name', '—'))}\n"
-        text += f"📱 <b>Telefon:</b> <code>{format_phone(customer.get('phone'))}</code>\n"
+        add(f"👨‍💼 <b>Ism:</b> {clean_customer_name(customer.customer_name or '—')}\n")
+        add(f"📱 <b>Telefon:</b> <code>{format_phone(customer.phone)}</code>\n")
 
         # Passport
-        if customer.get('passport'):
-            text += f"🆔 <b>Passport:</b> <code>{customer.get('passport')}</code>\n"
+        if customer.passport:
+            add(f"🆔 <b>Passport:</b> <code>{customer.passport}</code>\n")
 
         # Classification
-        if customer.get('classification'):
-            classification_text = {
-                'A': 'A (A\'lo)',
-                'B': 'B (Yaxshi)',
-                'C': 'C (O\'rtacha)',
-                'D': 'D (Past)'
-            }.get(customer.get('classification'), customer.get('classification'))
-            text += f"⭐ <b>Toifa:</b> {classification_text}\n"
+        if customer.classification:
+            classification_text = _CLASSIFICATIONS.get(customer.classification, customer.classification)
+            add(f"⭐ <b>Toifa:</b> {classification_text}\n")
 
-        text += f"🔖 <b>ID:</b> <code>{customer.get('customer_id', '—')}</code>\n"
+        add(f"🔖 <b>ID:</b> <code>{customer.customer_id or '—'}</code>\n")
 
         # ============================================
         # SHARTNOMALAR STATISTIKASI
         # ============================================
         if contracts:
-            total_amount = sum(c.get('total_amount', 0) for c in contracts)
-            total_paid = sum(c.get('paid', 0) for c in contracts)
-            total_remaining = sum(c.get('remaining', 0) for c in contracts)
-
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "📊 <b>SHARTNOMALAR</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            text += f"📄 <b>Jami shartnomalar:</b> {len(contracts)} ta\n"
-            text += f"💰 <b>Umumiy summa:</b> ${format_money(total_amount)}\n"
-            text += f"✅ <b>To'langan:</b> ${format_money(total_paid)}\n"
-            text += f"📉 <b>Qolgan qarz:</b> ${format_money(total_remaining)}\n"
+            total_amount = sum(c.total_amount for c in contracts)
+            total_paid = sum(c.paid for c in contracts)
+            total_remaining = sum(c.remaining for c in contracts)
+
+            add(_PROFILE_CONTRACTS)
+            add(
+                f"📄 <b>Jami shartnomalar:</b> {len(contracts)} ta\n"
+                f"💰 <b>Umumiy summa:</b> ${format_money(total_amount)}\n"
+                f"✅ <b>To'langan:</b> ${format_money(total_paid)}\n"
+                f"📉 <b>Qolgan qarz:</b> ${format_money(total_remaining)}\n"
+            )
         else:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "📄 <b>SHARTNOMALAR</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-            text += "ℹ️ Hozircha shartnomalar mavjud emas\n"
+            add(_PROFILE_NO_CONTRACTS)
 
         # ============================================
         # YAQIN TO'LOVLAR
         # ============================================
         if next_payments:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "🔔 <b>YAQIN TO'LOVLAR</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            for idx, payment in enumerate(next_payments[:5], 1):  # Eng ko'pi 5 ta
-                status_emoji = {
-                    "overdue": "❌",
-                    "today": "⏰",
-                    "soon": "⚠️",
-                    "upcoming": "📅"
-                }.get(payment.get('status'), "📅")
-
-                text += f"{idx}. {status_emoji} <b>{payment.get('contract_id')}</b>\n"
-                text += f"   📅 Sana: <b>{payment.get('due_date')}</b>\n"
-                text += f"   💵 Summa: <b>${format_money(payment.get('amount'))}</b>\n"
-                text += f"   📊 Holat: <i>{payment.get('status_uz', payment.get('status_text', '—'))}</i>\n"
+            add(_PROFILE_NEXT_PAYMENTS)
+            # Eng ko'pi 5 ta, orasida bo'sh qator
+            add("\n".join(_next_payment_row(idx, p) for idx, p in enumerate(next_payments[:5], 1)))
+            add(FOOTER)
 
-                if idx < len(next_payments[:5]):
-                    text += "\n"
-
-            text += "\n━━━━━━━━━━━━━━━━━━━━"
-
-        return text
+        return out.render()
 
     except Exception as e:
         # ❌ Agar formatlashda xato yuz bersa
@@ -236,11 +292,16 @@ def format_customer_profile(data: Dict[str, Any]) -> str:
 # CONTRACT DETAILS FORMATTER (WITH PRODUCTS)
 # ============================================================================
 
-def format_contract_with_products(contract: Dict[str, Any]) -> str:
+_CONTRACT_HEADER = header("📄 <b>SHARTNOMA DETALLARI</b>")
+_CONTRACT_FINANCE = section("💰 <b>MOLIYAVIY MA'LUMOTLAR</b>")
+_PRODUCTS_SECTION = section("🛍 <b>MAHSULOTLAR</b>")
+_CONTRACT_NEXT_PAYMENT = section("📅 <b>KEYINGI TO'LOV</b>")
+
+def format_contract_with_products(contract: Contract) -> str:
     """
     Shartnoma batafsil ma'lumotlari - mahsulotlar bilan.
 
-    ERPNext API Response Structure:
+    ERPNext API Response Structure (Contract modelga o'girilgan):
     -------------------------------
     {
         "contract_id": "SAL-ORD-00001",
@@ -268,64 +329,45 @@ def format_contract_with_products(contract: Dict[str, Any]) -> str:
     Returns:
         HTML formatted string
     """
-    text = "━━━━━━━━━━━━━━━━━━━━\n"
-    text += f"📄 <b>SHARTNOMA DETALLARI</b>\n"
-    text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+    out = Builder(_CONTRACT_HEADER)
+    add = out.add
 
     # Asosiy ma'lumotlar
-    text += f"🔖 <b>Shartnoma ID:</b> <code>{contract.get('contract_id')}</code>\n"
-    text += f"📅 <b>Sana:</b> {contract.get('contract_date')}\n"
-    text += f"📊 <b>Holat:</b> {contract.get('status_uz', contract.get('status'))}\n"
+    add(
+        f"🔖 <b>Shartnoma ID:</b> <code>{contract.contract_id}</code>\n"
+        f"📅 <b>Sana:</b> {contract.contract_date}\n"
+        f"📊 <b>Holat:</b> {contract.status_uz or contract.status}\n"
+    )
 
     # Moliyaviy ma'lumotlar
-    text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-    text += "💰 <b>MOLIYAVIY MA'LUMOTLAR</b>\n"
-    text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+    add(_CONTRACT_FINANCE)
+    add(f"💵 <b>Umumiy summa:</b> ${format_money(contract.total_amount)}\n")
 
-    text += f"💵 <b>Umumiy summa:</b> ${format_money(contract.get('total_amount'))}\n"
+    if contract.downpayment:
+        add(f"💳 <b>Boshlang'ich to'lov:</b> ${format_money(contract.downpayment)}\n")
 
-    if contract.get('downpayment'):
-        text += f"💳 <b>Boshlang'ich to'lov:</b> ${format_money(contract.get('downpayment'))}\n"
-
-    text += f"✅ <b>To'langan:</b> ${format_money(contract.get('paid'))}\n"
-    text += f"📉 <b>Qolgan qarz:</b> ${format_money(contract.get('remaining'))}\n"
+    add(f"✅ <b>To'langan:</b> ${format_money(contract.paid)}\n")
+    add(f"📉 <b>Qolgan qarz:</b> ${format_money(contract.remaining)}\n")
 
     # Mahsulotlar ro'yxati
-    products = contract.get('products', [])
+    products = contract.products
     if products:
-        text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-        text += "🛍 <b>MAHSULOTLAR</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-        for idx, product in enumerate(products, 1):
-            text += f"<b>{idx}. {product.get('name')}</b>\n"
-            text += f"   📦 Miqdor: {format_quantity(product.get('qty'))} dona\n"
-            text += f"   💵 Narx: ${format_money(product.get('price'))}\n"
-            text += f"   💰 Jami: ${format_money(product.get('total_price'))}\n"
-
-            if product.get('imei'):
-                text += f"   🔢 IMEI: <code>{product.get('imei')}</code>\n"
-
-            if product.get('notes'):
-                text += f"   📝 Izoh: {product.get('notes')}\n"
-
-            if idx < len(products):
-                text += "\n"
+        add(_PRODUCTS_SECTION)
+        add(_format_products(products))
 
     # Keyingi to'lov
-    next_payment = contract.get('next_payment')
+    next_payment = contract.next_payment
     if next_payment:
-        text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-        text += "📅 <b>KEYINGI TO'LOV</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-        text += f"📆 <b>Sana:</b> {next_payment.get('due_date')}\n"
-        text += f"💵 <b>Summa:</b> ${format_money(next_payment.get('amount'))}\n"
-        text += f"📊 <b>Holat:</b> <i>{next_payment.get('status_uz', next_payment.get('status_text'))}</i>\n"
+        add(_CONTRACT_NEXT_PAYMENT)
+        add(
+            f"📆 <b>Sana:</b> {next_payment.due_date}\n"
+            f"💵 <b>Summa:</b> ${format_money(next_payment.amount)}\n"
+            f"📊 <b>Holat:</b> <i>{next_payment.status_uz}</i>\n"
+        )
 
-    text += "\n━━━━━━━━━━━━━━━━━━━━"
+    add(FOOTER)
 
-    return text
+    return out.render()
 
 
 # ============================================================================
@@ -387,25 +429,26 @@ def format_payment_history(data: Dict[str, Any]) -> str:
     if not payments:
         return "💳 To'lovlar tarixi mavjud emas"
 
-    text = f"💳 <b>To'lovlar tarixi</b> ({total} ta)\n\n"
+    out = Builder(f"💳 <b>To'lovlar tarixi</b> ({total} ta)\n\n")
+    out.extend(
+        f"📅 <b>{payment.date}</b>\n"
+        f"   {_payment_amount_line(payment)}\n"
+        f"   🆔 ID: <code>{payment.payment_id}</code>\n\n"
+        for payment in payments
+    )
 
-    for payment in payments:
-        # ✅ Payment type ni aniqlash (Receive = kirim, Pay = chiqim/qaytarish)
-        payment_type = payment.get('payment_type', 'Receive')
-        display_amount = payment.get('display_amount') or abs(payment.get('amount', 0))
+    return out.render()
 
-        if payment_type == 'Pay':
-            type_emoji = "🔴"
-            type_text = "Qaytarish"
-        else:
-            type_emoji = "🟢"
-            type_text = "Kirim"
 
-        text += f"📅 <b>{payment.get('date')}</b>\n"
-        text += f"   {type_emoji} <b>${format_money(display_amount)}</b> ({type_text})\n"
-        text += f"   🆔 ID: <code>{payment.get('payment_id')}</code>\n\n"
+_HISTORY_HEADER = header("📄 <b>SHARTNOMA MA'LUMOTLARI</b>")
+_NO_PAYMENTS = section("💳 <b>TO'LOVLAR TARIXI</b>") + "ℹ️ Hozircha to'lovlar kiritilmagan\n"
 
-    return text
+
+def _history_row(idx: int, payment: Payment) -> str:
+    row = f"<b>{idx}. {payment.date}</b>\n   {_payment_amount_line(payment)}\n"
+    if payment.payment_id:
+        row += f"   🆔 ID: <code>{payment.payment_id}</code>\n"
+    return row
 
 
 def format_payment_history_with_products(data: Dict[str, Any]) -> str:
@@ -458,7 +501,7 @@ def format_payment_history_with_products(data: Dict[str, Any]) -> str:
         if not data.get("success"):
             return "❌ Ma'lumotlar yuklanmadi"
 
-        contract = data.get("contract", {})
+        contract = data.get("contract") or Contract()
         products = data.get("products", [])
         payments = data.get("payments", [])
         total_paid = data.get("total_paid", 0)
@@ -467,78 +510,36 @@ def format_payment_history_with_products(data: Dict[str, Any]) -> str:
         # ============================================
         # SHARTNOMA MA'LUMOTLARI
         # ============================================
-        text = "━━━━━━━━━━━━━━━━━━━━\n"
-        text += "📄 <b>SHARTNOMA MA'LUMOTLARI</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-        text += f"🔖 <b>Shartnoma:</b> <code>{contract.get('contract_id')}</code>\n"
-        text += f"📅 <b>Sana:</b> {contract.get('contract_date')}\n\n"
-
-        text += f"💰 <b>Umumiy summa:</b> ${format_money(contract.get('total_amount'))}\n"
-        text += f"✅ <b>To'langan:</b> ${format_money(total_paid)}\n"
-        text += f"📉 <b>Qoldiq:</b> ${format_money(contract.get('remaining'))}\n"
+        out = Builder(_HISTORY_HEADER)
+        add = out.add
+
+        add(
+            f"🔖 <b>Shartnoma:</b> <code>{contract.contract_id}</code>\n"
+            f"📅 <b>Sana:</b> {contract.contract_date}\n\n"
+            f"💰 <b>Umumiy summa:</b> ${format_money(contract.total_amount)}\n"
+            f"✅ <b>To'langan:</b> ${format_money(total_paid)}\n"
+            f"📉 <b>Qoldiq:</b> ${format_money(contract.remaining)}\n"
+        )
 
         # ============================================
         # MAHSULOTLAR
         # ============================================
         if products:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "🛍 <b>MAHSULOTLAR</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            for idx, product in enumerate(products, 1):
-                text += f"<b>{idx}. {product.get('name')}</b>\n"
-                text += f"   📦 Miqdor: {format_quantity(product.get('qty'))} dona\n"
-                text += f"   💵 Narx: ${format_money(product.get('price'))}\n"
-                text += f"   💰 Jami: ${format_money(product.get('total_price'))}\n"
-                text += f"   💰 Jami: ${format_money(product.get('total_price'))}\n"
-
-                if product.get('imei'):
-                    text += f"   🔢 IMEI: <code>{product.get('imei')}</code>\n"
-
-                if product.get('notes'):
-                    text += f"   📝 Izoh: {product.get('notes')}\n"
-
-                if idx < len(products):
-                    text += "\n"
+            add(_PRODUCTS_SECTION)
+            add(_format_products(products))
 
         # ============================================
         # TO'LOVLAR TARIXI
         # ============================================
         if payments:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += f"💳 <b>TO'LOVLAR TARIXI</b> ({total_payments} ta)\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            for idx, payment in enumerate(payments, 1):
-                # ✅ Payment type ni aniqlash (Receive = kirim, Pay = chiqim/qaytarish)
-                payment_type = payment.get('payment_type', 'Receive')
-                display_amount = payment.get('display_amount') or abs(payment.get('amount', 0))
-
-                if payment_type == 'Pay':
-                    type_emoji = "🔴"
-                    type_text = "Qaytarish"
-                else:
-                    type_emoji = "🟢"
-                    type_text = "Kirim"
-
-                text += f"<b>{idx}. {payment.get('date')}</b>\n"
-                text += f"   {type_emoji} <b>${format_money(display_amount)}</b> ({type_text})\n"
-
-                if payment.get('payment_id'):
-                    text += f"   🆔 ID: <code>{payment.get('payment_id')}</code>\n"
-
-                if idx < len(payments):
-                    text += "\n"
+            add(section(f"💳 <b>TO'LOVLAR TARIXI</b> ({total_payments} ta)"))
+            add("\n".join(_history_row(idx, payment) for idx, payment in enumerate(payments, 1)))
         else:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "💳 <b>TO'LOVLAR TARIXI</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-            text += "ℹ️ Hozircha to'lovlar kiritilmagan\n"
+            add(_NO_PAYMENTS)
 
-        text += "\n━━━━━━━━━━━━━━━━━━━━"
+        add(FOOTER)
 
-        return text
+        return out.render()
 
     except Exception as e:
         from loguru import logger
@@ -570,34 +571,40 @@ def format_payment_schedule(data: Dict[str, Any]) -> str:
     if not schedule:
         return "📅 To'lov jadvali mavjud emas"
 
-    text = f"📅 <b>To'lov jadvali</b>\n"
-    text += f"📄 Shartnoma: <code>{contract_id}</code>\n"
-    text += f"📊 Jami: {total_months} oylik\n\n"
-
-    for month in schedule:
-        # Status emoji
-        status = month.get('status')
-        if status == 'paid':
-            emoji = "✅"
-        elif status == 'partial':
-            emoji = "⚠️"
-        elif month.get('is_overdue'):
-            emoji = "❌"
-        else:
-            emoji = "⏳"
+    out = Builder(
+        f"📅 <b>To'lov jadvali</b>\n"
+        f"📄 Shartnoma: <code>{contract_id}</code>\n"
+        f"📊 Jami: {total_months} oylik\n\n"
+    )
+    out.extend(_schedule_row(month) for month in schedule)
 
-        text += f"{emoji} <b>{month.get('month')}-oy</b> — {month.get('due_date')}\n"
-        text += f"   💵 To'lov: <b>${format_money(month.get('amount'))}</b>\n"
+    return out.render()
 
-        if month.get('paid', 0) > 0:
-            text += f"   ✅ To'langan: <b>${format_money(month.get('paid'))}</b>\n"
 
-        if month.get('outstanding', 0) > 0:
-            text += f"   📉 Qoldiq: <b>${format_money(month.get('outstanding'))}</b>\n"
+def _schedule_row(month: ScheduleRow) -> str:
+    # Status emoji
+    status = month.status
+    if status == 'paid':
+        emoji = "✅"
+    elif status == 'partial':
+        emoji = "⚠️"
+    elif month.is_overdue:
+        emoji = "❌"
+    else:
+        emoji = "⏳"
 
-        text += f"   📊 {month.get('status_uz', status)}\n\n"
+    row = (
+        f"{emoji} <b>{month.month}-oy</b> — {month.due_date}\n"
+        f"   💵 To'lov: <b>${format_money(month.amount)}</b>\n"
+    )
 
-    return text
+    if month.paid > 0:
+        row += f"   ✅ To'langan: <b>${format_money(month.paid)}</b>\n"
+
+    if month.outstanding > 0:
+        row += f"   📉 Qoldiq: <b>${format_money(month.outstanding)}</b>\n"
+
+    return row + f"   📊 {month.status_uz or status}\n\n"
 
 
 # ============================================================================
@@ -613,43 +620,41 @@ def format_upcoming_payments(data: Dict[str, Any]) -> str:
     if not payments:
         return "✅ <b>Yaqin to'lovlar yo'q</b>\n\nBarcha to'lovlar vaqtida amalga oshirilgan! 🎉"
 
-    text = "━━━━━━━━━━━━━━━━━━━━\n"
-    text += f"🔔 <b>YAQIN TO'LOVLAR</b> ({len(payments)} ta)\n"
-    text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-    for idx, payment in enumerate(payments, 1):
-        status = payment.get('status')
-        days_left = payment.get('days_left', 0)
-
-        # Status emoji
-        if status == 'overdue':
-            emoji = "❌"
-            status_text = f"<b>{abs(days_left)} kun kechikkan!</b>"
-        elif status == 'today':
-            emoji = "⏰"
-            status_text = "<b>BUGUN to'lash kerak!</b>"
-        elif status == 'soon':
-            emoji = "⚠️"
-            status_text = f"<b>{days_left} kundan keyin</b>"
-        else:
-            emoji = "📅"
-            status_text = f"{days_left} kun qoldi"
+    out = Builder(header(f"🔔 <b>YAQIN TO'LOVLAR</b> ({len(payments)} ta)"))
+    out.add("\n".join(_upcoming_row(idx, payment) for idx, payment in enumerate(payments, 1)))
+    out.add(FOOTER)
 
-        text += f"<b>{idx}. {emoji} {payment.get('contract_id')}</b>\n"
-        text += f"   📅 <b>Sana:</b> {payment.get('due_date')}\n"
-        text += f"   💰 <b>Summa:</b> ${format_money(payment.get('amount'))}\n"
+    return out.render()
 
-        if payment.get('outstanding'):
-            text += f"   📉 <b>Qarz:</b> ${format_money(payment.get('outstanding'))}\n"
 
-        text += f"   📊 <b>Holat:</b> {status_text}\n"
+def _upcoming_row(idx: int, payment: Dict[str, Any]) -> str:
+    status = payment.get('status')
+    days_left = payment.get('days_left', 0)
 
-        if idx < len(payments):
-            text += "\n"
+    # Status emoji
+    if status == 'overdue':
+        emoji = "❌"
+        status_text = f"<b>{abs(days_left)} kun kechikkan!</b>"
+    elif status == 'today':
+        emoji = "⏰"
+        status_text = "<b>BUGUN to'lash kerak!</b>"
+    elif status == 'soon':
+        emoji = "⚠️"
+        status_text = f"<b>{days_left} kundan keyin</b>"
+    else:
+        emoji = "📅"
+        status_text = f"{days_left} kun qoldi"
 
-    text += "\n━━━━━━━━━━━━━━━━━━━━"
+    row = (
+        f"<b>{idx}. {emoji} {payment.get('contract_id')}</b>\n"
+        f"   📅 <b>Sana:</b> {payment.get('due_date')}\n"
+        f"   💰 <b>Summa:</b> ${format_money(payment.get('amount'))}\n"
+    )
 
-    return text
+    if payment.get('outstanding'):
+        row += f"   📉 <b>Qarz:</b> ${format_money(payment.get('outstanding'))}\n"
+
+    return row + f"   📊 <b>Holat:</b> {status_text}\n"
 
 
 # ============================================================================
@@ -715,6 +720,51 @@ def format_error_message(error_data: Dict[str, Any]) -> str:
 # DETAILED PAYMENT HISTORY FORMATTER (BATAFSIL TO'LOVLAR TARIXI)
 # ============================================================================
 
+_SUMMARY_SECTION = section("📋 <b>XULOSA</b>")
+_COMPLETED = "\n🎉 <b>SHARTNOMA YAKUNLANDI!</b> ✅\n<i>Barcha to'lovlar to'liq amalga oshirildi.</i>\n"
+
+
+def _product_short(idx: int, product: Product) -> str:
+    """Mahsulot qatori - nomi, miqdori va IMEI (narxsiz)."""
+    name = product.name or "Noma'lum mahsulot"
+    row = f"<b>{idx}. {name}</b> — {format_quantity(product.qty)} dona\n"
+    if product.imei:
+        row += f"   🔢 IMEI: <code>{product.imei}</code>\n"
+    return row
+
+
+@cache_key
+def detailed_payment_history_key(
+    contract_data: Dict[str, Any],
+    schedule_data: Dict[str, Any],
+    payment_history_data: Dict[str, Any]
+) -> Optional[tuple]:
+    """
+    Render cache kaliti - format_detailed_payment_history argumentlaridan.
+
+    Handler natijani bo'laklangan (split) holda cache'laydi:
+        >>> parts = render_cache.render(
+        ...     "detailed_payment_history",
+        ...     detailed_payment_history_key(contract_data, schedule_data, history_data),
+        ...     lambda: tuple(split_message(format_detailed_payment_history(...))),
+        ... )
+    """
+    contract_data = contract_data or {}
+    payment_history_data = payment_history_data or {}
+    contract = contract_data.get("contract") or Contract()
+    products = contract_data.get("products") or contract.products
+    payments = payment_history_data.get("payments") or []
+
+    return (
+        contract.contract_id, contract.contract_date, contract.total_amount,
+        contract.paid, contract.remaining, contract.downpayment,
+        tuple((p.name, p.qty, p.imei) for p in products),
+        tuple((p.date, p.payment_id, p.display_amount, p.payment_type) for p in payments),
+        payment_history_data.get("total_payments"),
+        tuple(row.status for row in (schedule_data or {}).get("schedule") or []),
+    )
+
+
 def format_detailed_payment_history(
     contract_data: Dict[str, Any],
     schedule_data: Dict[str, Any],
@@ -749,72 +799,41 @@ def format_detailed_payment_history(
         if not payment_history_data:
             payment_history_data = {}
 
-        text = ""
-
         # ============================================
         # SHARTNOMA ASOSIY MA'LUMOTLARI
         # ============================================
-        # Contract ma'lumotlarini olish - API response strukturasiga qarab
-        contract = contract_data.get("contract") or {}
-        if not contract:
-            # Agar contract alohida field bo'lmasa, contract_data ning o'zidan olish
-            contract = {
-                "contract_id": contract_data.get("contract_id", "—"),
-                "contract_date": contract_data.get("contract_date", "—"),
-                "total_amount": contract_data.get("total_amount", 0),
-                "paid": contract_data.get("paid", 0),
-                "remaining": contract_data.get("remaining", 0),
-                "downpayment": contract_data.get("downpayment", 0),
-            }
-
-        contract_id = contract.get("contract_id") or "—"
-        contract_date = contract.get("contract_date") or "—"
-        total_amount = float(contract.get("total_amount") or 0)
-        paid_amount = float(contract.get("paid") or 0)
-        remaining = float(contract.get("remaining") or 0)
-        downpayment = float(contract.get("downpayment") or 0)
-
-        text += "━━━━━━━━━━━━━━━━━━━━\n"
-        text += "📄 <b>SHARTNOMA MA'LUMOTLARI</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-        text += f"🔖 <b>Shartnoma:</b> <code>{contract_id}</code>\n"
-        text += f"📅 <b>Tuzilgan sana:</b> {contract_date}\n\n"
-
-        text += f"💰 <b>Umumiy summa:</b> ${format_money(total_amount)}\n"
+        # Contract (erp_get_payment_history_with_products - doim Contract modeli)
+        contract = contract_data.get("contract") or Contract()
+
+        contract_id = contract.contract_id or "—"
+        contract_date = contract.contract_date or "—"
+        total_amount = contract.total_amount
+        paid_amount = contract.paid
+        remaining = contract.remaining
+        downpayment = contract.downpayment
+
+        out = Builder(_HISTORY_HEADER)
+        add = out.add
+
+        add(
+            f"🔖 <b>Shartnoma:</b> <code>{contract_id}</code>\n"
+            f"📅 <b>Tuzilgan sana:</b> {contract_date}\n\n"
+            f"💰 <b>Umumiy summa:</b> ${format_money(total_amount)}\n"
+        )
         if downpayment:
-            text += f"💳 <b>Boshlang'ich to'lov:</b> ${format_money(downpayment)}\n"
-        text += f"✅ <b>To'langan:</b> ${format_money(paid_amount)}\n"
-        text += f"📉 <b>Qoldiq:</b> ${format_money(remaining)}\n"
+            add(f"💳 <b>Boshlang'ich to'lov:</b> ${format_money(downpayment)}\n")
+        add(f"✅ <b>To'langan:</b> ${format_money(paid_amount)}\n")
+        add(f"📉 <b>Qoldiq:</b> ${format_money(remaining)}\n")
 
         # ============================================
         # MAHSULOTLAR
         # ============================================
-        products = contract_data.get("products") or []
-        if not products:
-            products = contract.get("products") or []
-
-        if products and isinstance(products, list) and len(products) > 0:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += f"🛍 <b>MAHSULOTLAR</b> ({len(products)} ta)\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            for idx, product in enumerate(products, 1):
-                if not isinstance(product, dict):
-                    continue
+        products = contract_data.get("products") or contract.products
 
-                name = product.get("name") or "Noma'lum mahsulot"
-                qty = float(product.get("qty") or 0)
-                imei = product.get("imei") or ""
-
-                # Faqat mahsulot nomi va miqdori ko'rsatiladi (narxsiz)
-                text += f"<b>{idx}. {name}</b> — {format_quantity(qty)} dona\n"
-
-                if imei:
-                    text += f"   🔢 IMEI: <code>{imei}</code>\n"
-
-                if idx < len(products):
-                    text += "\n"
+        if products:
+            add(section(f"🛍 <b>MAHSULOTLAR</b> ({len(products)} ta)"))
+            # Faqat mahsulot nomi va miqdori ko'rsatiladi (narxsiz)
+            add("\n".join(_product_short(idx, product) for idx, product in enumerate(products, 1)))
 
         # ============================================
         # TO'LOVLAR TARIXI (SODDALASHTIRILGAN)
@@ -823,32 +842,22 @@ def format_detailed_payment_history(
         payments = payment_history_data.get("payments") or []
         total_payments = payment_history_data.get("total_payments") or len(payments)
 
-        if payments and isinstance(payments, list) and len(payments) > 0:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += f"💳 <b>TO'LOVLAR TARIXI</b> ({total_payments} ta)\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+        if payments:
+            add(section(f"💳 <b>TO'LOVLAR TARIXI</b> ({total_payments} ta)"))
 
             # To'lovlarni sanasi bo'yicha tartiblash (eskidan yangiga)
-            sorted_payments = sorted(
-                [p for p in payments if isinstance(p, dict)],
-                key=lambda x: x.get("date", ""),
-                reverse=False  # Eskidan yangiga
-            )
+            sorted_payments = sorted(payments, key=lambda x: x.date)
 
             # Running balance hisoblash
             running_paid = 0.0
             running_remaining = total_amount
 
             for idx, payment in enumerate(sorted_payments, 1):
-                date = payment.get("date") or "—"
-                amount = float(payment.get("amount") or 0)
-                method = payment.get("method") or "Naqd"
-                payment_id = payment.get("payment_id") or ""
-
-                payment_type = payment.get('payment_type', 'Receive')
-                display_amount = payment.get('display_amount') or abs(amount)
+                date = payment.date or "—"
+                payment_id = payment.payment_id
+                display_amount = payment.display_amount
 
-                if payment_type == 'Pay':
+                if payment.is_refund:
                     # Customerga pul qaytarildi
                     type_emoji = "🔴"
                     type_label = "Qaytarildi"
@@ -863,51 +872,50 @@ def format_detailed_payment_history(
 
                 running_remaining = max(0, running_remaining)
 
-                text += f"<b>{idx}. 📅 {date}</b>\n"
-                text += f"   {type_emoji} <b>${format_money(display_amount)}</b> — {type_label}\n"
-                text += f"   📊 Qoldiq: <b>${format_money(running_remaining)}</b>\n"
+                row = (
+                    f"<b>{idx}. 📅 {date}</b>\n"
+                    f"   {type_emoji} <b>${format_money(display_amount)}</b> — {type_label}\n"
+                    f"   📊 Qoldiq: <b>${format_money(running_remaining)}</b>\n"
+                )
 
                 if payment_id:
-                    text += f"   🆔 <code>{payment_id}</code>\n"
+                    row += f"   🆔 <code>{payment_id}</code>\n"
 
-                text += "\n"
+                add(row + "\n")
 
-            text += "━━━━━━━━━━━━━━━━━━━━\n"
-            text += f"📊 <b>Jami to'langan:</b> ${format_money(running_paid)}\n"
-            text += f"📉 <b>Hozirgi qoldiq:</b> ${format_money(remaining)}\n"
+            add(
+                f"{RULE}\n"
+                f"📊 <b>Jami to'langan:</b> ${format_money(running_paid)}\n"
+                f"📉 <b>Hozirgi qoldiq:</b> ${format_money(remaining)}\n"
+            )
 
         else:
-            text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-            text += "💳 <b>TO'LOVLAR TARIXI</b>\n"
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-            text += "ℹ️ Hozircha to'lovlar kiritilmagan\n"
+            add(_NO_PAYMENTS)
 
         # ============================================
         # YAKUNIY XULOSA
         # ============================================
-        text += "\n━━━━━━━━━━━━━━━━━━━━\n"
-        text += "📋 <b>XULOSA</b>\n"
-        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-
-        text += f"💰 Umumiy summa: <b>${format_money(total_amount)}</b>\n"
-        text += f"✅ To'langan: <b>${format_money(paid_amount)}</b>\n"
-        text += f"📉 Qolgan qarz: <b>${format_money(remaining)}</b>\n"
+        add(_SUMMARY_SECTION)
+        add(
+            f"💰 Umumiy summa: <b>${format_money(total_amount)}</b>\n"
+            f"✅ To'langan: <b>${format_money(paid_amount)}</b>\n"
+            f"📉 Qolgan qarz: <b>${format_money(remaining)}</b>\n"
+        )
 
         # Muddat ma'lumotlari
         final_schedule = schedule_data.get("schedule") or []
-        if final_schedule and isinstance(final_schedule, list):
-            paid_months_count = len([s for s in final_schedule if isinstance(s, dict) and s.get("status") == "paid"])
+        if final_schedule:
+            paid_months_count = sum(1 for s in final_schedule if s.status == "paid")
             total_months_final = len(final_schedule)
-            text += f"📅 Muddat: {total_months_final} oylik ({paid_months_count} oy to'langan)\n"
+            add(f"📅 Muddat: {total_months_final} oylik ({paid_months_count} oy to'langan)\n")
 
         # ✅ YANGI: Shartnoma yakunlanganligini ko'rsatish
-        if remaining <= 0 and paid_amount >= total_amount:
-            text += f"\n🎉 <b>SHARTNOMA YAKUNLANDI!</b> ✅\n"
-            text += f"<i>Barcha to'lovlar to'liq amalga oshirildi.</i>\n"
+        if contract.is_completed:
+            add(_COMPLETED)
 
-        text += "\n━━━━━━━━━━━━━━━━━━━━"
+        add(FOOTER)
 
-        return text
+        return out.render()
 
     except Exception as e:
         from loguru import logger
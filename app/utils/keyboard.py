@@ -30,8 +30,11 @@ def contract_list_keyboard(contracts: list, callback_prefix: str = "contract"):
 
     # Har bir shartnoma uchun button
     for c in contracts:
-        # ERPNext API dan contract_id keladi
-        cid = c.get("contract_id") or c.get("id") or c.get("name")
+        # ERPNext API dan contract_id keladi (Contract modeli yoki xom dict)
+        if isinstance(c, dict):
+            cid = c.get("contract_id") or c.get("id") or c.get("name")
+        else:
+            cid = c.contract_id
         if cid:
             buttons.append([
                 InlineKeyboardButton(
@@ -0,0 +1,68 @@
+"""
+Message helpers - uzun xabarlarni yuborish va yuborilganlarni yangilash
+
+- answer_long / answer_parts - Telegram 4096 limitidan uzun xabar bo'laklab
+  yuboriladi (app/utils/chunker.py), keyboard oxirgi bo'lakda
+- edit_or_resend - stale-while-revalidate: handler cache'dagi eskirgan
+  ma'lumotni darhol ko'rsatadi, background'da yangisi kelganda shu xabar
+  tahrirlanadi
+"""
+
+from typing import Sequence
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from loguru import logger
+
+from app.utils.chunker import split_message
+from app.utils.keyboard import main_menu_keyboard
+
+
+async def answer_parts(message: Message, parts: Sequence[str], reply_markup=None, **kwargs) -> Message:
+    """
+    Oldindan bo'laklangan xabarni ketma-ket yuborish.
+
+    Keyboard faqat oxirgi bo'lakka qo'yiladi (menyu xabar ostida qoladi).
+
+    Returns:
+        Message: Oxirgi yuborilgan bo'lak
+    """
+    for part in parts[:-1]:
+        await message.answer(part, **kwargs)
+    return await message.answer(parts[-1], reply_markup=reply_markup, **kwargs)
+
+
+async def answer_long(message: Message, text: str, reply_markup=None, **kwargs) -> Message:
+    """
+    Xabarni kerak bo'lsa bo'laklab yuborish - limitdan oshgani uchun
+    rad etilgan so'rov (va qayta urinish) bo'lmaydi.
+
+    Returns:
+        Message: Oxirgi yuborilgan bo'lak
+    """
+    return await answer_parts(message, split_message(text), reply_markup=reply_markup, **kwargs)
+
+
+async def edit_or_resend(message: Message, text: str) -> Message:
+    """
+    Xabar matnini joyida (in place) yangilash.
+
+    Telegram ba'zi xabarlarni tahrirlashga ruxsat bermaydi (juda eski,
+    reply keyboard bilan yuborilgan va h.k.) - unda yangi xabar yuboriladi.
+    Yangi matn bitta xabarga sig'masa ham - bo'laklab qayta yuboriladi.
+
+    Returns:
+        Message: Tahrirlangan yoki yangi yuborilgan xabar
+    """
+    parts = split_message(text)
+    if len(parts) > 1:
+        return await answer_parts(message, parts, reply_markup=main_menu_keyboard())
+
+    try:
+        edited = await message.edit_text(text)
+        return edited if isinstance(edited, Message) else message
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return message
+        logger.warning(f"Message edit failed, resending: {e}")
+        return await answer_parts(message, parts, reply_markup=main_menu_keyboard())
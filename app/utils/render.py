@@ -0,0 +1,193 @@
+"""
+Render - Telegram HTML xabarlarini yig'ish (builder)
+
+Formatter'lar ilgari `text += f"..."` bilan yozilgan edi: har bir qo'shish
+yangi satr yaratadi va butun matnni nusxalaydi - uzun to'lovlar tarixi /
+jadvalda (yuzlab qator) bu kvadratik. Builder bo'laklarni ro'yxatga yig'adi
+va oxirida bitta "".join qiladi.
+
+Tarkibi:
+- RULE, FOOTER - "━━━━" chiziq va xabar yakuni
+- header() / section() - sarlavha bloklari (o'zgarmas sarlavhalar modul
+  darajasida bir marta yig'iladi, masalan `_PRODUCTS = section("🛍 ...")`)
+- Builder - bo'laklar ro'yxati: add(), extend(), render()
+- render_cache / cached_render - tayyor xabarlar cache'i: mijoz bir xil
+  ma'lumot bilan menyuni qayta ochsa formatlash umuman bajarilmaydi
+
+Example:
+    >>> out = Builder(header("📄 <b>SHARTNOMA</b>"))
+    >>> out.add(f"🔖 <b>ID:</b> <code>{contract_id}</code>\\n")
+    >>> out.extend(_row(p) for p in payments)
+    >>> out.add(FOOTER)
+    >>> text = out.render()
+"""
+
+import functools
+import hashlib
+import marshal
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from loguru import logger
+
+from app.config import config
+
+RULE = "━━━━━━━━━━━━━━━━━━━━"
+FOOTER = f"\n{RULE}"
+
+
+def header(title: str) -> str:
+    """Xabar boshidagi sarlavha bloki (oldida bo'sh qator yo'q)."""
+    return f"{RULE}\n{title}\n{RULE}\n\n"
+
+
+def section(title: str) -> str:
+    """Xabar o'rtasidagi bo'lim sarlavhasi (oldingi blokdan bo'sh qator bilan)."""
+    return f"\n{RULE}\n{title}\n{RULE}\n\n"
+
+
+class Builder:
+    """
+    Xabar bo'laklari - oxirida bitta join.
+
+    add - list.append'ning o'zi (sikllarda atribut qidiruvisiz chaqiriladi).
+    """
+
+    __slots__ = ("parts", "add")
+
+    def __init__(self, *parts: str):
+        self.parts: List[str] = list(parts)
+        self.add = self.parts.append
+
+    def extend(self, parts: Iterable[str]) -> None:
+        self.parts.extend(parts)
+
+    def render(self) -> str:
+        return "".join(self.parts)
+
+
+# ============================================================================
+# RENDERED MESSAGE CACHE
+# ============================================================================
+# Kalit - view nomi + normallashtirilgan payload'ning hash'i. Normallashtirish
+# har bir view uchun alohida (key funksiya): faqat xabarda ko'rinadigan
+# maydonlar, oddiy tuple'larga yig'iladi - butun javobni hash'lash
+# formatlashning o'zidan qimmatga tushadi.
+
+Rendered = Union[str, Tuple[str, ...]]   # matn yoki bo'laklar (split qilingan xabar)
+T = TypeVar("T", bound=Rendered)
+
+
+def fingerprint(payload: tuple) -> bytes:
+    """
+    Normallashtirilgan payload (str/int/float/bool/None va tuple'lar) hash'i.
+
+    marshal 2-versiya - obyekt havolalari (refs) yozilmaydi, shuning uchun bir
+    xil qiymatlar har doim bir xil baytlarga aylanadi.
+    """
+    return hashlib.blake2b(marshal.dumps(payload, 2), digest_size=16).digest()
+
+
+class RenderCache:
+    """
+    LRU: (view, fingerprint) -> tayyor matn yoki bo'laklar tuple'i.
+
+    Cheklovlar: yozuvlar soni (max_entries) va jami belgilar (max_chars) -
+    qaysi biri oshsa, eng eski yozuvlar chiqariladi.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_chars: int = 4_000_000, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.enabled = enabled
+        self.chars = 0
+        self._data: "OrderedDict[Tuple[str, bytes], Tuple[Rendered, int]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def render(self, view: str, payload: Optional[tuple], build: Callable[[], T]) -> T:
+        """
+        Cache'dan olish yoki build() bilan yasab saqlash.
+
+        payload None bo'lsa (normallashtirib bo'lmadi) - cache'siz build().
+        """
+        if not self.enabled or payload is None:
+            return build()
+
+        try:
+            key = (view, fingerprint(payload))
+        except ValueError:
+            # Payload'da marshal qila olmaydigan tur - cache'siz
+            logger.debug(f"Render cache: unhashable payload for {view}")
+            return build()
+
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        value = build()
+        self._put(key, value)
+        return value
+
+    def _put(self, key: Tuple[str, bytes], value: Rendered):
+        size = len(value) if isinstance(value, str) else sum(map(len, value))
+        if size > self.max_chars:
+            return
+
+        self._data[key] = (value, size)
+        self.chars += size
+
+        while len(self._data) > self.max_entries or self.chars > self.max_chars:
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.chars -= evicted
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._data.clear()
+        self.chars = 0
+
+
+render_cache = RenderCache(
+    max_entries=config.render_cache.max_entries,
+    max_chars=config.render_cache.max_chars,
+    enabled=config.render_cache.enabled,
+)
+
+
+def cache_key(func: Callable[..., Optional[tuple]]) -> Callable[..., Optional[tuple]]:
+    """Key funksiya xato bersa (kutilmagan shakldagi ma'lumot) - None, ya'ni cache'siz."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.debug(f"Render cache key failed ({func.__name__}): {e}")
+            return None
+
+    return wrapper
+
+
+def cached_render(view: str, key: Callable[..., Optional[tuple]]):
+    """
+    Formatter'ni render_cache orqali o'tkazish.
+
+    key - formatter bilan bir xil argumentlarni oladi va normallashtirilgan
+    payload qaytaradi (xabarga ta'sir qiladigan barcha maydonlar!). Asl
+    funksiya `.uncached` atributida qoladi (benchmark va solishtirish uchun).
+    """
+    key = cache_key(key)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return render_cache.render(view, key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
@@ -4,6 +4,7 @@ from loguru import logger
 
 from app.loader import bot, dp, on_startup, on_shutdown
 from app.config import config
+from app.services.erpnext_api import refresh_customer_cache
 
 app = FastAPI(
     title="ERPNext Telegram Bot",
@@ -94,6 +95,18 @@ async def payment_entry_webhook(request: Request):
         posting_date = data.get("posting_date", "")
         payment_method = data.get("mode_of_payment", "Naqd")
 
+        # ✅ Cache invalidation - to'lovdan keyin mijoz yangi balansni darhol ko'rishi uchun
+        # (telegram_id bo'lmasa ham - customer va contract bo'yicha o'chiramiz)
+        try:
+            removed = await refresh_customer_cache(
+                telegram_id=telegram_id,
+                customer_id=customer if customer != "—" else None,
+                contract_ids=[contract] if contract != "—" else [],
+            )
+            logger.info(f"🧹 Cache invalidated for {customer}/{contract}: {removed} entries")
+        except Exception as cache_err:
+            logger.error(f"❌ Cache invalidation error for {pe_name}: {cache_err}")
+
         # ✅ Telegram ID tekshirish
         if not telegram_id:
             logger.warning(f"⚠️ Payment {pe_name}: Customer {customer} has no telegram_id")
@@ -0,0 +1,7 @@
+"""
+Benchmarks - ERPNext bot performance o'lchovlari
+
+Barcha skriptlar loyiha ildizidan ishga tushiriladi:
+
+    python -m benchmarks.http_transport
+"""
@@ -0,0 +1,131 @@
+"""
+Broadcast benchmark - process_reminders (app/services/reminders.py) butunligicha
+
+Stub Frappe server (--customers ta eslatma) va fake Telegram Bot API
+(Telegram flood limit'lari bilan: chatga 1 msg/s, jami 30 msg/s)
+subprocess sifatida ko'tariladi, so'ng process_reminders bir marta ishlaydi.
+
+Natija:
+- wall - ERPNext so'rovidan oxirgi xabargacha
+- msg/s - fake Telegram qabul qilgan xabarlar / wall
+- flood - 429 javoblar soni (limitlar to'g'ri ishlasa - 0)
+- first - birinchi xabargacha vaqt (ro'yxat sahifalab olinadi: --page-size)
+
+Ishga tushirish:
+    python -m benchmarks.broadcast --customers 2000
+    python -m benchmarks.broadcast --customers 2000 --telegram-latency-ms 150 --workers 32
+    python -m benchmarks.broadcast --customers 20000 --page-size 1000000   # bitta sahifa
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.http_transport import _free_port, _server_stats, _wait_ready
+from benchmarks.load_test import _spawn
+
+
+async def run(args, erp_url: str, telegram_url: str):
+    # Env tayyor bo'lgandan keyingina app import qilinadi (config import paytida o'qiladi)
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from app.services.erpnext_api import close_http_client
+    from app.services.reminders import process_reminders
+
+    bot = Bot(
+        token=os.environ["BOT_TOKEN"],
+        session=AiohttpSession(api=TelegramAPIServer.from_base(telegram_url)),
+        default=DefaultBotProperties(parse_mode="HTML"),
+    )
+
+    await _server_stats(telegram_url, reset=True)
+    started = time.perf_counter()
+    task = asyncio.create_task(process_reminders(bot))
+
+    # Birinchi xabar qachon yetib keldi (fake Telegram statistikasi bo'yicha)
+    first = None
+    while not task.done() and first is None:
+        await asyncio.sleep(0.05)
+        if ((await _server_stats(telegram_url)) or {}).get("messages"):
+            first = time.perf_counter() - started
+    await task
+    wall = time.perf_counter() - started
+
+    telegram = await _server_stats(telegram_url) or {}
+    messages = telegram.get("messages", 0)
+    print(
+        f"\n{args.customers} reminders, page size {args.page_size}, {args.workers or 'default'} workers, "
+        f"telegram latency {args.telegram_latency_ms:.0f}ms\n"
+        f"wall {wall:.2f}s, first message {first or wall:.2f}s, {messages} messages, "
+        f"{messages / wall:.1f} msg/s, {telegram.get('flood', 0)} flood (429)"
+    )
+
+    await bot.session.close()
+    await close_http_client()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="process_reminders broadcast benchmark")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=0, help="BROADCAST_WORKERS (0 - config default)")
+    parser.add_argument("--page-size", type=int, default=500, help="REMINDER_PAGE_SIZE")
+    parser.add_argument("--erp-latency-ms", type=float, default=200.0)
+    parser.add_argument("--telegram-latency-ms", type=float, default=80.0)
+    parser.add_argument("--chat-rate", type=int, default=1, help="Fake Telegram: chatga soniyasiga")
+    parser.add_argument("--global-rate", type=int, default=30, help="Fake Telegram: jami soniyasiga")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    erp_port, telegram_port = _free_port(), _free_port()
+    erp_url = f"http://127.0.0.1:{erp_port}"
+    telegram_url = f"http://127.0.0.1:{telegram_port}"
+
+    os.environ["ERP_BASE_URL"] = erp_url
+    os.environ["ERP_CACHE_ENABLED"] = "false"
+    os.environ["REMINDER_PAGE_SIZE"] = str(args.page_size)
+    if args.workers:
+        os.environ["BROADCAST_WORKERS"] = str(args.workers)
+    for key, value in {
+        "BOT_TOKEN": "123456:BROADCAST", "BOT_NAME": "broadcast_bot", "ERP_API_KEY": "key",
+        "ERP_API_SECRET": "secret", "WEBHOOK_URL": "http://127.0.0.1", "WEBHOOK_PATH": "/webhook",
+        "HOST": "127.0.0.1",
+    }.items():
+        os.environ.setdefault(key, value)
+
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    servers = [
+        _spawn(
+            "benchmarks.stub_server", erp_port,
+            "--latency-ms", str(args.erp_latency_ms), "--customers", str(args.customers),
+        ),
+        _spawn(
+            "benchmarks.fake_telegram", telegram_port,
+            "--latency-ms", str(args.telegram_latency_ms),
+            "--chat-rate", str(args.chat_rate), "--global-rate", str(args.global_rate),
+        ),
+    ]
+
+    async def _main():
+        await _wait_ready(erp_url)
+        await _wait_ready(telegram_url)
+        await run(args, erp_url, telegram_url)
+
+    try:
+        asyncio.run(_main())
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
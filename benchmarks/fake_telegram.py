@@ -0,0 +1,189 @@
+"""
+Fake Telegram Bot API - load test'lar uchun api.telegram.org o'rnini bosuvchi server
+
+aiogram.Bot'ni shu serverga yo'naltirish:
+    >>> from aiogram.client.session.aiohttp import AiohttpSession
+    >>> from aiogram.client.telegram import TelegramAPIServer
+    >>> session = AiohttpSession(api=TelegramAPIServer.from_base("http://127.0.0.1:8766"))
+    >>> bot = Bot(token="123456:TEST", session=session)
+
+- /bot<token>/<method> - {"ok": true, "result": ...}: send*/edit* uchun
+  sintetik Message, getMe uchun User, qolganlari uchun True
+- --chat-rate / --global-rate - Telegram flood limit'lari (1 soniyalik oyna,
+  oshsa 429 + retry_after); 0 - cheklovsiz
+- /__stats, /__reset - metodlar, yuborilgan xabarlar, 429 javoblar soni
+
+Ishga tushirish:
+    python -m benchmarks.fake_telegram --port 8766 --latency-ms 30
+    python -m benchmarks.fake_telegram --chat-rate 1 --global-rate 30
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "LoadTest", "username": "load_test_bot"}
+
+# Message qaytaradigan metodlar (flood limit ham shularga qo'llanadi)
+MESSAGE_METHODS = {
+    "sendmessage", "sendphoto", "senddocument", "sendvideo", "sendaudio",
+    "sendvoice", "sendanimation", "sendsticker", "sendlocation", "sendcontact",
+    "editmessagetext", "editmessagecaption", "editmessagereplymarkup",
+    "copymessage", "forwardmessage",
+}
+
+
+@dataclass
+class FakeTelegramSettings:
+    """Fake Telegram server sozlamalari."""
+    latency_ms: float = 30.0
+    chat_rate: int = 0      # bitta chatga soniyasiga xabarlar (0 - cheklovsiz)
+    global_rate: int = 0    # barcha chatlarga soniyasiga xabarlar (0 - cheklovsiz)
+
+
+class _Window:
+    """Oxirgi 1 soniyadagi hodisalar (sliding window)."""
+
+    __slots__ = ("events",)
+
+    def __init__(self):
+        self.events: Deque[float] = deque()
+
+    def retry_after(self, now: float, limit: int) -> Optional[int]:
+        """Limit oshgan bo'lsa - necha soniyadan keyin (aks holda hodisa yoziladi)."""
+        while self.events and now - self.events[0] >= 1.0:
+            self.events.popleft()
+        if len(self.events) >= limit:
+            return max(1, math.ceil(1.0 - (now - self.events[0])))
+        self.events.append(now)
+        return None
+
+
+async def _fields(request: Request) -> Dict[str, Any]:
+    """Metod parametrlari (aiogram fayl'siz so'rovlarni urlencoded yuboradi)."""
+    params: Dict[str, Any] = dict(request.query_params)
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+    if "json" in content_type and body:
+        params.update(await request.json())
+    elif "urlencoded" in content_type and body:
+        params.update(parse_qsl(body.decode(), keep_blank_values=True))
+    return params
+
+
+def _chat(value: Any) -> Dict[str, Any]:
+    try:
+        chat_id = int(value)
+    except (TypeError, ValueError):
+        return {"id": 0, "type": "channel", "username": str(value).lstrip("@")}
+    return {"id": chat_id, "type": "private" if chat_id > 0 else "group", "first_name": f"User {chat_id}"}
+
+
+def create_app(settings: Optional[FakeTelegramSettings] = None) -> FastAPI:
+    """Fake Bot API ASGI app."""
+    settings = settings or FakeTelegramSettings()
+
+    app = FastAPI()
+    app.state.methods = Counter()
+    app.state.messages = 0
+    app.state.flood = 0
+    app.state.chats = set()
+    app.state.message_ids = defaultdict(int)
+    app.state.windows = defaultdict(_Window)
+    app.state.global_window = _Window()
+
+    @app.get("/__stats")
+    async def stats():
+        return {
+            "methods": dict(app.state.methods),
+            "messages": app.state.messages,
+            "flood": app.state.flood,
+            "chats": len(app.state.chats),
+            "settings": asdict(settings),
+        }
+
+    @app.post("/__reset")
+    async def reset():
+        app.state.methods.clear()
+        app.state.messages = 0
+        app.state.flood = 0
+        app.state.chats.clear()
+        app.state.windows.clear()
+        app.state.global_window = _Window()
+        return {"ok": True}
+
+    @app.api_route("/bot{token}/{method}", methods=["GET", "POST"])
+    async def bot_method(token: str, method: str, request: Request):
+        fields = await _fields(request)
+        name = method.lower()
+        app.state.methods[method] += 1
+
+        if settings.latency_ms:
+            await asyncio.sleep(settings.latency_ms / 1000)
+
+        if name not in MESSAGE_METHODS:
+            if name == "getme":
+                return {"ok": True, "result": BOT_USER}
+            return {"ok": True, "result": True}
+
+        chat = _chat(fields.get("chat_id"))
+        now = time.monotonic()
+        retry_after = None
+        if settings.chat_rate:
+            retry_after = app.state.windows[chat["id"]].retry_after(now, settings.chat_rate)
+        if retry_after is None and settings.global_rate:
+            retry_after = app.state.global_window.retry_after(now, settings.global_rate)
+        if retry_after is not None:
+            app.state.flood += 1
+            return JSONResponse({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, status_code=429)
+
+        app.state.messages += 1
+        app.state.chats.add(chat["id"])
+
+        if name.startswith("edit"):
+            message_id = int(fields.get("message_id") or 0)
+        else:
+            app.state.message_ids[chat["id"]] += 1
+            message_id = app.state.message_ids[chat["id"]]
+
+        message = {"message_id": message_id, "date": int(time.time()), "chat": chat, "from": BOT_USER}
+        if fields.get("text"):
+            message["text"] = fields["text"]
+        return {"ok": True, "result": message}
+
+    return app
+
+
+def serve(host: str, port: int, settings: FakeTelegramSettings):
+    import uvicorn
+    uvicorn.run(create_app(settings), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_TELEGRAM_PORT", 8766)))
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--chat-rate", type=int, default=0, help="Chatga soniyasiga xabarlar (0 - cheklovsiz)")
+    parser.add_argument("--global-rate", type=int, default=0, help="Soniyasiga jami xabarlar (0 - cheklovsiz)")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, FakeTelegramSettings(
+        latency_ms=args.latency_ms,
+        chat_rate=args.chat_rate,
+        global_rate=args.global_rate,
+    ))
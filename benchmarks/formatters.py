@@ -0,0 +1,282 @@
+"""
+Formatter microbenchmark - app/utils/formatters.py
+
+Har bir menyu bosilganda ishlaydigan formatter'lar (va contract_menu
+xabari - app/handlers/contract.py::_render_contract) sintetik ma'lumotlarda
+(1-50 shartnoma, 0-500 to'lov, 1-20 mahsulot) o'lchanadi:
+- us/call - bitta chaqiruv (timeit, eng yaxshi takror)
+- peak KB - tracemalloc bo'yicha eng yuqori xotira (alohida o'tishda)
+- out KB - natija matni hajmi
+
+Formatlashning o'zi o'lchanadi (render cache chetlab o'tiladi - `.uncached`);
+oxirida katta holatlar uchun cache hit narxi (kalit + hash + lookup)
+alohida ko'rsatiladi.
+
+Natijalar baseline sifatida JSON'ga saqlanadi va keyingi o'lchovlar u bilan
+solishtiriladi (ratio > --threshold bo'lsa - regressiya, exit code 1).
+
+Ishga tushirish:
+    python -m benchmarks.formatters                    # baseline bilan solishtirish
+    python -m benchmarks.formatters --save             # yangi baseline yozish
+    python -m benchmarks.formatters --only detailed    # faqat bitta formatter
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.handlers.contract import _contract_key, _render_contract
+from app.services.models import Contract, Customer, parse_payments, parse_products, parse_schedule
+from app.utils import formatters
+from app.utils.render import RenderCache
+from benchmarks.payloads import contract, schedule_rows
+
+BASELINE = Path(__file__).parent / "baselines" / "formatters.json"
+
+CONTRACTS = (1, 10, 50)
+PRODUCTS = (1, 5, 20)
+PAYMENTS = (0, 50, 500)
+MONTHS = (12, 60)
+
+
+# ============================================================================
+# SINTETIK MA'LUMOTLAR (handler'lar formatter'ga beradigan shaklda)
+# ============================================================================
+
+def _contract_dict(rng: random.Random, index: int, products: int, payments: int) -> Dict[str, Any]:
+    item = contract(rng, index, products, payments)
+    # Har 20-to'lov - qaytarish (Pay), formatter'larning ikkinchi shoxi ham ishlasin
+    for n, payment in enumerate(item["payments_history"]):
+        if n % 20 == 19:
+            payment["payment_type"] = "Pay"
+            payment["amount"] = -payment["amount"]
+    return item
+
+
+def profile_case(contracts: int) -> Tuple[Any, ...]:
+    rng = random.Random(contracts)
+    items = [_contract_dict(rng, i, 3, 12) for i in range(1, contracts + 1)]
+    data = {
+        "success": True,
+        "customer": Customer.from_dict({
+            "customer_id": "CUST-00001",
+            "customer_name": "Alisher Navoiy (Toshkent)",
+            "phone": "998901234567",
+            "passport": "AB1234567",
+            "classification": "A",
+        }),
+        "contracts": [Contract.from_dict(c) for c in items],
+        "next_payments": [{**c["next_payment"], "contract_id": c["contract_id"]} for c in items],
+    }
+    return (data,)
+
+
+def contract_case(products: int) -> Tuple[Any, ...]:
+    return (Contract.from_dict(_contract_dict(random.Random(products), 1, products, 12)),)
+
+
+def payment_history_case(payments: int) -> Tuple[Any, ...]:
+    item = _contract_dict(random.Random(payments), 1, 1, payments)
+    payments_list = parse_payments(item["payments_history"])
+    return ({"success": True, "payments": payments_list, "total_payments": len(payments_list)},)
+
+
+def history_with_products_case(products: int, payments: int) -> Tuple[Any, ...]:
+    item = _contract_dict(random.Random(products * 1000 + payments), 1, products, payments)
+    payments_list = parse_payments(item["payments_history"])
+    return ({
+        "success": True,
+        "contract": Contract.from_dict(item),
+        "products": parse_products(item["products"]),
+        "payments": payments_list,
+        "total_paid": item["paid"],
+        "total_payments": len(payments_list),
+    },)
+
+
+def detailed_case(products: int, payments: int, months: int = 12) -> Tuple[Any, ...]:
+    rng = random.Random(products * 1000 + payments)
+    item = _contract_dict(rng, 1, products, payments)
+    payments_list = parse_payments(item["payments_history"])
+    contract_data = {
+        "success": True,
+        "contract": Contract.from_dict(item),
+        "products": parse_products(item["products"]),
+        "payments": payments_list,
+        "total_payments": len(payments_list),
+    }
+    schedule_data = {"success": True, "schedule": parse_schedule(schedule_rows(rng, months, 125.0))}
+    history_data = {"payments": payments_list, "total_payments": len(payments_list)}
+    return contract_data, schedule_data, history_data
+
+
+def contract_card_case(products: int, months: int) -> Tuple[Any, ...]:
+    rng = random.Random(products * 1000 + months)
+    schedule = parse_schedule(schedule_rows(rng, months, 125.0))
+    return (
+        Contract.from_dict(_contract_dict(rng, 1, products, 12)),
+        {"success": True, "schedule": schedule},
+    )
+
+
+def schedule_case(months: int) -> Tuple[Any, ...]:
+    rng = random.Random(months)
+    rows = parse_schedule(schedule_rows(rng, months, 125.0))
+    return ({"success": True, "contract_id": "CON-2025-00001", "schedule": rows, "total_months": months},)
+
+
+def _uncached(func: Callable[..., str]) -> Callable[..., str]:
+    return getattr(func, "uncached", func)
+
+
+def cases() -> List[Tuple[str, Callable[..., str], Tuple[Any, ...]]]:
+    """(nom, formatter, argumentlar) - barcha o'lchanadigan holatlar."""
+    return [(name, _uncached(func), args) for name, func, args in _cases()]
+
+
+def _cases() -> List[Tuple[str, Callable[..., str], Tuple[Any, ...]]]:
+    items = []
+    for n in CONTRACTS:
+        items.append((f"profile[contracts={n}]", formatters.format_customer_profile, profile_case(n)))
+    for p in PRODUCTS:
+        items.append((f"contract[products={p}]", formatters.format_contract_with_products, contract_case(p)))
+    for m in MONTHS:
+        items.append((f"schedule[months={m}]", formatters.format_payment_schedule, schedule_case(m)))
+    for p in PRODUCTS:
+        for m in MONTHS:
+            items.append((f"contract_menu[products={p},months={m}]", _render_contract, contract_card_case(p, m)))
+    for n in PAYMENTS:
+        items.append((f"payment_history[payments={n}]", formatters.format_payment_history, payment_history_case(n)))
+    for p in PRODUCTS:
+        for n in PAYMENTS:
+            items.append((
+                f"history_with_products[products={p},payments={n}]",
+                formatters.format_payment_history_with_products,
+                history_with_products_case(p, n),
+            ))
+    for p in PRODUCTS:
+        for n in PAYMENTS:
+            items.append((
+                f"detailed[products={p},payments={n}]",
+                formatters.format_detailed_payment_history,
+                detailed_case(p, n),
+            ))
+    return items
+
+
+# ============================================================================
+# O'LCHASH
+# ============================================================================
+
+def measure(func: Callable[..., str], args: Tuple[Any, ...], repeat: int = 5) -> Dict[str, float]:
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    output = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "us": round(best * 1e6, 2),
+        "peak_kb": round(peak / 1024, 1),
+        "out_kb": round(len(output.encode()) / 1024, 1),
+    }
+
+
+def cache_hits(only: Optional[str]):
+    """Render cache: miss (formatlash) va hit (kalit + hash + lookup) narxi."""
+    cache = RenderCache()
+    # (nom, formatlash, cache kaliti, argumentlar) - handler'lardagi kabi
+    items = [
+        ("profile[contracts=50]", formatters.format_customer_profile.uncached,
+         formatters._profile_key, profile_case(50)),
+        ("contract_menu[products=20,months=60]", _render_contract.uncached,
+         _contract_key, contract_card_case(20, 60)),
+        ("detailed[products=20,payments=500]", formatters.format_detailed_payment_history,
+         formatters.detailed_payment_history_key, detailed_case(20, 500)),
+    ]
+
+    print(f"\n{'render cache':<50} {'miss us':>10} {'hit us':>9} {'speedup':>8}")
+    for name, render, key, args in items:
+        if only and not name.startswith(only):
+            continue
+
+        def hit():
+            return cache.render(name, key(*args), lambda: render(*args))
+
+        hit()
+        miss_us = min(timeit.repeat(lambda: render(*args), number=20, repeat=5)) / 20 * 1e6
+        hit_us = min(timeit.repeat(hit, number=20, repeat=5)) / 20 * 1e6
+        print(f"{name:<50} {miss_us:>10.1f} {hit_us:>9.1f} {miss_us / hit_us:>7.1f}x")
+
+
+def run(only: Optional[str], baseline: Optional[Dict[str, Any]], threshold: float) -> Tuple[Dict[str, Any], int]:
+    results: Dict[str, Dict[str, float]] = {}
+    regressions = 0
+    previous = (baseline or {}).get("results", {})
+
+    print(f"{'case':<50} {'us/call':>10} {'peak KB':>9} {'out KB':>8} {'vs base':>8}")
+    for name, func, args in cases():
+        if only and not name.startswith(only):
+            continue
+        result = measure(func, args)
+        results[name] = result
+
+        ratio = ""
+        if name in previous and previous[name]["us"]:
+            value = result["us"] / previous[name]["us"]
+            ratio = f"{value:.2f}x"
+            if value > threshold:
+                ratio += " !"
+                regressions += 1
+        print(f"{name:<50} {result['us']:>10.1f} {result['peak_kb']:>9.1f} {result['out_kb']:>8.1f} {ratio:>8}")
+
+    cache_hits(only)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(terse=True),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    return report, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Formatter microbenchmark")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="Baseline JSON fayli")
+    parser.add_argument("--save", action="store_true", help="Natijani baseline sifatida yozish")
+    parser.add_argument("--only", help="Faqat shu prefiks bilan boshlanuvchi holatlar (masalan, detailed)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Regressiya chegarasi (ratio)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text())
+
+    report, regressions = run(args.only, baseline, args.threshold)
+
+    if args.save:
+        if args.only and args.baseline.exists():
+            # Qisman o'lchov - qolgan holatlar eski baseline'dan
+            merged = json.loads(args.baseline.read_text())
+            merged["results"].update(report["results"])
+            merged["meta"] = report["meta"]
+            report = merged
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"\nBaseline saqlandi: {args.baseline}")
+    elif regressions:
+        print(f"\n{regressions} ta holat baseline'dan {args.threshold}x dan sekin")
+        sys.exit(1)
@@ -0,0 +1,189 @@
+"""
+HTTP/1.1 pool vs HTTP/2 - ERPNext client transport benchmark
+
+Fan-out ssenariysi: `concurrency` ta parallel get_payment_schedule so'rovi
+(contract_menu / broadcast paytidagi kabi). Har bir rejim uchun:
+- p50 / p95 / p99 latency
+- throughput (req/s)
+- server tomonida ochilgan TCP ulanishlar soni
+
+Ishga tushirish (local stub server avtomatik ko'tariladi):
+    python -m benchmarks.http_transport --requests 2000 --concurrency 50
+
+Haqiqiy (TLS) server bilan:
+    python -m benchmarks.http_transport --base-url https://erp.example.com
+
+Local stub'da HTTP/2 uchun `h2` va `hypercorn` kerak (h2c prior knowledge).
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.services.http_transport import HTTP2_AVAILABLE, build_http_client, warm_up
+
+
+SCHEDULE_PATH = "/api/method/cash_flow_app.cash_flow_management.api.telegram_bot_api.get_payment_schedule"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Oddiy nearest-rank percentile (values - tartiblangan)."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(base_url: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/__stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Stub server ishga tushmadi: {base_url}")
+
+
+async def _server_stats(base_url: str, reset: bool = False) -> Optional[Dict[str, int]]:
+    """Stub server statistikasi (haqiqiy serverda - None)."""
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as control:
+            if reset:
+                await control.post("/__reset")
+                return None
+            response = await control.get("/__stats")
+            return response.json() if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+async def run_mode(
+    base_url: str,
+    http2: bool,
+    total: int,
+    concurrency: int,
+    warmup_connections: int,
+) -> Dict[str, object]:
+    """Bitta transport rejimini o'lchash."""
+    client = build_http_client(
+        base_url=base_url,
+        http2=http2,
+        prior_knowledge=base_url.startswith("http://"),
+        max_connections=100,
+        max_keepalive_connections=20,
+    )
+
+    await _server_stats(base_url, reset=True)
+    await warm_up(client, connections=warmup_connections, http2=http2)
+
+    latencies: List[float] = []
+    versions: Counter = Counter()
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(SCHEDULE_PATH, params={"contract_id": f"CON-{i % 500:05d}"})
+                response.json()
+                versions[response.http_version] += 1
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+
+    await client.aclose()
+    stats = await _server_stats(base_url)
+
+    latencies.sort()
+    return {
+        "mode": "http2" if http2 else "http1.1",
+        "versions": dict(versions),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "connections": stats.get("connections") if stats else None,
+    }
+
+
+def print_report(results: List[Dict[str, object]]):
+    header = f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'conns':>6} {'errors':>7}  versions"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        conns = "-" if r["connections"] is None else r["connections"]
+        print(
+            f"{r['mode']:<8} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['rps']:>9.1f} {conns:>6} {r['errors']:>7}  {r['versions']}"
+        )
+
+
+async def main(args):
+    server = None
+    base_url = args.base_url
+
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.stub_server",
+            "--port", str(port), "--latency-ms", str(args.latency_ms),
+        ])
+
+    try:
+        if server is not None:
+            await _wait_ready(base_url)
+
+        modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+        results = []
+        for mode in modes:
+            http2 = mode == "http2"
+            if http2 and not HTTP2_AVAILABLE:
+                print("http2: 'h2' o'rnatilmagan - o'tkazib yuborildi (pip install h2)")
+                continue
+            results.append(await run_mode(
+                base_url, http2, args.requests, args.concurrency, args.warmup_connections,
+            ))
+
+        print(f"\n{args.requests} requests, concurrency={args.concurrency}, server={base_url}\n")
+        print_report(results)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ERPNext HTTP transport benchmark")
+    parser.add_argument("--base-url", default=None, help="Bo'sh bo'lsa - local stub server")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub server kechikishi")
+    parser.add_argument("--warmup-connections", type=int, default=4)
+    parser.add_argument("--modes", default="http1,http2")
+    asyncio.run(main(parser.parse_args()))
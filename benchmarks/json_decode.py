@@ -0,0 +1,84 @@
+"""
+JSON decode microbenchmark - ERPNext javoblari uchun
+
+Har bir payload fixture uchun decode vaqti (µs / javob):
+- httpx .json() - avvalgi yo'l (erp_request'da response.json())
+- json / orjson / msgspec - o'rnatilganlari
+
+"saved" ustuni - httpx .json() ga nisbatan har bir so'rovda tejalgan CPU.
+
+Ishga tushirish:
+    python -m benchmarks.json_decode
+    python -m benchmarks.json_decode --fixtures benchmarks/fixtures   # yozib olingan javoblar
+"""
+
+import argparse
+import json
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.payloads import fixtures, load_fixtures
+
+
+def decoders() -> List[Tuple[str, Callable[[bytes], object]]]:
+    """O'rnatilgan decoder'lar ro'yxati."""
+    result: List[Tuple[str, Callable[[bytes], object]]] = [("json", json.loads)]
+
+    try:
+        import orjson
+        result.append(("orjson", orjson.loads))
+    except ImportError:
+        pass
+
+    try:
+        import msgspec
+        result.append(("msgspec", msgspec.json.Decoder().decode))
+    except ImportError:
+        pass
+
+    return result
+
+
+def measure(func: Callable[[], object], min_time: float) -> float:
+    """Bitta chaqiruv o'rtacha vaqti (sekund) - timeit autorange + best of 5."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def run(payloads: Dict[str, bytes], min_time: float):
+    available = decoders()
+    names = [name for name, _ in available]
+
+    header = f"{'payload':<26} {'KB':>7} {'httpx.json µs':>14}" + "".join(
+        f" {name + ' µs':>12} {'saved':>7}" for name in names
+    )
+    print(header)
+    print("-" * len(header))
+
+    for fixture_name, raw in payloads.items():
+        response = httpx.Response(200, content=raw, headers={"Content-Type": "application/json"})
+        baseline = measure(response.json, min_time)
+
+        row = f"{fixture_name:<26} {len(raw) / 1024:>7.1f} {baseline * 1e6:>14.1f}"
+        for _, decode in available:
+            elapsed = measure(lambda: decode(raw), min_time)
+            row += f" {elapsed * 1e6:>12.1f} {(baseline - elapsed) / baseline * 100:>6.0f}%"
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ERPNext JSON decode microbenchmark")
+    parser.add_argument("--fixtures", default=None, help="*.json papka (bo'sh - sintetik)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Har bir o'lchov uchun sekund")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        payloads = load_fixtures(args.fixtures)
+    else:
+        payloads = {name: json.dumps(p, ensure_ascii=False).encode() for name, p in fixtures().items()}
+
+    run(payloads, args.min_time)
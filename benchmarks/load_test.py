@@ -0,0 +1,287 @@
+"""
+Handler load test - N ta sintetik foydalanuvchi butun bot orqali
+
+Stub Frappe server (benchmarks/stub_server.py) va fake Telegram Bot API
+(benchmarks/fake_telegram.py) subprocess sifatida ko'tariladi, so'ng
+haqiqiy Dispatcher + register_all_handlers orqali har bir foydalanuvchi
+ssenariysi (Update'lar) dp.feed_update bilan o'ynaladi.
+
+Har bir handler uchun:
+- count / errors
+- p50 / p95 / p99 latency (update kelgandan handler tugaguncha)
+- throughput (shu handler'ning update/s)
+
+Ssenariy qadamlari (--flow, vergul bilan):
+    start, profile, contracts, contract, payments, history, reminders, help
+
+Ishga tushirish:
+    python -m benchmarks.load_test --users 200 --concurrency 50
+    python -m benchmarks.load_test --users 500 --erp-latency-ms 80 --error-rate 0.02
+    python -m benchmarks.load_test --flow start,contracts,contract --contracts 10
+
+Cache: Redis (REDIS_HOST/PORT) mavjud bo'lsa - FSM va response cache
+Redis'da (production kabi), aks holda MemoryStorage va cache o'chiriladi.
+--cache off bilan har doim ERPNext'ga boriladi.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.http_transport import _free_port, _server_stats, _wait_ready, percentile
+from benchmarks.payloads import contract_ids
+
+FIRST_USER_ID = 100000
+
+FLOW_STEPS = {
+    "start": ("message", "/start"),
+    "profile": ("message", "👤 Mening profilim"),
+    "contracts": ("message", "📄 Mening shartnomalarim"),
+    "contract": ("callback", "contract:{contract_id}"),
+    "payments": ("message", "💳 To'lovlar tarixi"),
+    "history": ("callback", "payment:{contract_id}"),
+    "reminders": ("message", "📅 Eslatmalar"),
+    "help": ("message", "❓ Yordam"),
+}
+DEFAULT_FLOW = "start,profile,contracts,contract,payments,history,reminders,help"
+
+
+def _spawn(module: str, port: int, *args: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", module, "--port", str(port), *args],
+        stdout=subprocess.DEVNULL,
+    )
+
+
+class HandlerTimings:
+    """Handler nomi bo'yicha latency'lar va xatolar."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, elapsed: float, failed: bool):
+        self.latencies[name].append(elapsed)
+        if failed:
+            self.errors[name] += 1
+
+    def report(self, wall: float):
+        print(f"{'handler':<24} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'upd/s':>8}")
+        total = 0
+        for name in sorted(self.latencies, key=lambda n: -len(self.latencies[n])):
+            values = sorted(self.latencies[name])
+            total += len(values)
+            print(
+                f"{name:<24} {len(values):>7} {self.errors[name]:>7} "
+                f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f} "
+                f"{percentile(values, 99) * 1000:>9.1f} {len(values) / wall:>8.1f}"
+            )
+        print(f"{'total':<24} {total:>7} {sum(self.errors.values()):>7} {'':>29} {total / wall:>8.1f}")
+
+
+class _HandlerProbe:
+    """Inner middleware: qaysi handler ishlaganini update'ning probe'iga yozadi."""
+
+    async def __call__(self, handler, event, data):
+        probe = data.get("probe")
+        if probe is not None and "handler" in data:
+            probe["handler"] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+
+def _build_update(update_id: int, user_id: int, kind: str, payload: str):
+    from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+    user = User(id=user_id, is_bot=False, first_name=f"User {user_id}")
+    chat = Chat(id=user_id, type="private")
+    now = datetime.now()
+
+    if kind == "message":
+        return Update(
+            update_id=update_id,
+            message=Message(message_id=update_id, date=now, chat=chat, from_user=user, text=payload),
+        )
+
+    message = Message(message_id=update_id, date=now, chat=chat, text="...")
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id), from_user=user, chat_instance=str(user_id), message=message, data=payload,
+        ),
+    )
+
+
+async def _redis_available() -> bool:
+    from redis.asyncio import Redis
+
+    client = Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        socket_connect_timeout=1,
+    )
+    try:
+        await client.ping()
+        return True
+    except Exception:
+        return False
+    finally:
+        await client.aclose()
+
+
+async def run(args, erp_url: str, telegram_url: str, use_redis: bool):
+    # Env tayyor bo'lgandan keyingina app import qilinadi (config import paytida o'qiladi)
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.fsm.storage.memory import MemoryStorage
+
+    from app.handlers import register_all_handlers
+    from app.services.erpnext_api import close_http_client, erp_limiter
+
+    if use_redis:
+        from aiogram.fsm.storage.redis import RedisStorage
+        from app.loader import redis
+        storage = RedisStorage(redis=redis)
+    else:
+        storage = MemoryStorage()
+
+    bot = Bot(
+        token=os.environ["BOT_TOKEN"],
+        session=AiohttpSession(api=TelegramAPIServer.from_base(telegram_url)),
+        default=DefaultBotProperties(parse_mode="HTML"),
+    )
+    dp = Dispatcher(storage=storage)
+    register_all_handlers(dp)
+    probe_middleware = _HandlerProbe()
+    dp.message.middleware(probe_middleware)
+    dp.callback_query.middleware(probe_middleware)
+
+    flow = [step.strip() for step in args.flow.split(",") if step.strip()]
+    unknown = [step for step in flow if step not in FLOW_STEPS]
+    if unknown:
+        raise SystemExit(f"Noma'lum qadam(lar): {', '.join(unknown)}")
+
+    timings = HandlerTimings()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    counter = iter(range(1, 10 ** 9))
+
+    async def user_session(user_id: int):
+        cid = contract_ids(user_id, args.contracts)[0]
+        async with semaphore:
+            for step in flow:
+                kind, payload = FLOW_STEPS[step]
+                update = _build_update(next(counter), user_id, kind, payload.format(contract_id=cid))
+                probe: Dict[str, Any] = {}
+                failed = False
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update, probe=probe)
+                except Exception:
+                    failed = True
+                timings.add(probe.get("handler", f"<{step}>"), time.perf_counter() - started, failed)
+                if args.think_ms:
+                    await asyncio.sleep(args.think_ms / 1000)
+
+    await _server_stats(erp_url, reset=True)
+    await _server_stats(telegram_url, reset=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_session(FIRST_USER_ID + i) for i in range(args.users)))
+    wall = time.perf_counter() - started
+
+    print(
+        f"\n{args.users} users x {len(flow)} steps, concurrency {args.concurrency}, "
+        f"cache {'redis' if use_redis else 'off'}, wall {wall:.2f}s\n"
+    )
+    timings.report(wall)
+
+    erp = await _server_stats(erp_url)
+    telegram = await _server_stats(telegram_url)
+    if erp:
+        print(
+            f"\nERPNext: {erp['requests']} requests, {erp['errors']} errors, "
+            f"{erp['connections']} connections, limiter limit {erp_limiter.limit:.0f}"
+        )
+    if telegram:
+        print(f"Telegram: {telegram['messages']} messages, {telegram['flood']} flood (429), methods {telegram['methods']}")
+
+    await bot.session.close()
+    await close_http_client()
+    if use_redis:
+        await storage.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Handler load test (stub ERPNext + fake Telegram)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50, help="Bir vaqtda faol foydalanuvchilar")
+    parser.add_argument("--flow", default=DEFAULT_FLOW, help="Ssenariy qadamlari (vergul bilan)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Qadamlar orasidagi pauza")
+    parser.add_argument("--cache", choices=["auto", "off"], default="auto")
+    # Stub ERPNext
+    parser.add_argument("--erp-latency-ms", type=float, default=40.0)
+    parser.add_argument("--erp-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--erp-item-latency-ms", type=float, default=0.0, help="Batch so'rovda har bir shartnoma uchun")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--contracts", type=int, default=3)
+    parser.add_argument("--products", type=int, default=2)
+    parser.add_argument("--payments", type=int, default=12)
+    # Fake Telegram
+    parser.add_argument("--telegram-latency-ms", type=float, default=30.0)
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args(argv)
+
+    erp_port, telegram_port = _free_port(), _free_port()
+    erp_url = f"http://127.0.0.1:{erp_port}"
+    telegram_url = f"http://127.0.0.1:{telegram_port}"
+
+    os.environ["ERP_BASE_URL"] = erp_url
+    os.environ.setdefault("BOT_TOKEN", "123456:LOAD-TEST")
+    for key, value in {
+        "BOT_NAME": "load_test_bot", "ERP_API_KEY": "key", "ERP_API_SECRET": "secret",
+        "WEBHOOK_URL": "http://127.0.0.1", "WEBHOOK_PATH": "/webhook", "HOST": "127.0.0.1",
+    }.items():
+        os.environ.setdefault(key, value)
+
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    use_redis = args.cache == "auto" and asyncio.run(_redis_available())
+    if not use_redis:
+        os.environ["ERP_CACHE_ENABLED"] = "false"
+        print("Redis ishlatilmaydi - MemoryStorage, response cache o'chirilgan")
+
+    servers = [
+        _spawn(
+            "benchmarks.stub_server", erp_port,
+            "--latency-ms", str(args.erp_latency_ms), "--jitter-ms", str(args.erp_jitter_ms),
+            "--item-latency-ms", str(args.erp_item_latency_ms),
+            "--error-rate", str(args.error_rate), "--contracts", str(args.contracts),
+            "--products", str(args.products), "--payments", str(args.payments),
+        ),
+        _spawn("benchmarks.fake_telegram", telegram_port, "--latency-ms", str(args.telegram_latency_ms)),
+    ]
+
+    async def _main():
+        await _wait_ready(erp_url)
+        await _wait_ready(telegram_url)   # fake_telegram ham /__stats beradi
+        await run(args, erp_url, telegram_url, use_redis)
+
+    try:
+        asyncio.run(_main())
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
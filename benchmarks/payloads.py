@@ -0,0 +1,416 @@
+"""
+Sintetik ERPNext javoblari (payload fixtures)
+
+Benchmark'lar va stub server uchun haqiqiy ERPNext javoblari shaklidagi
+ma'lumotlar. Generator deterministik (seed) - natijalar solishtiriladigan.
+
+Real javoblarni ham ishlatish mumkin: ERPNext'dan olingan JSON'larni
+papkaga saqlang va benchmark'ga --fixtures bilan bering.
+
+Fixture'larni faylga yozish:
+    python -m benchmarks.payloads --out benchmarks/fixtures
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+PRODUCT_NAMES = [
+    "iPhone 15 Pro Max 256GB",
+    "Samsung Galaxy S24 Ultra",
+    "Xiaomi Redmi Note 13 Pro",
+    "Artel muzlatkich HD 455",
+    "LG kir yuvish mashinasi F2J3",
+    "MacBook Air M2 13\"",
+    "Samsung Smart TV 55\"",
+    "Gree konditsioner 12000 BTU",
+]
+
+METHODS = ["Naqd", "Plastik karta", "Click", "Payme", "Bank o'tkazmasi"]
+
+
+def _date(rng: random.Random, year: int = 2025) -> str:
+    return f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{year}"
+
+
+def schedule_rows(rng: random.Random, months: int, amount: float) -> List[Dict[str, Any]]:
+    paid_months = rng.randint(0, months)
+    rows = []
+    for month in range(1, months + 1):
+        paid = month <= paid_months
+        rows.append({
+            "month": month,
+            "due_date": f"15.{(month - 1) % 12 + 1:02d}.2025",
+            "amount": amount,
+            "paid": amount if paid else 0.0,
+            "outstanding": 0.0 if paid else amount,
+            "status": "paid" if paid else "pending",
+            "status_uz": "To'langan" if paid else "Kutilmoqda",
+            "days_left": None if paid else rng.randint(-10, 60),
+            "is_overdue": False,
+        })
+    return rows
+
+
+def schedule_payload(contract_id: str, months: int = 12, seed: int = 0) -> Dict[str, Any]:
+    """get_payment_schedule javobi (ERPNext "message" ichida)."""
+    rng = random.Random(f"{seed}:{contract_id}")
+    return {"message": {
+        "success": True,
+        "contract_id": contract_id,
+        "schedule": schedule_rows(rng, months, 125.0),
+    }}
+
+
+def contract(rng: random.Random, index: int, products: int, payments: int) -> Dict[str, Any]:
+    items = []
+    for _ in range(products):
+        price = round(rng.uniform(150, 2500), 2)
+        qty = rng.randint(1, 2)
+        items.append({
+            "name": rng.choice(PRODUCT_NAMES),
+            "qty": qty,
+            "price": price,
+            "total_price": round(price * qty, 2),
+            "imei": str(rng.randint(10 ** 14, 10 ** 15 - 1)),
+            "notes": rng.choice(["", "Qora rang", "Kafolat 1 yil", "Sovg'a bilan"]),
+        })
+
+    total = round(sum(p["total_price"] for p in items), 2)
+    history = [
+        {
+            "payment_id": f"PE-{index:03d}{n:03d}",
+            "date": _date(rng),
+            "amount": round(total / max(payments, 1) * 0.8, 2),
+            "method": rng.choice(METHODS),
+            "remarks": rng.choice(["", "Dastlabki to'lov", "Oylik to'lov"]),
+        }
+        for n in range(payments)
+    ]
+    paid = round(min(total, sum(p["amount"] for p in history)), 2)
+
+    return {
+        "contract_id": f"CON-2025-{index:05d}",
+        "contract_date": _date(rng),
+        "total_amount": total,
+        "downpayment": round(total * 0.2, 2),
+        "paid": paid,
+        "remaining": round(total - paid, 2),
+        "products": items,
+        "payments_history": history,
+        "next_payment": {
+            "due_date": _date(rng, 2026),
+            "amount": round(total / 12, 2),
+            "days_left": rng.randint(0, 30),
+            "status": "upcoming",
+            "status_uz": "Kutilmoqda",
+        },
+        "total_payments": len(history),
+    }
+
+
+def my_contracts_payload(contracts: int, products: int = 3, payments: int = 12, seed: int = 0) -> Dict[str, Any]:
+    """get_my_contracts_by_telegram_id / get_customer_contracts_detailed javobi."""
+    rng = random.Random(seed)
+    items = [contract(rng, i, products, payments) for i in range(1, contracts + 1)]
+    return {"message": {
+        "success": True,
+        "customer_id": "CUST-00001",
+        "customer_name": "Alisher Navoiy",
+        "contracts": items,
+        "total_contracts": len(items),
+    }}
+
+
+def payment_history_payload(contracts: int, payments: int = 24, seed: int = 0) -> Dict[str, Any]:
+    """get_payment_history_by_telegram_id javobi."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(1, contracts + 1):
+        c = contract(rng, i, products=1, payments=payments)
+        items.append({
+            "contract_id": c["contract_id"],
+            "contract_date": c["contract_date"],
+            "total_amount": c["total_amount"],
+            "paid": c["paid"],
+            "remaining": c["remaining"],
+            "payments": c["payments_history"],
+            "total_payments": c["total_payments"],
+        })
+    return {"message": {
+        "success": True,
+        "customer_id": "CUST-00001",
+        "customer_name": "Alisher Navoiy",
+        "contracts": items,
+        "total_contracts": len(items),
+        "message": "To'lovlar tarixi yuklandi",
+    }}
+
+
+# ============================================================================
+# PER-CUSTOMER PAYLOADS (stub server / load test)
+# ============================================================================
+# Har bir telegram_id uchun deterministik mijoz: shartnoma ID'lari
+# CON-2025-<telegram_id><nn> - bir xil foydalanuvchi har doim bir xil javob oladi.
+
+def contract_ids(telegram_id: int, contracts: int) -> List[str]:
+    """Mijozning shartnoma ID'lari (stub server javoblari bilan bir xil)."""
+    return [f"CON-2025-{telegram_id * 100 + i:05d}" for i in range(1, contracts + 1)]
+
+
+def customer_id(telegram_id: int) -> str:
+    return f"CUST-{telegram_id:08d}"
+
+
+def telegram_id_of(customer_id_: str) -> int:
+    """customer_id() ning teskarisi ("CUST-00100000" -> 100000)."""
+    digits = "".join(ch for ch in customer_id_ if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def customer_contracts(telegram_id: int, contracts: int, products: int, payments: int) -> List[Dict[str, Any]]:
+    rng = random.Random(telegram_id)
+    return [contract(rng, telegram_id * 100 + i, products, payments) for i in range(1, contracts + 1)]
+
+
+def customer_payload(telegram_id: int, contracts: int = 3, products: int = 2, payments: int = 12) -> Dict[str, Any]:
+    """get_customer_by_telegram_id / by_passport / by_phone javobi."""
+    items = customer_contracts(telegram_id, contracts, products, payments)
+    return {"message": {
+        "success": True,
+        "customer": {
+            "customer_id": customer_id(telegram_id),
+            "customer_name": f"Mijoz {telegram_id}",
+            "phone": f"99890{telegram_id % 10 ** 7:07d}",
+            "passport": f"AB{telegram_id % 10 ** 7:07d}",
+            "classification": "A",
+            "telegram_id": str(telegram_id),
+        },
+        "contracts": items,
+        "next_payments": [
+            {**c["next_payment"], "contract_id": c["contract_id"]} for c in items
+        ],
+        "is_new_link": False,
+    }}
+
+
+def customer_contracts_payload(telegram_id: int, contracts: int = 3, products: int = 2, payments: int = 12) -> Dict[str, Any]:
+    """get_my_contracts_by_telegram_id / get_customer_contracts_detailed javobi."""
+    items = customer_contracts(telegram_id, contracts, products, payments)
+    return {"message": {
+        "success": True,
+        "customer_id": customer_id(telegram_id),
+        "customer_name": f"Mijoz {telegram_id}",
+        "contracts": items,
+        "total_contracts": len(items),
+    }}
+
+
+def customer_payment_history_payload(telegram_id: int, contracts: int = 3, payments: int = 12) -> Dict[str, Any]:
+    """get_payment_history_by_telegram_id javobi."""
+    items = []
+    for c in customer_contracts(telegram_id, contracts, 1, payments):
+        history = c.pop("payments_history")
+        c.pop("products")
+        c.pop("next_payment")
+        items.append({**c, "payments": history})
+    return {"message": {
+        "success": True,
+        "customer_id": customer_id(telegram_id),
+        "customer_name": f"Mijoz {telegram_id}",
+        "contracts": items,
+        "total_contracts": len(items),
+        "message": "To'lovlar tarixi yuklandi",
+    }}
+
+
+def _single_contract(contract_id: str, products: int, payments: int) -> Dict[str, Any]:
+    item = contract(random.Random(contract_id), 0, products, payments)
+    item["contract_id"] = contract_id
+    return item
+
+
+def contract_details_payload(contract_id: str, products: int = 2, payments: int = 12) -> Dict[str, Any]:
+    """get_contract_details javobi."""
+    return {"message": {"success": True, "contract": _single_contract(contract_id, products, payments)}}
+
+
+def contract_payment_history_payload(contract_id: str, payments: int = 12) -> Dict[str, Any]:
+    """get_payment_history javobi (bitta shartnoma)."""
+    history = _single_contract(contract_id, 1, payments)["payments_history"]
+    return {"message": {"success": True, "payments": history, "total_payments": len(history)}}
+
+
+def payment_history_with_products_payload(contract_id: str, products: int = 2, payments: int = 12) -> Dict[str, Any]:
+    """get_payment_history_with_products javobi."""
+    item = _single_contract(contract_id, products, payments)
+    history = item.pop("payments_history")
+    products_list = item.pop("products")
+    item.pop("next_payment")
+    return {"message": {
+        "success": True,
+        "contract": item,
+        "products": products_list,
+        "payments": history,
+        "total_paid": item["paid"],
+        "total_payments": len(history),
+    }}
+
+
+def schedules_payload(contract_ids_: List[str], months: int = 12) -> Dict[str, Any]:
+    """get_payment_schedules (batch) javobi."""
+    return {"message": {
+        "success": True,
+        "schedules": {cid: schedule_payload(cid, months)["message"] for cid in contract_ids_},
+    }}
+
+
+def reminders_payload(telegram_id: int, contracts: int = 3) -> Dict[str, Any]:
+    """get_reminders_by_telegram_id javobi."""
+    rng = random.Random(telegram_id)
+    reminders = [
+        {
+            "contract_id": cid,
+            "contract_date": _date(rng),
+            "due_date": _date(rng, 2026),
+            "amount": 125.0,
+            "outstanding": 125.0,
+            "days_left": rng.randint(-5, 10),
+            "status": rng.choice(["overdue", "today", "tomorrow", "soon", "upcoming"]),
+            "status_uz": "Kutilmoqda",
+            "priority": "medium",
+            "payment_number": rng.randint(1, 12),
+        }
+        for cid in contract_ids(telegram_id, contracts)
+    ]
+    return {"message": {
+        "success": True,
+        "customer_id": customer_id(telegram_id),
+        "customer_name": f"Mijoz {telegram_id}",
+        "reminders": reminders,
+        "total_reminders": len(reminders),
+        "message": "Eslatmalar yuklandi",
+    }}
+
+
+def upcoming_payments_payload(customer_id_: str, contracts: int = 3) -> Dict[str, Any]:
+    """get_upcoming_payments javobi."""
+    rng = random.Random(customer_id_)
+    return {"message": {"success": True, "payments": [
+        {
+            "contract_id": f"CON-2025-{i:05d}",
+            "due_date": _date(rng, 2026),
+            "amount": 125.0,
+            "days_left": rng.randint(0, 30),
+            "status": "soon",
+            "status_uz": "Yaqinda",
+        }
+        for i in range(1, contracts + 1)
+    ]}}
+
+
+def broadcast_telegram_ids(customers: int, first_id: int = 100000) -> List[int]:
+    """Broadcast ro'yxatidagi mijozlar (load test foydalanuvchilari bilan bir xil ID'lar)."""
+    return list(range(first_id, first_id + customers))
+
+
+def customers_needing_reminders_payload(
+    customers: int = 200,
+    first_id: int = 100000,
+    limit_start: int = 0,
+    limit_page_length: Optional[int] = None,
+) -> Dict[str, Any]:
+    """get_customers_needing_reminders javobi (limit_page_length bilan - bitta sahifa)."""
+    telegram_ids = broadcast_telegram_ids(customers, first_id)
+    if limit_page_length is not None:
+        telegram_ids = telegram_ids[limit_start:limit_start + limit_page_length]
+    reminders = []
+    for telegram_id in telegram_ids:
+        rng = random.Random(telegram_id)
+        days_left = rng.choice([3, 1, 0])
+        reminders.append({
+            "customer_id": customer_id(telegram_id),
+            "customer_name": f"Mijoz {telegram_id}",
+            "telegram_chat_id": str(telegram_id),
+            "contract_id": contract_ids(telegram_id, 1)[0],
+            "due_date": _date(rng, 2026),
+            "payment_amount": 125.0,
+            "days_left": days_left,
+            "reminder_type": {3: "3_days_before", 1: "1_day_before", 0: "payment_day"}[days_left],
+            "reminder_text": f"{days_left} kundan keyin to'lov kuni!",
+        })
+    return {"message": {"success": True, "reminders": reminders}}
+
+
+def overdue_customers_payload(customers: int = 200, first_id: int = 100000) -> Dict[str, Any]:
+    """get_overdue_customers javobi."""
+    items = []
+    for telegram_id in broadcast_telegram_ids(customers, first_id):
+        rng = random.Random(telegram_id)
+        days = rng.randint(1, 30)
+        items.append({
+            "customer_id": customer_id(telegram_id),
+            "customer_name": f"Mijoz {telegram_id}",
+            "telegram_chat_id": str(telegram_id),
+            "contract_id": contract_ids(telegram_id, 1)[0],
+            "due_date": _date(rng),
+            "payment_amount": 125.0,
+            "days_overdue": days,
+            "overdue_text": f"{days} kun kechikdi",
+        })
+    return {"message": {"success": True, "overdue_customers": items}}
+
+
+def due_payments_payload(customers: int = 200, first_id: int = 100000) -> Dict[str, Any]:
+    """get_all_active_due_payments javobi (app/services/notification.py)."""
+    data = []
+    for telegram_id in broadcast_telegram_ids(customers, first_id):
+        rng = random.Random(telegram_id)
+        data.append({
+            "name": contract_ids(telegram_id, 1)[0],
+            "custom_telegram_id": str(telegram_id),
+            "next_payment_date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "next_payment_amount": 125.0,
+        })
+    return {"message": {"data": data}}
+
+
+def support_contacts_payload() -> Dict[str, Any]:
+    """get_support_contacts javobi."""
+    return {"message": {"success": True, "contact": {
+        "name": "Operator",
+        "phone": "+998 90 123 45 67",
+        "email": "operator@example.com",
+        "role": "Operator",
+    }}}
+
+
+def fixtures() -> Dict[str, Dict[str, Any]]:
+    """Benchmark uchun standart to'plam: kichik / o'rta / katta mijozlar."""
+    return {
+        "schedule_12m": schedule_payload("CON-2025-00001"),
+        "my_contracts_small": my_contracts_payload(contracts=1, products=1, payments=3),
+        "my_contracts_medium": my_contracts_payload(contracts=5, products=3, payments=12),
+        "contracts_detailed_large": my_contracts_payload(contracts=25, products=4, payments=24),
+        "payment_history_large": payment_history_payload(contracts=25, payments=36),
+    }
+
+
+def load_fixtures(directory: str) -> Dict[str, bytes]:
+    """Papkadagi *.json fayllar (yozib olingan real javoblar) - nom → bytes."""
+    return {path.stem: path.read_bytes() for path in sorted(Path(directory).glob("*.json"))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sintetik ERPNext payload fixture'larini yozish")
+    parser.add_argument("--out", default="benchmarks/fixtures")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for name, payload in fixtures().items():
+        (out / f"{name}.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        print(f"{out / name}.json")
@@ -0,0 +1,75 @@
+"""
+Payment history streaming benchmark - to'liq decode vs JSONArrayStream
+
+get_payment_history_by_telegram_id javobi (sintetik, --contracts ta
+shartnoma, har birida --payments ta to'lov) uchun:
+- peak KB - tracemalloc bo'yicha eng yuqori xotira (body bytes'dan tashqari,
+  alohida o'lchanadi - tracemalloc vaqtni sekinlashtiradi)
+- first ms - birinchi shartnoma tayyor bo'lguncha (body 16 KB bo'laklarda)
+- total ms - barcha shartnomalar Contract modeliga o'girilguncha
+
+Ishga tushirish:
+    python -m benchmarks.payment_history_stream
+    python -m benchmarks.payment_history_stream --contracts 500 --payments 120
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from app.services import json_codec
+from app.services.json_stream import JSONArrayStream
+from app.services.models import Contract, parse_contracts
+from benchmarks.payloads import payment_history_payload
+
+CHUNK_SIZE = 16 * 1024
+
+
+def full_decode(raw: bytes):
+    started = time.perf_counter()
+    body = bytearray()
+    for i in range(0, len(raw), CHUNK_SIZE):
+        body += raw[i:i + CHUNK_SIZE]
+    contracts = parse_contracts(json_codec.loads(bytes(body))["message"]["contracts"])
+    first = time.perf_counter() - started
+    return first, time.perf_counter() - started, len(contracts)
+
+
+def streamed(raw: bytes):
+    first = None
+    count = 0
+    started = time.perf_counter()
+    parser = JSONArrayStream("contracts")
+    for i in range(0, len(raw), CHUNK_SIZE):
+        for item in parser.feed(raw[i:i + CHUNK_SIZE]):
+            Contract.from_dict(item)
+            count += 1
+            if first is None:
+                first = time.perf_counter() - started
+    parser.close()
+    return first, time.perf_counter() - started, count
+
+
+def run(contracts: int, payments: int):
+    raw = json.dumps(payment_history_payload(contracts, payments), ensure_ascii=False).encode()
+    print(f"payload: {contracts} contracts x {payments} payments, {len(raw) / 1024:.0f} KB ({json_codec.BACKEND})")
+    print(f"{'mode':<10} {'peak KB':>10} {'first ms':>10} {'total ms':>10} {'contracts':>10}")
+
+    for name, func in (("full", full_decode), ("stream", streamed)):
+        first, total, count = min((func(raw) for _ in range(5)), key=lambda r: r[1])
+
+        tracemalloc.start()
+        func(raw)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<10} {peak / 1024:>10.0f} {first * 1000:>10.1f} {total * 1000:>10.1f} {count:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payment history streaming benchmark")
+    parser.add_argument("--contracts", type=int, default=200)
+    parser.add_argument("--payments", type=int, default=60)
+    args = parser.parse_args()
+
+    run(args.contracts, args.payments)
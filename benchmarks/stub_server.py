@@ -0,0 +1,242 @@
+"""
+Stub Frappe Server - benchmark'lar uchun ERPNext o'rnini bosuvchi server
+
+Haqiqiy ERPNext'ga yuk bermasdan client tomonini o'lchash uchun:
+- /api/method/ping - Frappe ping
+- /api/method/<...>.telegram_bot_api.<method> - bot ishlatadigan barcha
+  metodlar uchun sintetik javoblar (benchmarks/payloads.py, har bir
+  telegram_id uchun deterministik mijoz)
+- noma'lum /api/method/* - {"success": True}
+- /__stats, /__reset - ochilgan TCP ulanishlar, so'rovlar va xatolar soni
+
+Ulanishlar client (host, port) juftligi bo'yicha sanaladi: HTTP/1.1 da har
+bir parallel so'rov alohida port, HTTP/2 da barcha stream'lar bitta port.
+
+Sozlamalar:
+- --latency-ms / --jitter-ms - har bir javobdan oldin sun'iy kechikish
+- --item-latency-ms - batch so'rovlarda (contract_ids) har bir shartnoma
+  uchun qo'shimcha kechikish (Frappe ularni birma-bir o'qiydi)
+- --error-rate / --error-status - tasodifiy xatolar ulushi (default 503 -
+  client retry qiladi)
+- --contracts / --products / --payments / --months - javob hajmi
+- --customers - broadcast ro'yxatlari (eslatmalar, qarzdorlar) uzunligi;
+  get_customers_needing_reminders limit_start / limit_page_length bilan sahifalanadi
+
+Ishga tushirish:
+    python -m benchmarks.stub_server --port 8765 --latency-ms 20
+    python -m benchmarks.stub_server --error-rate 0.05 --contracts 10 --payments 60
+
+hypercorn o'rnatilgan bo'lsa - HTTP/1.1 va h2c (TLS'siz HTTP/2) ikkalasi
+ham ishlaydi; aks holda uvicorn (faqat HTTP/1.1).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks import payloads
+
+API_PREFIX = "cash_flow_app.cash_flow_management.api.telegram_bot_api."
+
+
+@dataclass
+class StubSettings:
+    """Stub server sozlamalari (javob hajmi, kechikish, xatolar)."""
+    latency_ms: float = 20.0
+    jitter_ms: float = 0.0
+    item_latency_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    contracts: int = 3
+    products: int = 2
+    payments: int = 12
+    months: int = 12
+    customers: int = 200
+
+
+def _telegram_id(params: Mapping[str, str]) -> int:
+    """So'rovdagi mijoz: telegram_id > telegram_chat_id > customer_name > passport/phone."""
+    for key in ("telegram_id", "telegram_chat_id"):
+        value = params.get(key)
+        if value and value.lstrip("-").isdigit():
+            return int(value)
+    if params.get("customer_name"):
+        return payloads.telegram_id_of(params["customer_name"])
+    return payloads.telegram_id_of(params.get("passport_series") or params.get("phone") or "")
+
+
+def _contract_id(params: Mapping[str, str]) -> str:
+    return params.get("contract_id") or "CON-2025-00001"
+
+
+Handler = Callable[[Mapping[str, str], StubSettings], Dict[str, Any]]
+
+# telegram_bot_api metodlari -> javob generatori
+METHODS: Dict[str, Handler] = {
+    "get_customer_by_telegram_id": lambda p, s: payloads.customer_payload(
+        _telegram_id(p), s.contracts, s.products, s.payments),
+    "get_customer_by_passport": lambda p, s: payloads.customer_payload(
+        _telegram_id(p), s.contracts, s.products, s.payments),
+    "get_customer_by_phone": lambda p, s: payloads.customer_payload(
+        _telegram_id(p), s.contracts, s.products, s.payments),
+    "get_my_contracts_by_telegram_id": lambda p, s: payloads.customer_contracts_payload(
+        _telegram_id(p), s.contracts, s.products, s.payments),
+    "get_customer_contracts_detailed": lambda p, s: payloads.customer_contracts_payload(
+        _telegram_id(p), s.contracts, s.products, s.payments),
+    "get_contract_details": lambda p, s: payloads.contract_details_payload(
+        _contract_id(p), s.products, s.payments),
+    "get_payment_schedule": lambda p, s: payloads.schedule_payload(_contract_id(p), s.months),
+    "get_payment_schedules": lambda p, s: payloads.schedules_payload(
+        json.loads(p.get("contract_ids") or "[]"), s.months),
+    "get_payment_history": lambda p, s: payloads.contract_payment_history_payload(
+        _contract_id(p), s.payments),
+    "get_payment_history_with_products": lambda p, s: payloads.payment_history_with_products_payload(
+        _contract_id(p), s.products, s.payments),
+    "get_payment_history_by_telegram_id": lambda p, s: payloads.customer_payment_history_payload(
+        _telegram_id(p), s.contracts, s.payments),
+    "get_reminders_by_telegram_id": lambda p, s: payloads.reminders_payload(_telegram_id(p), s.contracts),
+    "get_upcoming_payments": lambda p, s: payloads.upcoming_payments_payload(
+        p.get("customer_name", ""), s.contracts),
+    "get_customers_needing_reminders": lambda p, s: payloads.customers_needing_reminders_payload(
+        s.customers, limit_start=int(p.get("limit_start") or 0),
+        limit_page_length=int(p["limit_page_length"]) if p.get("limit_page_length") else None),
+    "get_today_reminders": lambda p, s: payloads.customers_needing_reminders_payload(s.customers),
+    "get_overdue_customers": lambda p, s: payloads.overdue_customers_payload(s.customers),
+    "get_all_active_due_payments": lambda p, s: payloads.due_payments_payload(s.customers),
+    "get_support_contacts": lambda p, s: payloads.support_contacts_payload(),
+}
+
+
+def create_app(latency_ms: float = 0.0, settings: Optional[StubSettings] = None) -> FastAPI:
+    """Stub ASGI app (latency_ms - har bir javobdan oldin sun'iy kechikish)."""
+    settings = settings or StubSettings(latency_ms=latency_ms)
+    rng = random.Random(0)
+
+    app = FastAPI()
+    app.state.settings = settings
+    app.state.connections = set()
+    app.state.requests = 0
+    app.state.errors = 0
+    app.state.methods = Counter()
+
+    @app.middleware("http")
+    async def track_connections(request: Request, call_next):
+        if not request.url.path.startswith("/__"):
+            app.state.connections.add(tuple(request.scope.get("client") or ()))
+            app.state.requests += 1
+        return await call_next(request)
+
+    @app.get("/__stats")
+    async def stats():
+        return {
+            "connections": len(app.state.connections),
+            "requests": app.state.requests,
+            "errors": app.state.errors,
+            "methods": dict(app.state.methods),
+            "settings": asdict(settings),
+        }
+
+    @app.post("/__reset")
+    async def reset():
+        app.state.connections.clear()
+        app.state.requests = 0
+        app.state.errors = 0
+        app.state.methods.clear()
+        return {"ok": True}
+
+    @app.get("/api/method/ping")
+    async def ping():
+        return {"message": "pong"}
+
+    @app.api_route("/api/method/{method}", methods=["GET", "POST"])
+    async def method(method: str, request: Request):
+        delay = settings.latency_ms + (rng.uniform(0, settings.jitter_ms) if settings.jitter_ms else 0.0)
+        if settings.item_latency_ms and request.query_params.get("contract_ids"):
+            delay += settings.item_latency_ms * len(json.loads(request.query_params["contract_ids"]))
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        name = method[len(API_PREFIX):] if method.startswith(API_PREFIX) else method.rsplit(".", 1)[-1]
+        app.state.methods[name] += 1
+
+        if settings.error_rate and rng.random() < settings.error_rate:
+            app.state.errors += 1
+            return JSONResponse(
+                {"exc_type": "ServiceUnavailable", "message": "Stub server error"},
+                status_code=settings.error_status,
+            )
+
+        handler = METHODS.get(name)
+        if handler is None:
+            return {"message": {"success": True}}
+        return handler(request.query_params, settings)
+
+    return app
+
+
+def serve(host: str, port: int, settings: StubSettings):
+    """Server'ni ishga tushirish (hypercorn > uvicorn)."""
+    app = create_app(settings=settings)
+
+    try:
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+    except ImportError:
+        import uvicorn
+        print("hypercorn topilmadi - uvicorn (faqat HTTP/1.1)")
+        uvicorn.run(app, host=host, port=port, log_level="warning")
+        return
+
+    config = Config()
+    config.bind = [f"{host}:{port}"]
+    config.loglevel = "WARNING"
+    config.keep_alive_timeout = 60
+    # Default 1000 - undan keyin ulanish yopiladi (HTTP/2 da GOAWAY), o'lchovni buzadi
+    config.keep_alive_max_requests = 10 ** 9
+
+    async def run():
+        # SIGTERM (benchmark tugaganda) - traceback'siz to'xtash
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        await hypercorn_serve(app, config, shutdown_trigger=stop.wait)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Frappe server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", 8765)))
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--item-latency-ms", type=float, default=0.0, help="Batch so'rovda har bir shartnoma uchun")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Xato javoblar ulushi (0..1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--contracts", type=int, default=3, help="Mijozdagi shartnomalar soni")
+    parser.add_argument("--products", type=int, default=2, help="Shartnomadagi mahsulotlar soni")
+    parser.add_argument("--payments", type=int, default=12, help="Shartnomadagi to'lovlar soni")
+    parser.add_argument("--months", type=int, default=12, help="To'lov jadvali uzunligi")
+    parser.add_argument("--customers", type=int, default=200, help="Broadcast ro'yxatlari uzunligi")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, StubSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        item_latency_ms=args.item_latency_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        contracts=args.contracts,
+        products=args.products,
+        payments=args.payments,
+        months=args.months,
+        customers=args.customers,
+    ))
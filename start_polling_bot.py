@@ -38,8 +38,12 @@ async def on_startup():
     # 2. Webhookni majburan o'chiramiz
     await bot.delete_webhook(drop_pending_updates=True)
     logger.info("✅ Webhook o'chirildi")
+
+    # 3. ERPNext ulanishlarini oldindan ochish (HTTP/2 da bitta ulanish)
+    from app.services.erpnext_api import warm_up_http_client
+    await warm_up_http_client()
     #
-    # # 3. Notification (Eslatmalar) tizimini yoqamiz
+    # # 4. Notification (Eslatmalar) tizimini yoqamiz
     # asyncio.create_task(notification_worker())
     # logger.info("✅ Notification worker ishga tushdi")
 